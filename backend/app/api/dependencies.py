@@ -1,61 +1,81 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import AsyncIterator, Optional
 
-from fastapi import Depends, Header
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends, Header, Request
 
 from app.core.auth_service import AuthService
 from app.core.search_service import SearchService
 from app.domain.entities import User
-from app.infrastructure.database import get_session
 from app.infrastructure.repositories.cache_repo import CacheRepository
+from app.infrastructure.repositories.chunk_repo import ChunkRepository
 from app.infrastructure.repositories.document_repo import DocumentRepository
 from app.infrastructure.repositories.history_repo import HistoryRepository
 from app.infrastructure.repositories.user_repo import UserRepository
+from app.infrastructure.unit_of_work import UnitOfWork
 from app.utils.exceptions import AuthenticationError
 
 
-def get_document_repo(session: AsyncSession = Depends(get_session)) -> DocumentRepository:
-    return DocumentRepository(session)
+async def get_uow() -> AsyncIterator[UnitOfWork]:
+    """Per-request unit of work; a connection is taken only on first use."""
+    async with UnitOfWork() as uow:
+        yield uow
 
 
-def get_user_repo(session: AsyncSession = Depends(get_session)) -> UserRepository:
-    return UserRepository(session)
+async def get_primary_uow() -> AsyncIterator[UnitOfWork]:
+    """Unit of work whose reads all go to the primary, to see recent writes."""
+    async with UnitOfWork(read_your_writes=True) as uow:
+        yield uow
 
 
-def get_history_repo(session: AsyncSession = Depends(get_session)) -> HistoryRepository:
-    return HistoryRepository(session)
+def get_document_repo(uow: UnitOfWork = Depends(get_uow)) -> DocumentRepository:
+    return uow.documents
 
 
-def get_cache_repo(session: AsyncSession = Depends(get_session)) -> CacheRepository:
-    return CacheRepository(session)
+def get_user_repo(uow: UnitOfWork = Depends(get_uow)) -> UserRepository:
+    return uow.users
+
+
+def get_history_repo(uow: UnitOfWork = Depends(get_uow)) -> HistoryRepository:
+    return uow.history
+
+
+def get_cache_repo(uow: UnitOfWork = Depends(get_uow)) -> CacheRepository:
+    return uow.cache
+
+
+def get_chunk_repo(uow: UnitOfWork = Depends(get_uow)) -> ChunkRepository:
+    return uow.chunks
 
 
 def get_auth_service(user_repo: UserRepository = Depends(get_user_repo)) -> AuthService:
     return AuthService(user_repo)
 
 
-def get_search_service(
-    doc_repo: DocumentRepository = Depends(get_document_repo),
-    cache_repo: CacheRepository = Depends(get_cache_repo),
-) -> SearchService:
-    return SearchService(doc_repo, cache_repo)
+def get_search_service(request: Request) -> SearchService:
+    """The app-wide service created at startup."""
+    return request.app.state.search_service
 
 
 async def get_current_user(
     authorization: Optional[str] = Header(None),
     auth_service: AuthService = Depends(get_auth_service),
+    uow: UnitOfWork = Depends(get_uow),
 ) -> User:
     if not authorization or not authorization.startswith("Bearer "):
         raise AuthenticationError("Missing or invalid authorization header")
     token = authorization.removeprefix("Bearer ").strip()
-    return await auth_service.get_current_user(token)
+    try:
+        return await auth_service.get_current_user(token)
+    finally:
+        # the lookup is done; don't hold the connection through the handler
+        await uow.release()
 
 
 async def get_optional_user(
     authorization: Optional[str] = Header(None),
     auth_service: AuthService = Depends(get_auth_service),
+    uow: UnitOfWork = Depends(get_uow),
 ) -> Optional[User]:
     """Same as get_current_user but returns None instead of raising."""
     if not authorization or not authorization.startswith("Bearer "):
@@ -65,3 +85,5 @@ async def get_optional_user(
         return await auth_service.get_current_user(token)
     except Exception:
         return None
+    finally:
+        await uow.release()
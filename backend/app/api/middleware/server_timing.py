@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.logger import get_logger
+from app.utils.metrics import REQUEST_SECONDS, end_request, start_request
+
+logger = get_logger(__name__)
+
+
+class ServerTimingMiddleware:
+    """Collect per-stage timings for each request.
+
+    Stages recorded before the response starts go out in a ``Server-Timing``
+    header. Once the body is complete the full set is logged as one
+    ``request_timing`` event and the request is observed in the
+    ``epsteinrag_request_seconds`` histogram. Streamed responses report
+    later stages in their own ``timing`` event.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token, timings = start_request()
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timings.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            total = time.perf_counter() - started
+            end_request(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            REQUEST_SECONDS.labels(
+                method=scope["method"], route=path, status=str(status)
+            ).observe(total)
+            if timings.stages:
+                logger.info(
+                    "request_timing",
+                    method=scope["method"],
+                    route=path,
+                    status=status,
+                    total_ms=round(total * 1000, 1),
+                    stages=timings.as_ms(),
+                )
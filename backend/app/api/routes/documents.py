@@ -1,16 +1,47 @@
-from typing import Optional
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 
 from app.api.dependencies import get_document_repo, get_optional_user
 from app.api.schemas.search_schemas import DocumentDetailResponse, DocumentResponse, FilterMetadataResponse
-from app.domain.entities import User
+from app.core.export import MEDIA_TYPES, Encoder, export_documents, resolve_fields
+from app.domain.entities import ExportFilters, User
 from app.infrastructure.repositories.document_repo import DocumentRepository
 from app.utils.exceptions import NotFoundError
 
 router = APIRouter(tags=["documents"])
 
 
+@router.get("/export")
+async def export(
+    fmt: Literal["ndjson", "csv"] = Query(default="ndjson", alias="format"),
+    doc_type: Optional[List[str]] = Query(default=None),
+    people: Optional[List[str]] = Query(default=None),
+    locations: Optional[List[str]] = Query(default=None),
+    aircraft: Optional[List[str]] = Query(default=None),
+    dataset: Optional[List[str]] = Query(default=None),
+    fields: Optional[str] = Query(default=None, description="comma-separated columns; id is always included"),
+    after: Optional[str] = Query(default=None, description="resume after this document id"),
+    limit: Optional[int] = Query(default=None, ge=1),
+    user: Optional[User] = Depends(get_optional_user),
+):
+    """Stream every matching local document, in id order."""
+    filters = ExportFilters(
+        doc_types=doc_type,
+        people=people,
+        locations=locations,
+        aircraft=aircraft,
+        datasets=dataset,
+    )
+    encoder = Encoder(fmt, resolve_fields(fields), header=after is None)
+    return StreamingResponse(
+        export_documents(filters, encoder, after=after, limit=limit),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="documents.{fmt}"'},
+    )
+
+
 @router.get("/{document_id}", response_model=DocumentDetailResponse)
 async def get_document(
     document_id: str,
@@ -1,18 +1,30 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.infrastructure.database import get_session
+from app.infrastructure.database import get_session, replicas
+from app.infrastructure.external import duggan_client
 
 router = APIRouter(tags=["health"])
 
 
 @router.get("/health")
-async def health_check(session: AsyncSession = Depends(get_session)):
+async def health_check(request: Request, session: AsyncSession = Depends(get_session)):
     try:
         await session.execute(text("SELECT 1"))
         db_status = "connected"
     except Exception:
         db_status = "disconnected"
 
-    return {"status": "ok", "database": db_status}
+    maintenance = getattr(request.app.state, "cache_maintenance", None)
+    cache_stats = maintenance.last_stats if maintenance else None
+    search_service = getattr(request.app.state, "search_service", None)
+
+    return {
+        "status": "ok",
+        "database": db_status,
+        "query_cache": cache_stats.model_dump(mode="json") if cache_stats else None,
+        "duggan": duggan_client.breaker.snapshot(),
+        "replicas": replicas.snapshot() if replicas else None,
+        "llm_gate": search_service.llm_gate.snapshot() if search_service else None,
+    }
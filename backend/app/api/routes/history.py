@@ -3,10 +3,16 @@ from uuid import UUID
 
 from fastapi import APIRouter, Depends, Query
 
-from app.api.dependencies import get_current_user, get_history_repo, get_optional_user
+from app.api.dependencies import (
+    get_current_user,
+    get_history_repo,
+    get_optional_user,
+    get_primary_uow,
+)
 from app.api.schemas.history_schemas import HistoryListResponse
 from app.domain.entities import User
 from app.infrastructure.repositories.history_repo import HistoryRepository
+from app.infrastructure.unit_of_work import UnitOfWork
 
 router = APIRouter(tags=["history"])
 
@@ -16,12 +22,13 @@ async def list_history(
     limit: int = Query(default=50, ge=1, le=200),
     offset: int = Query(default=0, ge=0),
     user: Optional[User] = Depends(get_optional_user),
-    history_repo: HistoryRepository = Depends(get_history_repo),
+    # a search just made must show up, so no replica reads here
+    uow: UnitOfWork = Depends(get_primary_uow),
 ):
     if not user:
         return HistoryListResponse(history=[], total=0)
-    entries = await history_repo.list_by_user(user.id, limit=limit, offset=offset)
-    total = await history_repo.count_by_user(user.id)
+    entries = await uow.history.list_by_user(user.id, limit=limit, offset=offset)
+    total = await uow.history.count_by_user(user.id)
     return HistoryListResponse(
         history=[e.model_dump(mode="json") for e in entries],
         total=total,
@@ -1,47 +1,92 @@
 from __future__ import annotations
 
-import json
 import time
 
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import StreamingResponse
+import orjson
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import Response, StreamingResponse
 
-from typing import Optional
+from typing import Literal, Optional
+from uuid import UUID
 
 from app.api.dependencies import (
     get_history_repo,
     get_optional_user,
     get_search_service,
 )
-from app.api.schemas.search_schemas import SearchRequest, SearchResponse
+from app.api.schemas.search_schemas import (
+    AnswerResponse,
+    SearchBatchRequest,
+    SearchRequest,
+    SearchResponse,
+)
+from app.config import settings
 from app.core.search_service import SearchService
-from app.domain.entities import SearchQuery, User
+from app.domain.entities import SearchQuery, SearchResult, User
+from app.infrastructure.external.resilience import Priority
 from app.infrastructure.repositories.history_repo import HistoryRepository
+from app.utils.exceptions import EpsteinRAGException, NotFoundError
 
 router = APIRouter(tags=["search"])
 
+# GZipMiddleware leaves responses that already name an encoding alone. A
+# streamed response must not be compressed: zlib would hold each event back
+# until enough output has built up.
+UNCOMPRESSED = {"Content-Encoding": "identity"}
+
+
+def _to_query(body: SearchRequest) -> SearchQuery:
+    return SearchQuery(
+        text=body.query,
+        filters=body.filters,
+        limit=body.limit,
+        semantic_weight=body.semantic_weight,
+        mode=body.mode,
+    )
+
 
 @router.post("/search", response_model=SearchResponse)
 async def search(
     body: SearchRequest,
+    request: Request,
     user: Optional[User] = Depends(get_optional_user),
     search_service: SearchService = Depends(get_search_service),
     history_repo: HistoryRepository = Depends(get_history_repo),
 ):
-    query = SearchQuery(
-        text=body.query,
-        filters=body.filters,
-        limit=body.limit,
-        semantic_weight=body.semantic_weight,
+    query = _to_query(body)
+    filters = body.filters.model_dump(exclude_none=True) if body.filters else None
+
+    # compact cache hits go out as stored bytes, without model round trips
+    if settings.QUERY_CACHE_COMPACT:
+        start = time.time()
+        accepts_gzip = "gzip" in request.headers.get("accept-encoding", "")
+        hit = await search_service.cached_body(query, gzip=accepts_gzip)
+        if hit is not None:
+            cached_body, result_count = hit
+            if user:
+                await history_repo.create(
+                    user_id=user.id,
+                    query=body.query,
+                    filters=filters,
+                    result_count=result_count,
+                    search_time_ms=int((time.time() - start) * 1000),
+                )
+            headers = {"Content-Encoding": "gzip", "Vary": "Accept-Encoding"} if accepts_gzip else None
+            return Response(content=cached_body, media_type="application/json", headers=headers)
+
+    result = await search_service.search(
+        query,
+        check_cache=not settings.QUERY_CACHE_COMPACT,
+        priority=Priority.USER if user else Priority.ANONYMOUS,
+        defer_answer=body.async_answer,
     )
-    result = await search_service.search(query)
 
     # save to history only if user is authenticated
     if user:
         await history_repo.create(
             user_id=user.id,
             query=body.query,
-            filters=body.filters.model_dump(exclude_none=True) if body.filters else None,
+            filters=filters,
             result_count=result.total_results,
             search_time_ms=result.search_time_ms or 0,
         )
@@ -49,20 +94,62 @@ async def search(
     return result
 
 
+@router.post("/search/batch")
+async def search_batch(
+    body: SearchBatchRequest,
+    user: Optional[User] = Depends(get_optional_user),
+    search_service: SearchService = Depends(get_search_service),
+):
+    """Run many searches, writing one NDJSON line per query as each finishes."""
+    queries = [_to_query(item) for item in body.queries]
+    priority = Priority.USER if user else Priority.ANONYMOUS
+
+    async def lines():
+        async for indices, outcome in search_service.search_batch(queries, priority):
+            if isinstance(outcome, SearchResult):
+                response = SearchResponse.model_validate(outcome.model_dump())
+                payload = {"status": 200, "result": response.model_dump(mode="json")}
+            elif isinstance(outcome, EpsteinRAGException):
+                payload = {"status": outcome.status_code, "error": outcome.message}
+            else:
+                payload = {"status": 500, "error": "Internal server error"}
+            for index in indices:
+                yield orjson.dumps({"index": index, **payload}) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers=UNCOMPRESSED)
+
+
 @router.get("/search/stream")
 async def search_stream(
     q: str = Query(..., min_length=2),
     limit: int = Query(default=20, ge=1, le=100),
+    mode: Optional[Literal["hybrid", "local"]] = Query(default=None),
     user: Optional[User] = Depends(get_optional_user),
     search_service: SearchService = Depends(get_search_service),
 ):
-    query = SearchQuery(text=q, limit=limit)
+    query = SearchQuery(text=q, limit=limit, mode=mode)
+    priority = Priority.USER if user else Priority.ANONYMOUS
 
     async def event_generator():
         try:
-            async for event in search_service.search_stream(query):
-                yield f"data: {json.dumps(event)}\n\n"
+            async for event in search_service.search_stream(query, priority):
+                yield b"data: " + orjson.dumps(event) + b"\n\n"
         except Exception as e:
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+            yield b"data: " + orjson.dumps({"type": "error", "message": str(e)}) + b"\n\n"
+
+    return StreamingResponse(
+        event_generator(), media_type="text/event-stream", headers=UNCOMPRESSED
+    )
+
 
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+@router.get("/search/{query_id}/answer", response_model=AnswerResponse)
+async def search_answer(
+    query_id: UUID,
+    wait: float = Query(default=0, ge=0, le=30, description="seconds to long-poll while pending"),
+    search_service: SearchService = Depends(get_search_service),
+):
+    """Answer of an ``async_answer`` search; ``wait`` holds the request until it is ready."""
+    result = await search_service.answers.wait(query_id, wait)
+    if result is None:
+        raise NotFoundError("Answer")
+    return result
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field
@@ -13,6 +13,13 @@ class SearchRequest(BaseModel):
     filters: Optional[SearchFilters] = None
     limit: int = Field(default=20, ge=1, le=100)
     semantic_weight: float = Field(default=0.7, ge=0.0, le=1.0)
+    mode: Optional[Literal["hybrid", "local"]] = None
+    # return documents at once and generate the answer in the background
+    async_answer: bool = False
+
+
+class SearchBatchRequest(BaseModel):
+    queries: List[SearchRequest] = Field(..., min_length=1, max_length=100)
 
 
 class CitationResponse(BaseModel):
@@ -51,8 +58,19 @@ class SearchResponse(BaseModel):
     ai_answer: AIAnswerResponse
     documents: List[DocumentResponse]
     total_results: int
+    source: str = "remote"
+    degraded: Optional[str] = None
+    answer_pending: bool = False
     search_time_ms: Optional[int] = None
     cached: bool = False
+    stale: bool = False
+
+
+class AnswerResponse(BaseModel):
+    query_id: UUID
+    status: Literal["pending", "complete", "failed"]
+    ai_answer: Optional[AIAnswerResponse] = None
+    degraded: Optional[str] = None
 
 
 class DocumentDetailResponse(BaseModel):
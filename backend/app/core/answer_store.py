@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+from uuid import UUID
+
+from app.domain.entities import AnswerResult
+
+
+class _Entry:
+    def __init__(self, result: AnswerResult, expires: float) -> None:
+        self.result = result
+        self.expires = expires
+        self.done = asyncio.Event()
+
+
+class AnswerStore:
+    """Results of deferred answer generation, keyed by ``query_id``.
+
+    Holds at most ``max_entries`` results, evicting the oldest first, each
+    for ``ttl`` seconds from when its search returned. The store lives in
+    the worker that runs the generation, so clients must poll the same
+    worker (sticky sessions when there are several).
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: OrderedDict[UUID, _Entry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def create(self, query_id: UUID) -> None:
+        """Register a pending answer."""
+        self._expire()
+        while len(self._entries) >= self.max_entries:
+            self._entries.popitem(last=False)
+        self._entries[query_id] = _Entry(
+            AnswerResult(query_id=query_id, status="pending"), self.clock() + self.ttl
+        )
+
+    def finish(self, result: AnswerResult) -> None:
+        """Record the outcome and wake long-polls; a no-op once evicted."""
+        entry = self._entries.get(result.query_id)
+        if entry is None:
+            return
+        entry.result = result
+        entry.done.set()
+
+    def fail(self, query_id: UUID) -> None:
+        """Mark an answer failed unless it has already finished."""
+        entry = self._entries.get(query_id)
+        if entry is not None and not entry.done.is_set():
+            self.finish(AnswerResult(query_id=query_id, status="failed"))
+
+    def get(self, query_id: UUID) -> Optional[AnswerResult]:
+        entry = self._live(query_id)
+        return entry.result if entry else None
+
+    async def wait(self, query_id: UUID, timeout: float) -> Optional[AnswerResult]:
+        """Return the result once finished, or still pending after ``timeout`` seconds."""
+        entry = self._live(query_id)
+        if entry is None:
+            return None
+        if timeout > 0 and not entry.done.is_set():
+            try:
+                await asyncio.wait_for(entry.done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return entry.result
+
+    def _live(self, query_id: UUID) -> Optional[_Entry]:
+        entry = self._entries.get(query_id)
+        if entry is not None and entry.expires <= self.clock():
+            del self._entries[query_id]
+            return None
+        return entry
+
+    def _expire(self) -> None:
+        # entries are created in expiry order, so expired ones lead
+        now = self.clock()
+        while self._entries:
+            entry = next(iter(self._entries.values()))
+            if entry.expires > now:
+                break
+            self._entries.popitem(last=False)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.core.periodic import PeriodicTask
+from app.domain.entities import CacheStats
+from app.infrastructure.repositories.cache_repo import CacheRepository
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class CacheMaintenance(PeriodicTask):
+    """Background sweeper that keeps ``query_cache`` bounded.
+
+    Every ``interval`` seconds it deletes expired rows in small batches,
+    evicts the lowest-value entries down to ``max_rows`` and records the
+    table size, row count and eviction rate in :attr:`last_stats`.
+    """
+
+    name = "cache_sweep"
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        interval: int = settings.QUERY_CACHE_SWEEP_INTERVAL_SECONDS,
+        batch_size: int = settings.QUERY_CACHE_SWEEP_BATCH_SIZE,
+        max_rows: int = settings.QUERY_CACHE_MAX_ROWS,
+    ) -> None:
+        super().__init__(interval)
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.max_rows = max_rows
+        self.last_stats: Optional[CacheStats] = None
+        self._last_sweep: Optional[float] = None
+
+    async def sweep(self) -> CacheStats:
+        async with self.session_factory() as session:
+            repo = CacheRepository(session)
+            expired = await repo.cleanup_expired(self.batch_size)
+            expired += await repo.cleanup_expired_answers()
+            evicted = await repo.evict_to_size(self.max_rows, self.batch_size)
+            row_count = await repo.count()
+            table_bytes = await repo.table_size()
+
+        now = time.monotonic()
+        elapsed = now - self._last_sweep if self._last_sweep is not None else self.interval
+        self._last_sweep = now
+
+        stats = CacheStats(
+            row_count=row_count,
+            table_bytes=table_bytes,
+            expired_deleted=expired,
+            evicted=evicted,
+            evictions_per_minute=round(evicted * 60 / max(elapsed, 1e-3), 2),
+        )
+        self.last_stats = stats
+        logger.info("cache_sweep", **stats.model_dump(exclude={"swept_at"}))
+        return stats
+
+    async def tick(self) -> None:
+        await self.sweep()
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Dict
+
+from app.domain.entities import SearchQuery
+from app.infrastructure.external.resilience import Priority
+from app.infrastructure.repositories.cache_repo import CacheRepository
+from app.utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from app.core.search_service import SearchService
+
+logger = get_logger(__name__)
+
+
+class CacheRefresher:
+    """Recomputes query_cache entries in the background, one refresh per entry.
+
+    Duplicate requests are collapsed in-process by cache key, and across
+    workers by :meth:`CacheRepository.claim_refresh`.
+    """
+
+    def __init__(self, service: SearchService) -> None:
+        self.service = service
+        self._inflight: Dict[str, asyncio.Task[bool]] = {}
+
+    @staticmethod
+    def _key(query: SearchQuery) -> str:
+        filters = query.filters.model_dump(exclude_none=True) if query.filters else None
+        return CacheRepository._hash_query(query.text, filters)
+
+    def schedule(self, query: SearchQuery) -> bool:
+        """Start a background refresh unless one is already running here."""
+        key = self._key(query)
+        if key in self._inflight:
+            return False
+        task = asyncio.create_task(self.refresh(query))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return True
+
+    async def refresh(self, query: SearchQuery) -> bool:
+        """Recompute and re-cache ``query`` if no other worker holds the claim."""
+        filters = query.filters.model_dump(exclude_none=True) if query.filters else None
+        try:
+            async with self.service.uow_factory() as uow:
+                if not await uow.cache.claim_refresh(query.text, filters):
+                    return False
+            # a refresh shed by the LLM gate comes back degraded and is not cached
+            await self.service.search(query, check_cache=False, priority=Priority.BACKGROUND)
+        except Exception:
+            logger.warning("cache_refresh_failed", query=query.text, exc_info=True)
+            return False
+        logger.info("cache_refreshed", query=query.text)
+        return True
+
+    async def stop(self) -> None:
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.core.periodic import PeriodicTask
+from app.domain.entities import SearchFilters, SearchQuery
+from app.infrastructure.repositories.cache_repo import CacheRepository
+from app.utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from app.core.search_service import SearchService
+
+logger = get_logger(__name__)
+
+
+class CacheWarmer(PeriodicTask):
+    """Re-executes popular queries shortly before their cache entries expire.
+
+    On startup it also fills the cache for ``seed_queries``. Refreshes run
+    at most ``concurrency`` at a time, and no more than
+    ``max_llm_calls_per_hour`` are started in any rolling hour; each one is
+    counted as a Gemini call even if the answer cache ends up serving it,
+    but not when another worker holds the entry's claim or the refresh fails.
+    """
+
+    name = "cache_warm"
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        search_service: SearchService,
+        interval: int = settings.CACHE_WARM_INTERVAL_SECONDS,
+        ahead: int = settings.CACHE_WARM_AHEAD_SECONDS,
+        top_n: int = settings.CACHE_WARM_TOP_N,
+        min_hits: int = settings.CACHE_WARM_MIN_HITS,
+        concurrency: int = settings.CACHE_WARM_CONCURRENCY,
+        max_llm_calls_per_hour: int = settings.CACHE_WARM_MAX_LLM_CALLS_PER_HOUR,
+        seed_queries: Optional[List[str]] = None,
+    ) -> None:
+        super().__init__(interval)
+        self.session_factory = session_factory
+        # shares in-flight refreshes with stale-while-revalidate
+        self.refresher = search_service.refresher
+        self.ahead = ahead
+        self.top_n = top_n
+        self.min_hits = min_hits
+        self.max_llm_calls_per_hour = max_llm_calls_per_hour
+        self.seed_queries = (
+            seed_queries if seed_queries is not None else settings.CACHE_WARM_SEED_QUERIES
+        )
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._calls: Deque[float] = deque()
+
+    def _reserve_call(self) -> Optional[float]:
+        now = time.monotonic()
+        while self._calls and now - self._calls[0] > 3600:
+            self._calls.popleft()
+        if len(self._calls) >= self.max_llm_calls_per_hour:
+            return None
+        self._calls.append(now)
+        return now
+
+    def _refund_call(self, reserved_at: float) -> None:
+        if reserved_at in self._calls:
+            self._calls.remove(reserved_at)
+
+    async def refresh(
+        self,
+        text: str,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+    ) -> bool:
+        reserved_at = self._reserve_call()
+        if reserved_at is None:
+            logger.info("cache_warm_budget_exhausted", query=text)
+            return False
+        query = SearchQuery(
+            text=text,
+            filters=SearchFilters(**filters) if filters else None,
+            # the entry is keyed without its limit; recompute the same page
+            limit=limit or settings.DEFAULT_SEARCH_LIMIT,
+        )
+        async with self._semaphore:
+            refreshed = await self.refresher.refresh(query)
+        if not refreshed:
+            # claimed by another worker, or failed: no Gemini call to count
+            self._refund_call(reserved_at)
+        return refreshed
+
+    async def _refresh_all(
+        self, items: List[Tuple[str, Optional[Dict[str, Any]], Optional[int]]]
+    ) -> int:
+        done = await asyncio.gather(*(self.refresh(*item) for item in items))
+        return sum(done)
+
+    async def warm_seeds(self) -> int:
+        async with self.session_factory() as session:
+            repo = CacheRepository(session)
+            missing = [q for q in self.seed_queries if not await repo.has_fresh(q)]
+        warmed = await self._refresh_all([(q, None, None) for q in missing])
+        logger.info("cache_warm_seeds", seeds=len(self.seed_queries), warmed=warmed)
+        return warmed
+
+    async def tick(self) -> None:
+        async with self.session_factory() as session:
+            candidates = await CacheRepository(session).find_refresh_candidates(
+                expiring_within=self.ahead, limit=self.top_n, min_hits=self.min_hits
+            )
+        if not candidates:
+            return
+        refreshed = await self._refresh_all(candidates)
+        logger.info("cache_warm", candidates=len(candidates), refreshed=refreshed)
+
+    async def run(self) -> None:
+        if self.seed_queries:
+            try:
+                await self.warm_seeds()
+            except Exception:
+                logger.warning("cache_warm_seeds_failed", exc_info=True)
+        await super().run()
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from typing import List
+
+from app.config import settings
+from app.domain.entities import Passage
+
+
+def _last_break(text: str, lo: int, hi: int) -> int:
+    return max(text.rfind(" ", lo, hi), text.rfind("\n", lo, hi))
+
+
+def _first_break(text: str, lo: int, hi: int) -> int:
+    hits = [i for i in (text.find(" ", lo, hi), text.find("\n", lo, hi)) if i != -1]
+    return min(hits) if hits else -1
+
+
+def split_passages(
+    document_id: str,
+    text: str,
+    size: int = settings.CHUNK_SIZE_CHARS,
+    overlap: int = settings.CHUNK_OVERLAP_CHARS,
+) -> List[Passage]:
+    """Split ``text`` into overlapping passages of roughly ``size`` characters.
+
+    Passages end on whitespace where one exists in the last quarter of the
+    window, and each one starts ``overlap`` characters before the previous
+    one ended so a sentence cut at a boundary appears whole in one of them.
+    """
+    passages: List[Passage] = []
+    n = len(text)
+    start = 0
+    while start < n:
+        end = min(start + size, n)
+        if end < n:
+            cut = _last_break(text, start + size * 3 // 4, end)
+            if cut > start:
+                end = cut
+        chunk = text[start:end].strip()
+        if chunk:
+            passages.append(
+                Passage(
+                    document_id=document_id,
+                    chunk_index=len(passages),
+                    start_char=start,
+                    content=chunk,
+                )
+            )
+        if end >= n:
+            break
+        start = max(end - overlap, start + 1)
+        # don't open a passage in the middle of a word
+        brk = _first_break(text, start, end)
+        if brk != -1:
+            start = brk + 1
+    return passages
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Optional, Set
+
+from app.config import settings
+from app.domain.entities import Document, PromptContext
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n{2,}")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "the", "and", "for", "are", "was", "were", "with", "that", "this", "from",
+    "what", "who", "when", "where", "which", "how", "did", "does", "about",
+    "any", "all", "has", "have", "had", "his", "her", "their", "they", "into",
+}
+DUPLICATE_THRESHOLD = 0.8
+# OCR text often lacks punctuation; longer "sentences" are cut into windows
+MAX_SEGMENT_CHARS = 400
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English prose)."""
+    return len(text) // 4 + 1
+
+
+def _terms(text: str) -> Set[str]:
+    return {w for w in _WORD_RE.findall(text.lower()) if len(w) > 2 and w not in _STOPWORDS}
+
+
+def _shingles(text: str) -> Set[str]:
+    words = _WORD_RE.findall(text.lower())
+    return {" ".join(words[i : i + 3]) for i in range(max(len(words) - 2, 1))}
+
+
+def _is_duplicate(shingles: Set[str], seen: List[Set[str]]) -> bool:
+    for other in seen:
+        union = len(shingles | other)
+        if union and len(shingles & other) / union >= DUPLICATE_THRESHOLD:
+            return True
+    return False
+
+
+def _segments(text: str) -> List[str]:
+    segments: List[str] = []
+    for sentence in _SENTENCE_RE.split(text):
+        sentence = " ".join(sentence.split())
+        while len(sentence) > MAX_SEGMENT_CHARS:
+            cut = sentence.rfind(" ", 0, MAX_SEGMENT_CHARS)
+            cut = cut if cut > 0 else MAX_SEGMENT_CHARS
+            segments.append(sentence[:cut])
+            sentence = sentence[cut:].strip()
+        if sentence:
+            segments.append(sentence)
+    return segments
+
+
+def _source_text(doc: Document, passages: Optional[Dict[str, List[str]]]) -> str:
+    if passages and passages.get(doc.id):
+        return "\n\n".join(passages[doc.id])
+    return doc.content or doc.content_preview or ""
+
+
+def _header(index: int, doc: Document) -> str:
+    meta = f"[Type: {doc.doc_type or 'unknown'}]"
+    if doc.people:
+        meta += f" [People: {', '.join(doc.people[:5])}]"
+    return f"[{index}] EFTA: {doc.efta_id} {meta}"
+
+
+def build_context(
+    query: str,
+    documents: List[Document],
+    passages: Optional[Dict[str, List[str]]] = None,
+    token_budget: int = settings.CONTEXT_TOKEN_BUDGET,
+) -> PromptContext:
+    """Assemble the LLM context for ``documents`` within ``token_budget``.
+
+    Each document gets an equal share of the budget (unused share rolls
+    over to the next one) and fills it with its sentences that mention the
+    most query terms, kept in reading order. Sentences that near-duplicate
+    one already selected (from any document) are dropped.
+    """
+    query_terms = _terms(query)
+    seen: List[Set[str]] = []
+    parts: List[str] = []
+    dropped = 0
+    segments = 0
+    remaining = token_budget
+
+    for i, doc in enumerate(documents, 1):
+        header = _header(i, doc)
+        remaining -= estimate_tokens(header)
+        share = remaining // (len(documents) - i + 1)
+
+        sentences = _segments(_source_text(doc, passages))
+        ranked = sorted(
+            range(len(sentences)),
+            key=lambda j: (len(query_terms & _terms(sentences[j])), -j),
+            reverse=True,
+        )
+        chosen: List[int] = []
+        used = 0
+        for j in ranked:
+            cost = estimate_tokens(sentences[j])
+            if used + cost > share:
+                continue
+            shingles = _shingles(sentences[j])
+            if _is_duplicate(shingles, seen):
+                dropped += 1
+                continue
+            seen.append(shingles)
+            chosen.append(j)
+            used += cost
+
+        remaining -= used
+        segments += len(chosen)
+        body = " ".join(sentences[j] for j in sorted(chosen))
+        parts.append(f"{header}\n{body or '[no relevant excerpt]'}\n")
+
+    text = "\n---\n".join(parts)
+    return PromptContext(
+        text=text,
+        token_estimate=estimate_tokens(text),
+        segments=segments,
+        dropped_duplicates=dropped,
+    )
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import csv
+import io
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence
+
+import orjson
+
+from app.domain.entities import ExportFilters
+from app.infrastructure.repositories.document_repo import EXPORT_FIELDS
+from app.infrastructure.unit_of_work import UnitOfWork
+from app.utils.exceptions import ValidationError
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+# Tag arrays go into one CSV cell, joined with this
+CSV_LIST_SEPARATOR = "|"
+# Encoded rows are sent in pieces of about this size, not one write per row
+CHUNK_BYTES = 64 * 1024
+
+
+def resolve_fields(spec: Optional[str]) -> List[str]:
+    """Columns named in a comma-separated ``spec``, all of them if empty.
+
+    ``id`` always comes first, since it is what an export resumes from.
+    """
+    if not spec:
+        return list(EXPORT_FIELDS)
+    fields = [f.strip() for f in spec.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in EXPORT_FIELDS]
+    if unknown:
+        raise ValidationError(f"Unknown export fields: {', '.join(unknown)}")
+    return ["id"] + [f for f in dict.fromkeys(fields) if f != "id"]
+
+
+def _csv_cell(value: Any) -> Any:
+    if isinstance(value, list):
+        return CSV_LIST_SEPARATOR.join(value)
+    return "" if value is None else value
+
+
+class Encoder:
+    """Serializes rows as NDJSON lines or as CSV with a header row.
+
+    Output comes in chunks of about ``CHUNK_BYTES``. ``last_id`` is the id
+    of the last row in the chunks yielded so far, where a resumed export
+    should start after. A resumed CSV export leaves out the ``header`` so
+    it can be appended to the first part.
+    """
+
+    def __init__(self, fmt: str, fields: Sequence[str], header: bool = True) -> None:
+        self.fmt = fmt
+        self.fields = list(fields)
+        self.header = header
+        self.last_id: Optional[str] = None
+
+    async def encode(self, rows: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if self.fmt == "csv" and self.header:
+            writer.writerow(self.fields)
+        pending_id: Optional[str] = None
+        async for row in rows:
+            if self.fmt == "csv":
+                writer.writerow([_csv_cell(row[f]) for f in self.fields])
+            else:
+                buffer.write(orjson.dumps(row).decode())
+                buffer.write("\n")
+            pending_id = row["id"]
+            if buffer.tell() >= CHUNK_BYTES:
+                self.last_id = pending_id
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            self.last_id = pending_id or self.last_id
+            yield buffer.getvalue().encode()
+
+
+async def export_documents(
+    filters: ExportFilters,
+    encoder: Encoder,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+    uow_factory: Callable[[], UnitOfWork] = UnitOfWork,
+) -> AsyncIterator[bytes]:
+    """Encoded export of the matching documents, read through one cursor.
+
+    The unit of work lives as long as the stream, so it is opened here
+    rather than by the caller's request scope.
+    """
+    async with uow_factory() as uow:
+        rows = uow.documents.export(filters, encoder.fields, after=after, limit=limit)
+        async for chunk in encoder.encode(rows):
+            yield chunk
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Optional
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PeriodicTask:
+    """Base for in-process background jobs that run :meth:`tick` on an interval."""
+
+    name = "periodic_task"
+
+    def __init__(self, interval: int) -> None:
+        self.interval = interval
+        self._task: Optional[asyncio.Task[None]] = None
+
+    async def tick(self) -> None:
+        raise NotImplementedError
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning(f"{self.name}_failed", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
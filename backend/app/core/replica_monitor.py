@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from app.config import settings
+from app.core.periodic import PeriodicTask
+from app.infrastructure.replicas import ReplicaSet
+
+
+class ReplicaMonitor(PeriodicTask):
+    """Re-checks replica reachability and lag so reads skip unhealthy replicas."""
+
+    name = "replica_check"
+
+    def __init__(
+        self,
+        replicas: ReplicaSet,
+        interval: int = settings.DB_REPLICA_CHECK_INTERVAL_SECONDS,
+    ) -> None:
+        super().__init__(interval)
+        self.replicas = replicas
+
+    async def tick(self) -> None:
+        await self.replicas.check()
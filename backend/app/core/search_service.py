@@ -1,92 +1,169 @@
 from __future__ import annotations
 
+import asyncio
+import re
 import time
-from typing import Any, AsyncGenerator, Dict, List
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Set, Tuple, Union
 
 from app.domain.entities import (
     AIAnswer,
+    AnswerResult,
     Citation,
     Document,
+    Passage,
     SearchFilters,
     SearchQuery,
     SearchResult,
 )
+from app.config import settings
+from app.core.answer_store import AnswerStore
+from app.core.cache_refresher import CacheRefresher
+from app.core.context_builder import build_context
 from app.infrastructure.external import duggan_client, gemini_client
-from app.infrastructure.repositories.document_repo import DocumentRepository
+from app.infrastructure.external.resilience import AdmissionController, Priority
 from app.infrastructure.repositories.cache_repo import CacheRepository
+from app.infrastructure.unit_of_work import UnitOfWork
+from app.utils.exceptions import EpsteinRAGException, ExternalServiceError, OverloadedError
 from app.utils.logger import get_logger
+from app.utils.metrics import current_timings, stage
 
 logger = get_logger(__name__)
 
+# Reciprocal rank fusion constant for merging local rankings
+RRF_K = 60
+
 
 class SearchService:
+    """Search orchestration, created once per app and shared by all requests.
+
+    Every call runs in its own :class:`UnitOfWork` and releases the
+    connection before waiting on Gemini or DugganUSA. Answer generation
+    is admission-controlled; a search that cannot get a slot returns its
+    documents without an answer, with ``degraded`` saying why. With
+    ``defer_answer`` the documents return at once and the answer is
+    published to :attr:`answers` under the result's ``query_id``.
+    """
+
     def __init__(
         self,
-        document_repo: DocumentRepository,
-        cache_repo: CacheRepository,
+        uow_factory: Callable[[], UnitOfWork] = UnitOfWork,
+        duggan: Optional[duggan_client.DugganClient] = None,
     ) -> None:
-        self.doc_repo = document_repo
-        self.cache_repo = cache_repo
-        self.duggan = duggan_client.DugganClient()
+        self.uow_factory = uow_factory
+        self.duggan = duggan or duggan_client.DugganClient()
+        self.refresher = CacheRefresher(self)
+        self.llm_gate = AdmissionController(
+            "gemini_llm",
+            limit=settings.LLM_MAX_CONCURRENCY,
+            max_queue=settings.LLM_QUEUE_SIZE,
+            queue_timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+        )
+        self.answers = AnswerStore(
+            max_entries=settings.ANSWER_STORE_MAX_ENTRIES,
+            ttl=settings.ANSWER_STORE_TTL_SECONDS,
+        )
+        self._answer_tasks: Set[asyncio.Task[None]] = set()
+
+    async def close(self) -> None:
+        await self.refresher.stop()
+        for task in self._answer_tasks:
+            task.cancel()
+        await asyncio.gather(*self._answer_tasks, return_exceptions=True)
+        await self.duggan.aclose()
+
+    async def search(
+        self,
+        query: SearchQuery,
+        check_cache: bool = True,
+        priority: Priority = Priority.ANONYMOUS,
+        defer_answer: bool = False,
+        embedding: Optional[List[float]] = None,
+    ) -> SearchResult:
+        """Search, answer and cache ``query``.
+
+        ``embedding`` is the query text's embedding if the caller already
+        has it; otherwise it is computed when needed.
+        """
+        async with self.uow_factory() as uow:
+            return await self._search(
+                uow, query, check_cache, priority, defer_answer, embedding
+            )
 
-    async def search(self, query: SearchQuery) -> SearchResult:
+    async def _search(
+        self,
+        uow: UnitOfWork,
+        query: SearchQuery,
+        check_cache: bool,
+        priority: Priority,
+        defer_answer: bool,
+        embedding: Optional[List[float]],
+    ) -> SearchResult:
         start = time.time()
+        deadline = time.monotonic() + settings.SEARCH_DEADLINE_SECONDS
+        shares_cache = self._shares_cache(query)
 
         # 1 — check cache
-        filters_dict = query.filters.model_dump(exclude_none=True) if query.filters else None
-        cached = await self.cache_repo.get(query.text, filters_dict)
-        if cached:
-            logger.info("cache_hit", query=query.text)
-            cached["cached"] = True
-            result = SearchResult(**cached)
-            result.search_time_ms = int((time.time() - start) * 1000)
-            return result
+        if check_cache and shares_cache:
+            cached = await self._cached_result(uow, query, start)
+            if cached is not None:
+                return cached
 
-        # 2 — try local vector search first
         documents: List[Document] = []
-        local_count = await self.doc_repo.count()
-        if local_count > 100:
-            embedding = await gemini_client.embed_text(query.text)
-            documents = await self.doc_repo.vector_search(embedding, limit=query.limit)
-
-        # 3 — if not enough local results, hit DugganUSA API
-        if len(documents) < query.limit:
-            filter_expr = self._build_duggan_filter(query.filters)
-            api_docs = await self.duggan.search(
-                query=query.text,
-                limit=min(query.limit * 3, 100),
-                filter_expr=filter_expr,
-            )
-            # Cache docs without embeddings first (fast), embed later
-            for doc in api_docs:
+        passages: Dict[str, List[str]] = {}
+        degraded: Optional[str] = None
+        if self._mode(query) == "local":
+            # 2 — local-only mode: vector, keyword and metadata retrieval
+            documents, passages = await self._local_search(uow, query, embedding)
+            source = "local"
+        else:
+            # 2 — try local passage search first, whole-document vectors as fallback
+            local_count = await uow.documents.count()
+            if local_count > 100:
+                await uow.release()
+                if embedding is None:
+                    embedding = await gemini_client.embed_text(query.text)
+                documents, passages = await self._passage_search(
+                    uow, embedding, query.limit, query.filters
+                )
+                if not documents:
+                    documents = await uow.documents.vector_search(
+                        embedding, limit=query.limit, filters=query.filters
+                    )
+
+            # 3 — if not enough local results, hit DugganUSA API
+            local_ids = {d.id for d in documents}
+            if len(documents) < query.limit:
+                await uow.release()
                 try:
-                    await self.doc_repo.upsert(doc, embedding=None)
-                except Exception:
-                    pass
-            # Merge & deduplicate
-            seen_ids = {d.id for d in documents}
-            for d in api_docs:
-                if d.id not in seen_ids:
-                    documents.append(d)
-                    seen_ids.add(d.id)
+                    api_docs = await self._fetch_remote(query, deadline)
+                except ExternalServiceError as exc:
+                    # Serve what we hold locally rather than failing the request
+                    if not documents:
+                        documents, passages = await self._local_fallback(uow, query, exc)
+                        local_ids = {d.id for d in documents}
+                    api_docs = []
+                    degraded = "remote_unavailable"
+                # Cache docs without embeddings first (fast), embed later
+                await self._store_documents(uow, api_docs)
+                # Merge & deduplicate
+                seen_ids = set(local_ids)
+                for d in api_docs:
+                    if d.id not in seen_ids:
+                        documents.append(d)
+                        seen_ids.add(d.id)
+            source = self._source(documents[: query.limit], local_ids)
 
         # 4 — DugganUSA already returns semantically ranked results, just trim
         documents = documents[: query.limit]
 
-        # 5 — generate AI answer from top docs
-        context_docs = documents[:5]
-        answer_text = await gemini_client.generate_answer(query.text, context_docs)
-        citations = [
-            Citation(
-                document_id=d.id,
-                efta_id=d.efta_id,
-                snippet=d.content_preview or d.content[:200],
-                doc_type=d.doc_type,
-                relevance_score=d.relevance_score or 0.0,
+        # 5 — generate AI answer from top docs, unless deferred
+        context_docs = documents[: settings.CONTEXT_MAX_DOCUMENTS]
+        ai_answer = AIAnswer(text="")
+        if not defer_answer:
+            ai_answer, shed = await self._answer(
+                uow, query.text, context_docs, passages, priority
             )
-            for d in context_docs
-        ]
-        ai_answer = AIAnswer(text=answer_text, citations=citations)
+            degraded = shed or degraded
 
         elapsed = int((time.time() - start) * 1000)
         result = SearchResult(
@@ -94,69 +171,616 @@ class SearchService:
             ai_answer=ai_answer,
             documents=documents,
             total_results=len(documents),
+            source=source,
+            degraded=degraded,
+            answer_pending=defer_answer,
             search_time_ms=elapsed,
         )
 
-        # 6 — cache result
-        await self.cache_repo.set(
-            query.text,
-            filters_dict,
-            result.model_dump(mode="json"),
-        )
+        # 6 — cache result (degraded results are not worth pinning)
+        if defer_answer:
+            self._defer_answer(query, result, context_docs, passages, priority)
+        elif shares_cache and not degraded:
+            await self._cache_result(uow, query, result)
+
+        return result
 
+    async def _cached_result(
+        self, uow: UnitOfWork, query: SearchQuery, start: float
+    ) -> Optional[SearchResult]:
+        filters_dict = query.filters.model_dump(exclude_none=True) if query.filters else None
+        cached = await uow.cache.get(query.text, filters_dict)
+        if not cached:
+            return None
+        logger.info("cache_hit", query=query.text, stale=cached.get("stale", False))
+        self._revalidate(query, cached.get("stale", False))
+        cached["cached"] = True
+        for doc in cached["documents"]:
+            doc.setdefault("content", "")
+        result = SearchResult(**cached)
+        result.search_time_ms = int((time.time() - start) * 1000)
         return result
 
+    async def search_batch(
+        self, queries: List[SearchQuery], priority: Priority = Priority.ANONYMOUS
+    ) -> AsyncGenerator[Tuple[List[int], Union[SearchResult, Exception]], None]:
+        """Run many searches, yielding ``(indices, result or error)`` as each finishes.
+
+        Identical queries run once and are reported under all their indices.
+        Cache hits come first; the remaining query texts are embedded in one
+        call and searched at most ``SEARCH_BATCH_CONCURRENCY`` at a time.
+        """
+        start = time.time()
+        groups: Dict[str, List[int]] = {}
+        unique: Dict[str, SearchQuery] = {}
+        for i, query in enumerate(queries):
+            key = query.model_dump_json()
+            groups.setdefault(key, []).append(i)
+            unique.setdefault(key, query)
+
+        hits: Dict[str, SearchResult] = {}
+        async with self.uow_factory() as uow:
+            for key, query in unique.items():
+                if self._shares_cache(query):
+                    hit = await self._cached_result(uow, query, start)
+                    if hit is not None:
+                        hits[key] = hit
+        for key, hit in hits.items():
+            yield groups[key], hit
+
+        pending = {k: q for k, q in unique.items() if k not in hits}
+        embeddings = await self._embed_texts([q.text for q in pending.values()])
+        semaphore = asyncio.Semaphore(settings.SEARCH_BATCH_CONCURRENCY)
+
+        async def run(key: str, query: SearchQuery) -> Tuple[str, Union[SearchResult, Exception]]:
+            async with semaphore:
+                try:
+                    result = await self.search(
+                        query,
+                        check_cache=False,
+                        priority=priority,
+                        embedding=embeddings.get(query.text),
+                    )
+                except EpsteinRAGException as exc:
+                    return key, exc
+                except Exception as exc:
+                    logger.error("batch_search_failed", query=query.text, exc_info=True)
+                    return key, exc
+            return key, result
+
+        tasks = [asyncio.create_task(run(k, q)) for k, q in pending.items()]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                key, outcome = await finished
+                yield groups[key], outcome
+        finally:
+            # the client went away; stop the searches it no longer waits for
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    async def _embed_texts(texts: List[str]) -> Dict[str, List[float]]:
+        """Embed distinct texts in one call; empty if embedding is unavailable."""
+        texts = list(dict.fromkeys(texts))
+        if not texts:
+            return {}
+        try:
+            return dict(zip(texts, await gemini_client.embed_batch(texts)))
+        except ExternalServiceError:
+            # each search embeds, or falls back, on its own
+            return {}
+
+    async def cached_body(
+        self, query: SearchQuery, gzip: bool = False
+    ) -> Optional[Tuple[bytes, int]]:
+        """Return a serialized response body and result count on a compact cache hit.
+
+        The body is built from the stored bytes without decoding them into
+        models; with ``gzip`` it is already gzip-encoded.
+        """
+        if not self._shares_cache(query):
+            return None
+        start = time.time()
+        filters_dict = query.filters.model_dump(exclude_none=True) if query.filters else None
+        async with self.uow_factory() as uow:
+            hit = await uow.cache.get_compressed(query.text, filters_dict)
+        if hit is None:
+            return None
+        blob, result_count, stale = hit
+        logger.info(
+            "cache_hit", query=query.text, encoding="gzip" if gzip else "identity", stale=stale
+        )
+        self._revalidate(query, stale)
+        build = CacheRepository.gzip_body if gzip else CacheRepository.json_body
+        body = build(
+            blob,
+            search_time_ms=int((time.time() - start) * 1000),
+            cached=True,
+            stale=stale,
+        )
+        return body, result_count
+
     async def search_stream(
-        self, query: SearchQuery
+        self, query: SearchQuery, priority: Priority = Priority.ANONYMOUS
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Streaming variant — yields SSE events.
+
+        Documents go out as soon as retrieval finishes, then the answer
+        chunks, then citations; local writes happen after the answer, and a
+        final ``timing`` event reports time-to-first-byte and -token.
+        Cached results, including those from ``search``, are replayed as the
+        same event sequence, and fresh answers are cached for both paths.
+        A search shed by admission control sends no answer or citations, and
+        its ``complete`` event carries the ``degraded`` reason.
+        """
+        async with self.uow_factory() as uow:
+            async for event in self._search_stream(uow, query, priority):
+                yield event
+
+    async def _search_stream(
+        self, uow: UnitOfWork, query: SearchQuery, priority: Priority
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        start = time.time()
+        shares_cache = self._shares_cache(query)
+        filters_dict = query.filters.model_dump(exclude_none=True) if query.filters else None
+        cached = await uow.cache.get(query.text, filters_dict) if shares_cache else None
+        if cached:
+            logger.info("cache_hit", query=query.text, stream=True, stale=cached.get("stale", False))
+            self._revalidate(query, cached.get("stale", False))
+            async for event in self._replay(cached, start):
+                yield event
+            return
+
+        passages: Dict[str, List[str]] = {}
+        degraded: Optional[str] = None
+        if self._mode(query) == "local":
+            fetched, passages = await self._local_search(uow, query)
+            source = "local"
+        else:
+            deadline = time.monotonic() + settings.SEARCH_DEADLINE_SECONDS
+            await uow.release()
+            try:
+                fetched = await self._fetch_remote(query, deadline)
+                source = "remote"
+            except ExternalServiceError as exc:
+                fetched, passages = await self._local_fallback(uow, query, exc)
+                source = "local"
+                degraded = "remote_unavailable"
+        documents = fetched[: query.limit]
+
+        # nothing is held while the client reads
+        await uow.release()
+        yield self._documents_event(
+            [d.model_dump(mode="json", exclude={"content"}) for d in documents],
+            source=source,
+        )
+        ttfb_ms = int((time.time() - start) * 1000)
+
+        context_docs = documents[: settings.CONTEXT_MAX_DOCUMENTS]
+
+        # Stream AI answer
+        ttft_ms: Optional[int] = None
+        answer_parts: List[str] = []
+        try:
+            async for chunk in self._generate_answer_stream(
+                uow, query.text, context_docs, passages, priority
+            ):
+                if ttft_ms is None:
+                    ttft_ms = int((time.time() - start) * 1000)
+                answer_parts.append(chunk)
+                yield {"type": "answer_chunk", "content": chunk}
+            citations = self._citations(context_docs)
+        except OverloadedError as exc:
+            degraded = self._shed(query.text, exc)
+            citations = []
+
+        # Send citations
+        for c in citations:
+            yield self._citation_event(c.model_dump(mode="json"))
+
+        # Cache docs and the completed answer, off the critical path
+        if source == "remote":
+            await self._store_documents(uow, fetched)
+        if shares_cache and not degraded:
+            await self._cache_result(
+                uow,
+                query,
+                SearchResult(
+                    query=query.text,
+                    ai_answer=AIAnswer(text="".join(answer_parts), citations=citations),
+                    documents=documents,
+                    total_results=len(documents),
+                    source=source,
+                    search_time_ms=int((time.time() - start) * 1000),
+                ),
+            )
+
+        yield {"type": "complete", "total_results": len(documents), "degraded": degraded}
+        yield self._timing_event(query.text, start, ttfb_ms, ttft_ms)
+
+    async def _replay(
+        self, cached: Dict[str, Any], start: float
     ) -> AsyncGenerator[Dict[str, Any], None]:
-        """Streaming variant — yields SSE events."""
-        # Fetch documents (same logic, abbreviated)
-        filter_expr = self._build_duggan_filter(query.filters)
-        documents = await self.duggan.search(
+        """Replay a cached result as the live stream's event sequence."""
+        yield self._documents_event(
+            cached["documents"],
+            cached=True,
+            stale=cached.get("stale", False),
+            source=cached.get("source", "remote"),
+        )
+        ttfb_ms = int((time.time() - start) * 1000)
+        for chunk in self._split_answer(cached["ai_answer"]["text"]):
+            yield {"type": "answer_chunk", "content": chunk}
+        for c in cached["ai_answer"]["citations"]:
+            yield self._citation_event(c)
+        yield {"type": "complete", "total_results": cached["total_results"], "cached": True}
+        yield self._timing_event(cached["query"], start, ttfb_ms, ttfb_ms)
+
+    # ── helpers ──────────────────────────────────────────────────────────
+
+    async def _fetch_remote(self, query: SearchQuery, deadline: float) -> List[Document]:
+        return await self.duggan.search(
             query=query.text,
             limit=min(query.limit * 3, 100),
-            filter_expr=filter_expr,
+            filter_expr=self._build_duggan_filter(query.filters),
+            deadline=deadline,
         )
-        # Cache docs without embeddings (fast)
-        for doc in documents:
+
+    async def _local_fallback(
+        self, uow: UnitOfWork, query: SearchQuery, error: ExternalServiceError
+    ) -> Tuple[List[Document], Dict[str, List[str]]]:
+        """Answer from local documents when DugganUSA is unavailable."""
+        logger.warning(
+            "duggan_unavailable", error=error.message, circuit=self.duggan.breaker.state
+        )
+        documents, passages = await self._local_search(uow, query)
+        if not documents:
+            raise error
+        return documents, passages
+
+    async def _local_search(
+        self, uow: UnitOfWork, query: SearchQuery, embedding: Optional[List[float]] = None
+    ) -> Tuple[List[Document], Dict[str, List[str]]]:
+        """Retrieve from the local corpus only, with filters applied in SQL.
+
+        Semantic (passage, else whole-document), keyword and metadata
+        rankings are merged by reciprocal rank fusion. Semantic retrieval is
+        skipped if the query cannot be embedded.
+        """
+        semantic: List[Document] = []
+        passages: Dict[str, List[str]] = {}
+        await uow.release()
+        if embedding is None:
             try:
-                await self.doc_repo.upsert(doc, embedding=None)
-            except Exception:
+                embedding = await gemini_client.embed_text(query.text)
+            except ExternalServiceError:
                 pass
-        documents = documents[: query.limit]
+        if embedding is not None:
+            semantic, passages = await self._passage_search(
+                uow, embedding, query.limit, query.filters
+            )
+            if not semantic:
+                semantic = await uow.documents.vector_search(
+                    embedding, limit=query.limit, filters=query.filters
+                )
+        keyword = await uow.documents.keyword_search(
+            query.text, limit=query.limit, filters=query.filters
+        )
+        metadata = await uow.documents.metadata_search(
+            self._metadata_terms(query.text), limit=query.limit, filters=query.filters
+        )
+        documents = self._fuse([semantic, keyword, metadata])[: query.limit]
+        return documents, {d.id: passages[d.id] for d in documents if d.id in passages}
 
-        context_docs = documents[:5]
+    @staticmethod
+    def _metadata_terms(text: str) -> List[str]:
+        """Query words and adjacent-word pairs in the forms tags are stored in."""
+        words = [w for w in re.findall(r"[a-z0-9]+", text.lower()) if len(w) > 2]
+        pairs = [f"{a}{sep}{b}" for a, b in zip(words, words[1:]) for sep in (" ", "_")]
+        return list(dict.fromkeys(words + pairs))
 
-        # Stream AI answer
-        async for chunk in gemini_client.generate_answer_stream(query.text, context_docs):
-            yield {"type": "answer_chunk", "content": chunk}
+    @staticmethod
+    def _fuse(rankings: List[List[Document]], k: int = RRF_K) -> List[Document]:
+        """Reciprocal rank fusion; each document keeps its first-seen score."""
+        scores: Dict[str, float] = {}
+        first: Dict[str, Document] = {}
+        for ranking in rankings:
+            for rank, doc in enumerate(ranking, 1):
+                scores[doc.id] = scores.get(doc.id, 0.0) + 1.0 / (k + rank)
+                first.setdefault(doc.id, doc)
+        return [first[i] for i in sorted(scores, key=scores.__getitem__, reverse=True)]
 
-        # Send citations
-        for d in context_docs:
-            yield {
-                "type": "citation",
-                "document_id": d.id,
-                "efta_id": d.efta_id,
-                "snippet": d.content_preview or d.content[:200],
-            }
+    @staticmethod
+    def _mode(query: SearchQuery) -> str:
+        return query.mode or settings.SEARCH_MODE
 
-        # Send document list
-        for d in documents:
-            yield {"type": "document", "document": d.model_dump(mode="json")}
+    @staticmethod
+    def _shares_cache(query: SearchQuery) -> bool:
+        """query_cache holds deployment-mode results; per-request overrides bypass it."""
+        return query.mode in (None, settings.SEARCH_MODE)
 
-        yield {"type": "complete", "total_results": len(documents)}
+    @staticmethod
+    def _source(documents: List[Document], local_ids: Set[str]) -> str:
+        local = sum(1 for d in documents if d.id in local_ids)
+        if documents and local == len(documents):
+            return "local"
+        return "hybrid" if local else "remote"
 
-    # ── helpers ──────────────────────────────────────────────────────────
+    def _revalidate(self, query: SearchQuery, stale: bool) -> None:
+        """Refresh a stale entry in the background; the caller serves it as is."""
+        if stale:
+            self.refresher.schedule(query)
+
+    @staticmethod
+    def _shed(query_text: str, error: OverloadedError) -> str:
+        logger.warning("answer_shed", query=query_text, reason=error.reason)
+        return f"llm_{error.reason}"
+
+    async def _answer(
+        self,
+        uow: UnitOfWork,
+        query_text: str,
+        context_docs: List[Document],
+        passages: Dict[str, List[str]],
+        priority: Priority,
+    ) -> Tuple[AIAnswer, Optional[str]]:
+        """Return the cited answer, or an empty one and the reason it was shed."""
+        try:
+            text = await self._generate_answer(uow, query_text, context_docs, passages, priority)
+        except OverloadedError as exc:
+            return AIAnswer(text=""), self._shed(query_text, exc)
+        return AIAnswer(text=text, citations=self._citations(context_docs)), None
+
+    def _defer_answer(
+        self,
+        query: SearchQuery,
+        result: SearchResult,
+        context_docs: List[Document],
+        passages: Dict[str, List[str]],
+        priority: Priority,
+    ) -> None:
+        self.answers.create(result.query_id)
+        task = asyncio.create_task(
+            self._finish_answer(query, result, context_docs, passages, priority)
+        )
+        self._answer_tasks.add(task)
+        task.add_done_callback(self._answer_tasks.discard)
+
+    async def _finish_answer(
+        self,
+        query: SearchQuery,
+        result: SearchResult,
+        context_docs: List[Document],
+        passages: Dict[str, List[str]],
+        priority: Priority,
+    ) -> None:
+        """Generate a deferred answer, publish it, then cache the completed result."""
+        try:
+            async with self.uow_factory() as uow:
+                ai_answer, shed = await self._answer(
+                    uow, query.text, context_docs, passages, priority
+                )
+                degraded = shed or result.degraded
+                self.answers.finish(
+                    AnswerResult(
+                        query_id=result.query_id,
+                        status="complete",
+                        ai_answer=ai_answer,
+                        degraded=degraded,
+                    )
+                )
+                if self._shares_cache(query) and not degraded:
+                    completed = result.model_copy(
+                        update={"ai_answer": ai_answer, "answer_pending": False}
+                    )
+                    await self._cache_result(uow, query, completed)
+        except Exception:
+            logger.warning("deferred_answer_failed", query=query.text, exc_info=True)
+            self.answers.fail(result.query_id)
+
+    async def _generate_answer(
+        self,
+        uow: UnitOfWork,
+        query_text: str,
+        context_docs: List[Document],
+        passages: Optional[Dict[str, List[str]]] = None,
+        priority: Priority = Priority.ANONYMOUS,
+    ) -> str:
+        """Generate an answer, reusing one produced earlier from the same evidence.
+
+        Raises :class:`OverloadedError` if no generation slot frees up in time.
+        """
+        doc_ids = [d.id for d in context_docs]
+        cached = await uow.cache.get_answer(query_text, doc_ids)
+        if cached is not None:
+            logger.info("answer_cache_hit", query=query_text)
+            return cached
+        await uow.release()
+        async with self.llm_gate.admit(priority):
+            context = self._build_context(query_text, context_docs, passages)
+            answer = await gemini_client.generate_answer(query_text, context)
+        # an empty answer (safety block, no candidates) is retried next time
+        if answer.strip():
+            await uow.cache.set_answer(query_text, doc_ids, answer)
+        return answer
+
+    async def _generate_answer_stream(
+        self,
+        uow: UnitOfWork,
+        query_text: str,
+        context_docs: List[Document],
+        passages: Optional[Dict[str, List[str]]] = None,
+        priority: Priority = Priority.ANONYMOUS,
+    ) -> AsyncGenerator[str, None]:
+        """Streaming counterpart of :meth:`_generate_answer`."""
+        doc_ids = [d.id for d in context_docs]
+        cached = await uow.cache.get_answer(query_text, doc_ids)
+        await uow.release()
+        if cached is not None:
+            logger.info("answer_cache_hit", query=query_text, stream=True)
+            for chunk in self._split_answer(cached):
+                yield chunk
+            return
+        parts: List[str] = []
+        async with self.llm_gate.admit(priority):
+            context = self._build_context(query_text, context_docs, passages)
+            with stage("gemini.generate_stream"):
+                async for chunk in gemini_client.generate_answer_stream(query_text, context):
+                    parts.append(chunk)
+                    yield chunk
+        answer = "".join(parts)
+        if answer.strip():
+            await uow.cache.set_answer(query_text, doc_ids, answer)
+
+    @staticmethod
+    def _citations(context_docs: List[Document]) -> List[Citation]:
+        return [
+            Citation(
+                document_id=d.id,
+                efta_id=d.efta_id,
+                snippet=d.content_preview or d.content[:200],
+                doc_type=d.doc_type,
+                relevance_score=d.relevance_score or 0.0,
+            )
+            for d in context_docs
+        ]
+
+    async def _cache_result(
+        self, uow: UnitOfWork, query: SearchQuery, result: SearchResult
+    ) -> None:
+        # full content is never part of the response
+        filters_dict = query.filters.model_dump(exclude_none=True) if query.filters else None
+        await uow.cache.set(
+            query.text,
+            filters_dict,
+            result.model_dump(mode="json", exclude={"documents": {"__all__": {"content"}}}),
+            limit=query.limit,
+        )
+
+    @staticmethod
+    def _split_answer(text: str) -> List[str]:
+        """Cut a cached answer into stream-sized chunks on word boundaries."""
+        size = settings.STREAM_REPLAY_CHUNK_CHARS
+        if size <= 0 or len(text) <= size:
+            return [text] if text else []
+        chunks: List[str] = []
+        start = 0
+        while start < len(text):
+            end = min(start + size, len(text))
+            if end < len(text):
+                brk = text.rfind(" ", start, end)
+                end = brk + 1 if brk > start else end
+            chunks.append(text[start:end])
+            start = end
+        return chunks
+
+    @staticmethod
+    def _documents_event(
+        documents: List[Dict[str, Any]],
+        cached: bool = False,
+        stale: bool = False,
+        source: str = "remote",
+    ) -> Dict[str, Any]:
+        return {
+            "type": "documents",
+            "documents": documents,
+            "total_results": len(documents),
+            "source": source,
+            "cached": cached,
+            "stale": stale,
+        }
+
+    @staticmethod
+    def _citation_event(citation: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "type": "citation",
+            "document_id": citation["document_id"],
+            "efta_id": citation["efta_id"],
+            "snippet": citation["snippet"],
+        }
+
+    @staticmethod
+    def _timing_event(
+        query_text: str, start: float, ttfb_ms: int, ttft_ms: Optional[int]
+    ) -> Dict[str, Any]:
+        timings = current_timings()
+        timing = {
+            "ttfb_ms": ttfb_ms,
+            "ttft_ms": ttft_ms,
+            "total_ms": int((time.time() - start) * 1000),
+            "stages": timings.as_ms() if timings else {},
+        }
+        logger.info("search_stream_timing", query=query_text, **timing)
+        return {"type": "timing", **timing}
+
+    @staticmethod
+    def _build_context(
+        query: str,
+        documents: List[Document],
+        passages: Optional[Dict[str, List[str]]] = None,
+    ) -> str:
+        with stage("context.build"):
+            context = build_context(query, documents, passages)
+        logger.info(
+            "context_built",
+            documents=len(documents),
+            segments=context.segments,
+            dropped_duplicates=context.dropped_duplicates,
+            prompt_tokens_est=context.token_estimate,
+        )
+        return context.text
+
+    async def _passage_search(
+        self,
+        uow: UnitOfWork,
+        embedding: List[float],
+        limit: int,
+        filters: Optional[SearchFilters] = None,
+    ) -> Tuple[List[Document], Dict[str, List[str]]]:
+        """Retrieve passages and roll them up to their documents.
+
+        Returns the documents ranked by their best passage, and for each the
+        top ``CONTEXT_PASSAGES_PER_DOC`` passage texts for the LLM context.
+        """
+        hits = await uow.chunks.vector_search(
+            embedding, limit=limit * settings.CHUNK_SEARCH_FANOUT, filters=filters
+        )
+        grouped = self._group_passages(hits)
+        documents = await uow.documents.get_many(list(grouped)[:limit], filters)
+        passages: Dict[str, List[str]] = {}
+        for doc in documents:
+            best = grouped[doc.id][: settings.CONTEXT_PASSAGES_PER_DOC]
+            doc.relevance_score = best[0].relevance_score
+            doc.match_type = "passage"
+            # keep the passages in reading order
+            passages[doc.id] = [p.content for p in sorted(best, key=lambda p: p.chunk_index)]
+        return documents, passages
+
+    @staticmethod
+    def _group_passages(hits: List[Passage]) -> Dict[str, List[Passage]]:
+        """Group passage hits by document, best document and passage first."""
+        grouped: Dict[str, List[Passage]] = {}
+        for hit in sorted(hits, key=lambda p: p.relevance_score or 0.0, reverse=True):
+            grouped.setdefault(hit.document_id, []).append(hit)
+        return grouped
+
+    async def _store_documents(self, uow: UnitOfWork, docs: List[Document]) -> None:
+        """Upsert fetched documents without embeddings; failures are not fatal."""
+        try:
+            await uow.documents.upsert_many(docs)
+        except Exception:
+            logger.warning("store_documents_failed", count=len(docs), exc_info=True)
 
-    async def _cache_documents(self, docs: List[Document]) -> None:
+    async def _cache_documents(self, uow: UnitOfWork, docs: List[Document]) -> None:
         """Store documents + embeddings in local DB for progressive caching."""
         texts = [d.content_preview or d.content[:500] for d in docs]
         if not texts:
             return
         try:
+            await uow.release()
             embeddings = await gemini_client.embed_batch(texts)
             for doc, emb in zip(docs, embeddings):
-                await self.doc_repo.upsert(doc, embedding=emb)
+                await uow.documents.upsert(doc, embedding=emb)
         except Exception:
             logger.warning("cache_documents_failed", exc_info=True)
 
@@ -187,8 +811,7 @@ class SearchService:
     def _build_duggan_filter(filters: SearchFilters | None) -> str | None:
         if not filters:
             return None
-        client = duggan_client.DugganClient()
-        return client.build_filter(
+        return duggan_client.DugganClient.build_filter(
             doc_types=filters.doc_types,
             people=filters.people,
             locations=filters.locations,
@@ -35,6 +35,14 @@ class Document(BaseModel):
     match_type: Optional[str] = None
 
 
+class Passage(BaseModel):
+    document_id: str
+    chunk_index: int
+    start_char: int = 0
+    content: str
+    relevance_score: Optional[float] = None
+
+
 class Citation(BaseModel):
     document_id: str
     efta_id: str
@@ -43,6 +51,13 @@ class Citation(BaseModel):
     relevance_score: float = 0.0
 
 
+class PromptContext(BaseModel):
+    text: str
+    token_estimate: int = 0
+    segments: int = 0
+    dropped_duplicates: int = 0
+
+
 class AIAnswer(BaseModel):
     text: str
     citations: List[Citation] = Field(default_factory=list)
@@ -55,11 +70,18 @@ class SearchFilters(BaseModel):
     evidence_types: Optional[List[str]] = None
 
 
+class ExportFilters(SearchFilters):
+    aircraft: Optional[List[str]] = None
+    datasets: Optional[List[str]] = None
+
+
 class SearchQuery(BaseModel):
     text: str
     filters: Optional[SearchFilters] = None
     limit: int = 20
     semantic_weight: float = 0.7
+    # None means the deployment's SEARCH_MODE
+    mode: Optional[str] = None
 
 
 class SearchResult(BaseModel):
@@ -68,8 +90,24 @@ class SearchResult(BaseModel):
     ai_answer: AIAnswer
     documents: List[Document] = Field(default_factory=list)
     total_results: int = 0
+    # "local", "remote" (DugganUSA) or "hybrid"
+    source: str = "remote"
+    # why the result is partial, e.g. "llm_queue_timeout" (no answer) or
+    # "remote_unavailable" (local documents only); None when complete
+    degraded: Optional[str] = None
+    # ai_answer is still being generated; fetch it by query_id
+    answer_pending: bool = False
     search_time_ms: Optional[int] = None
     cached: bool = False
+    stale: bool = False
+
+
+class AnswerResult(BaseModel):
+    query_id: UUID
+    # "pending", "complete" or "failed"
+    status: str
+    ai_answer: Optional[AIAnswer] = None
+    degraded: Optional[str] = None
 
 
 class SearchHistoryEntry(BaseModel):
@@ -87,3 +125,12 @@ class FilterMetadata(BaseModel):
     people: List[Dict[str, Any]] = Field(default_factory=list)
     locations: List[Dict[str, Any]] = Field(default_factory=list)
     evidence_types: List[Dict[str, Any]] = Field(default_factory=list)
+
+
+class CacheStats(BaseModel):
+    row_count: int = 0
+    table_bytes: int = 0
+    expired_deleted: int = 0
+    evicted: int = 0
+    evictions_per_minute: float = 0.0
+    swept_at: datetime = Field(default_factory=datetime.utcnow)
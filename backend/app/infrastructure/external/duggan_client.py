@@ -1,32 +1,74 @@
 from __future__ import annotations
 
+import asyncio
+import time
 from typing import Any, Dict, List, Optional
 
 import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential
 
 from app.config import settings
 from app.domain.entities import Document
-from app.utils.exceptions import ExternalServiceError
+from app.infrastructure.external.resilience import CircuitBreaker, LatencyTracker
+from app.utils.exceptions import CircuitOpenError, ExternalServiceError
 from app.utils.logger import get_logger
+from app.utils.metrics import timed
 
 logger = get_logger(__name__)
 
-TIMEOUT = 30.0
+SERVICE = "DugganUSA API"
+HEDGE_PERCENTILE = 0.95
+
+# Shared across client instances so every request sees the same health view
+breaker = CircuitBreaker(
+    "duggan",
+    failure_threshold=settings.DUGGAN_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=settings.DUGGAN_BREAKER_RESET_SECONDS,
+)
+latency = LatencyTracker()
+
+
+def _is_client_error(exc: Exception) -> bool:
+    """A 4xx other than 429: the request is at fault, not the service."""
+    if not isinstance(exc, httpx.HTTPStatusError):
+        return False
+    status = exc.response.status_code
+    return 400 <= status < 500 and status != 429
 
 
 class DugganClient:
-    """Client for the DugganUSA Epstein Files search API (Meilisearch-backed)."""
+    """Client for the DugganUSA Epstein Files search API (Meilisearch-backed).
+
+    Calls go through a shared circuit breaker, retry with backoff only
+    while the caller's ``deadline`` (a ``time.monotonic()`` value) allows,
+    and may be hedged with a second request once the first outlives the
+    observed p95 latency. A request the API rejects (a 4xx other than 429)
+    is neither retried nor counted against the breaker. One instance is meant to live as long as the app,
+    so its pooled HTTP connections are reused across requests.
+    """
 
     def __init__(self) -> None:
         self.base_url = settings.DUGGAN_API_BASE_URL
+        self.breaker = breaker
+        self.latency = latency
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=settings.DUGGAN_TIMEOUT_SECONDS)
+        return self._client
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=10))
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @timed("duggan.search")
     async def search(
         self,
         query: str,
         limit: int = 100,
         filter_expr: Optional[str] = None,
+        deadline: Optional[float] = None,
     ) -> List[Document]:
         params: Dict[str, Any] = {
             "q": query,
@@ -36,23 +78,101 @@ class DugganClient:
         if filter_expr:
             params["filter"] = filter_expr
 
-        try:
-            async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-                resp = await client.get(f"{self.base_url}/search", params=params)
-                resp.raise_for_status()
+        last_error = "deadline exceeded"
+        for attempt in range(settings.DUGGAN_MAX_ATTEMPTS):
+            timeout = self._remaining(deadline)
+            if timeout <= 0:
+                break
+            if not self.breaker.allow():
+                raise CircuitOpenError(SERVICE)
+
+            started = time.monotonic()
+            try:
+                resp = await self._hedged_get(self._http(), params, timeout)
                 data = resp.json()
-        except httpx.HTTPError as exc:
-            logger.error("duggan_api_error", error=str(exc))
-            raise ExternalServiceError("DugganUSA API", str(exc))
+            except (httpx.HTTPError, ValueError) as exc:
+                # ValueError: a 200 whose body is not JSON
+                if _is_client_error(exc):
+                    # e.g. a malformed filter: the API is up and a retry
+                    # would be refused the same way
+                    self.breaker.abandon()
+                    status = exc.response.status_code
+                    logger.error("duggan_api_rejected", status=status, attempt=attempt + 1)
+                    raise ExternalServiceError(SERVICE, f"rejected with HTTP {status}") from exc
+                self.breaker.record_failure()
+                last_error = str(exc) or type(exc).__name__
+                logger.error("duggan_api_error", error=last_error, attempt=attempt + 1)
+                if attempt + 1 < settings.DUGGAN_MAX_ATTEMPTS:
+                    await asyncio.sleep(min(0.5 * 2**attempt, max(self._remaining(deadline), 0)))
+                continue
+            except BaseException:
+                # cancelled (client gone, batch stopped, deadline) or unexpected;
+                # never leave a half-open probe claimed
+                self.breaker.abandon()
+                raise
+
+            self.breaker.record_success()
+            self.latency.record(time.monotonic() - started)
+            if not data.get("success"):
+                raise ExternalServiceError(SERVICE, "unsuccessful response")
+            hits = data.get("data", {}).get("hits", [])
+            return [self._hit_to_document(h) for h in hits]
 
-        if not data.get("success"):
-            raise ExternalServiceError("DugganUSA API", "unsuccessful response")
+        raise ExternalServiceError(SERVICE, last_error)
 
-        hits = data.get("data", {}).get("hits", [])
-        return [self._hit_to_document(h) for h in hits]
+    @staticmethod
+    def _remaining(deadline: Optional[float]) -> float:
+        if deadline is None:
+            return settings.DUGGAN_TIMEOUT_SECONDS
+        return min(settings.DUGGAN_TIMEOUT_SECONDS, deadline - time.monotonic())
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not settings.DUGGAN_HEDGE_ENABLED:
+            return None
+        if len(self.latency) < settings.DUGGAN_HEDGE_MIN_SAMPLES:
+            return None
+        return self.latency.percentile(HEDGE_PERCENTILE)
+
+    async def _get(
+        self, client: httpx.AsyncClient, params: Dict[str, Any], timeout: float
+    ) -> httpx.Response:
+        resp = await client.get(f"{self.base_url}/search", params=params, timeout=timeout)
+        resp.raise_for_status()
+        return resp
 
+    async def _hedged_get(
+        self, client: httpx.AsyncClient, params: Dict[str, Any], timeout: float
+    ) -> httpx.Response:
+        """GET the search endpoint, racing a backup request past the p95 delay."""
+        delay = self._hedge_delay()
+        if delay is None or delay >= timeout:
+            return await self._get(client, params, timeout)
+
+        primary = asyncio.create_task(self._get(client, params, timeout))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                logger.info("duggan_hedged", delay_ms=round(delay * 1000))
+                pending.add(asyncio.create_task(self._get(client, params, timeout - delay)))
+
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = error or task.exception()
+            assert error is not None
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @staticmethod
     def build_filter(
-        self,
         doc_types: Optional[List[str]] = None,
         people: Optional[List[str]] = None,
         locations: Optional[List[str]] = None,
@@ -1,35 +1,43 @@
 from __future__ import annotations
 
-from typing import Any, AsyncGenerator, Dict, List
+from typing import Any, AsyncGenerator, List
 
 from google import genai
 from google.genai import types
 
 from app.config import settings
-from app.domain.entities import Document
 from app.utils.exceptions import ExternalServiceError
 from app.utils.logger import get_logger
+from app.utils.metrics import timed
 
 logger = get_logger(__name__)
 
 _client: genai.Client | None = None
 
 
+# Every call goes through ``client.aio`` so a slow request never blocks the
+# event loop; concurrency is bounded by the search service's LLM gate.
 def _get_client() -> genai.Client:
     global _client
     if _client is None:
-        _client = genai.Client(api_key=settings.GEMINI_API_KEY)
+        http_options = (
+            types.HttpOptions(base_url=settings.GEMINI_API_BASE_URL)
+            if settings.GEMINI_API_BASE_URL
+            else None
+        )
+        _client = genai.Client(api_key=settings.GEMINI_API_KEY, http_options=http_options)
     return _client
 
 
 # ── Embeddings ──────────────────────────────────────────────────────────────
 
 
+@timed("gemini.embed")
 async def embed_text(text: str) -> List[float]:
     """Generate a 768-dim embedding for a single text."""
     try:
         client = _get_client()
-        result = client.models.embed_content(
+        result = await client.aio.models.embed_content(
             model=settings.GEMINI_EMBEDDING_MODEL,
             contents=text,
         )
@@ -39,11 +47,12 @@ async def embed_text(text: str) -> List[float]:
         raise ExternalServiceError("Gemini Embedding", str(exc))
 
 
+@timed("gemini.embed")
 async def embed_batch(texts: List[str]) -> List[List[float]]:
     """Embed multiple texts in one call."""
     try:
         client = _get_client()
-        result = client.models.embed_content(
+        result = await client.aio.models.embed_content(
             model=settings.GEMINI_EMBEDDING_MODEL,
             contents=texts,
         )
@@ -68,21 +77,7 @@ Rules:
 6. Always end with a list of document citations used."""
 
 
-def _build_context(documents: List[Document]) -> str:
-    parts: List[str] = []
-    for i, doc in enumerate(documents, 1):
-        text = doc.content_preview or doc.content[:500]
-        meta = f"[Type: {doc.doc_type or 'unknown'}]"
-        if doc.people:
-            meta += f" [People: {', '.join(doc.people[:5])}]"
-        parts.append(f"[{i}] EFTA: {doc.efta_id} {meta}\n{text}\n")
-    return "\n---\n".join(parts)
-
-
-async def generate_answer(query: str, documents: List[Document]) -> str:
-    """Generate a complete answer with citations."""
-    context = _build_context(documents)
-    prompt = f"""Based on the following Epstein case documents, answer the user's question.
+PROMPT_TEMPLATE = """Based on the following Epstein case documents, answer the user's question.
 
 DOCUMENTS:
 {context}
@@ -91,51 +86,59 @@ USER QUESTION: {query}
 
 Provide a comprehensive answer with [N] citations referencing the document numbers above."""
 
+GENERATION_CONFIG = types.GenerateContentConfig(
+    system_instruction=SYSTEM_INSTRUCTION,
+    temperature=0.3,
+    max_output_tokens=2048,
+)
+
+
+def _build_prompt(query: str, context: str) -> str:
+    return PROMPT_TEMPLATE.format(context=context, query=query)
+
+
+def _log_usage(event: str, usage: Any) -> None:
+    if usage is None:
+        return
+    logger.info(
+        event,
+        prompt_tokens=usage.prompt_token_count,
+        output_tokens=usage.candidates_token_count,
+    )
+
+
+@timed("gemini.generate")
+async def generate_answer(query: str, context: str) -> str:
+    """Generate a complete answer with citations from an assembled context."""
     try:
         client = _get_client()
-        response = client.models.generate_content(
+        response = await client.aio.models.generate_content(
             model=settings.GEMINI_LLM_MODEL,
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                system_instruction=SYSTEM_INSTRUCTION,
-                temperature=0.3,
-                max_output_tokens=2048,
-            ),
+            contents=_build_prompt(query, context),
+            config=GENERATION_CONFIG,
         )
+        _log_usage("gemini_answer_usage", response.usage_metadata)
         return response.text or ""
     except Exception as exc:
         logger.error("gemini_llm_error", error=str(exc))
         raise ExternalServiceError("Gemini LLM", str(exc))
 
 
-async def generate_answer_stream(
-    query: str, documents: List[Document]
-) -> AsyncGenerator[str, None]:
+async def generate_answer_stream(query: str, context: str) -> AsyncGenerator[str, None]:
     """Stream answer token-by-token via SSE."""
-    context = _build_context(documents)
-    prompt = f"""Based on the following Epstein case documents, answer the user's question.
-
-DOCUMENTS:
-{context}
-
-USER QUESTION: {query}
-
-Provide a comprehensive answer with [N] citations referencing the document numbers above."""
-
     try:
         client = _get_client()
-        stream = client.models.generate_content_stream(
+        stream = await client.aio.models.generate_content_stream(
             model=settings.GEMINI_LLM_MODEL,
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                system_instruction=SYSTEM_INSTRUCTION,
-                temperature=0.3,
-                max_output_tokens=2048,
-            ),
+            contents=_build_prompt(query, context),
+            config=GENERATION_CONFIG,
         )
-        for chunk in stream:
+        usage = None
+        async for chunk in stream:
+            usage = chunk.usage_metadata or usage
             if chunk.text:
                 yield chunk.text
+        _log_usage("gemini_stream_usage", usage)
     except Exception as exc:
         logger.error("gemini_stream_error", error=str(exc))
         raise ExternalServiceError("Gemini LLM", str(exc))
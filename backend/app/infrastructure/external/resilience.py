@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.utils.exceptions import OverloadedError
+from app.utils.metrics import SHED_TOTAL
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are rejected for ``reset_timeout`` seconds. Then one probe call
+    is let through: success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return OPEN
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self._rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    def abandon(self) -> None:
+        """The call ended without an outcome, e.g. it was cancelled.
+
+        A half-open probe's slot is freed so the next call probes instead.
+        """
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        if self._probe_in_flight:
+            self._probe_in_flight = False
+            self._opened_at = self._clock()
+            return
+        self._failures += 1
+        if self._failures >= self.failure_threshold and self._opened_at is None:
+            self._opened_at = self._clock()
+
+    def snapshot(self) -> Dict[str, Any]:
+        retry_in = None
+        if self.state == OPEN and self._opened_at is not None:
+            retry_in = round(self.reset_timeout - (self._clock() - self._opened_at), 1)
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "rejected_calls": self._rejected,
+            "retry_in_seconds": retry_in,
+        }
+
+
+class LatencyTracker:
+    """Rolling window of call latencies (seconds) for percentile estimates."""
+
+    def __init__(self, size: int = 200) -> None:
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+
+class Priority(IntEnum):
+    """Admission priority; higher classes are served and queued first."""
+
+    BACKGROUND = 0
+    ANONYMOUS = 1
+    USER = 2
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded, prioritized wait queue.
+
+    At most ``limit`` callers hold a slot; up to ``max_queue`` more wait for
+    one, highest priority first and FIFO within a priority, for at most
+    ``queue_timeout`` seconds. A caller arriving at a full queue displaces
+    the newest of the lowest-priority waiters if it outranks them, and is
+    rejected otherwise. Rejected, displaced and timed-out callers get
+    :class:`OverloadedError`.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int, queue_timeout: float) -> None:
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        # heap of (-priority, seq, future)
+        self._waiters: List[Tuple[int, int, asyncio.Future[None]]] = []
+        self._seq = itertools.count()
+        self._rejected: Dict[str, int] = {}
+
+    @asynccontextmanager
+    async def admit(self, priority: int = Priority.ANONYMOUS) -> AsyncIterator[None]:
+        await self._acquire(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: int) -> None:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._make_room(priority)
+        entry = (-priority, next(self._seq), asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, entry)
+        try:
+            await asyncio.wait_for(entry[2], self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._forget(entry)
+            raise self._reject("queue_timeout")
+        except asyncio.CancelledError:
+            fut = entry[2]
+            if fut.done() and not fut.cancelled() and fut.exception() is None:
+                # granted a slot just as the caller went away
+                self._release()
+            else:
+                self._forget(entry)
+            raise
+
+    def _make_room(self, priority: int) -> None:
+        if not self._waiters:  # max_queue == 0
+            raise self._reject("queue_full")
+        lowest = max(self._waiters)  # lowest priority, newest first
+        if -lowest[0] >= priority:
+            raise self._reject("queue_full")
+        self._forget(lowest)
+        lowest[2].set_exception(self._reject("displaced"))
+
+    def _forget(self, entry: Tuple[int, int, asyncio.Future[None]]) -> None:
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+
+    def _release(self) -> None:
+        while self._waiters:
+            fut = heapq.heappop(self._waiters)[2]
+            if not fut.done():
+                # the slot passes straight to the next waiter
+                fut.set_result(None)
+                return
+        self.active -= 1
+
+    def _reject(self, reason: str) -> OverloadedError:
+        self._rejected[reason] = self._rejected.get(reason, 0) + 1
+        SHED_TOTAL.labels(gate=self.name, reason=reason).inc()
+        return OverloadedError(self.name, reason)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "limit": self.limit,
+            "max_queue": self.max_queue,
+            "rejected": dict(self._rejected),
+        }
@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, List, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# pg_advisory_lock key held while migrating, so concurrent runs queue up
+MIGRATION_LOCK_ID = 4_608_201
+
+SCHEMA_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+)
+"""
+
+_CONCURRENT_INDEX_RE = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)", re.I
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    """One schema step, recorded in ``schema_migrations`` once applied.
+
+    Transactional migrations run all their statements in one transaction.
+    ``CREATE INDEX CONCURRENTLY`` cannot run inside one, so non-transactional
+    migrations run statement by statement, and an index left invalid by an
+    interrupted concurrent build is dropped and rebuilt on the next run.
+    """
+
+    version: int
+    name: str
+    statements: Tuple[str, ...]
+    transactional: bool = True
+
+
+# Tables, columns and functions as of the switch to versioned migrations.
+# Every statement is idempotent, so databases created by the old
+# boot-time INIT_SQL adopt it as is.
+BASELINE_SQL = """
+CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";
+CREATE EXTENSION IF NOT EXISTS "vector";
+
+-- array_to_string is only STABLE; index expressions need an IMMUTABLE wrapper
+CREATE OR REPLACE FUNCTION tags_to_text(TEXT[]) RETURNS TEXT
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $fn$ SELECT coalesce(array_to_string($1, ' '), '') $fn$;
+
+CREATE TABLE IF NOT EXISTS users (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    email VARCHAR(255) UNIQUE NOT NULL,
+    name VARCHAR(255),
+    picture TEXT,
+    google_id VARCHAR(255) UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    last_login_at TIMESTAMPTZ
+);
+
+CREATE TABLE IF NOT EXISTS documents (
+    id VARCHAR(255) PRIMARY KEY,
+    efta_id VARCHAR(255) NOT NULL,
+    content TEXT NOT NULL,
+    content_preview TEXT,
+    doc_type VARCHAR(100),
+    people TEXT[] DEFAULT '{}',
+    locations TEXT[] DEFAULT '{}',
+    aircraft TEXT[] DEFAULT '{}',
+    evidence_types TEXT[] DEFAULT '{}',
+    pages INTEGER,
+    source VARCHAR(255),
+    dataset VARCHAR(100),
+    file_path TEXT,
+    embedding vector(3072),
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS document_chunks (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    document_id VARCHAR(255) NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    chunk_index INTEGER NOT NULL,
+    start_char INTEGER NOT NULL DEFAULT 0,
+    content TEXT NOT NULL,
+    embedding vector(3072),
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE (document_id, chunk_index)
+);
+
+CREATE TABLE IF NOT EXISTS search_history (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    user_id UUID REFERENCES users(id) ON DELETE CASCADE,
+    query TEXT NOT NULL,
+    filters JSONB,
+    result_count INTEGER DEFAULT 0,
+    search_time_ms INTEGER,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS query_cache (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    query_hash VARCHAR(64) UNIQUE NOT NULL,
+    query_text TEXT NOT NULL,
+    filters JSONB,
+    response JSONB,
+    response_blob BYTEA,
+    result_count INTEGER DEFAULT 0,
+    hit_count INTEGER DEFAULT 1,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    expires_at TIMESTAMPTZ NOT NULL,
+    refresh_claimed_until TIMESTAMPTZ
+);
+
+CREATE TABLE IF NOT EXISTS answer_cache (
+    answer_hash VARCHAR(64) PRIMARY KEY,
+    model VARCHAR(100) NOT NULL,
+    document_ids TEXT[] NOT NULL,
+    answer TEXT NOT NULL,
+    hit_count INTEGER DEFAULT 0,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+ALTER TABLE query_cache ALTER COLUMN response DROP NOT NULL;
+ALTER TABLE query_cache ADD COLUMN IF NOT EXISTS response_blob BYTEA;
+ALTER TABLE query_cache ADD COLUMN IF NOT EXISTS result_count INTEGER DEFAULT 0;
+ALTER TABLE query_cache ADD COLUMN IF NOT EXISTS refresh_claimed_until TIMESTAMPTZ;
+
+-- Full-text search: names and places weigh most, then the preview, then the
+-- body (truncated to stay under the tsvector size limit on huge OCR dumps).
+-- A plain column kept by a trigger: adding a STORED generated column would
+-- rewrite the whole table under an ACCESS EXCLUSIVE lock. Rows that predate
+-- the trigger are filled by the search_tsv_backfill migration.
+CREATE OR REPLACE FUNCTION documents_search_tsv() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $fn$
+BEGIN
+    NEW.search_tsv :=
+        setweight(to_tsvector('english', tags_to_text(NEW.people || NEW.locations)), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.content_preview, '')), 'B') ||
+        setweight(to_tsvector('english', left(NEW.content, 500000)), 'D');
+    RETURN NEW;
+END
+$fn$;
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS search_tsv tsvector;
+DROP TRIGGER IF EXISTS documents_search_tsv ON documents;
+CREATE TRIGGER documents_search_tsv
+    BEFORE INSERT OR UPDATE OF people, locations, content_preview, content ON documents
+    FOR EACH ROW EXECUTE FUNCTION documents_search_tsv();
+-- Trigrams are only used for fuzzy name matching now
+DROP INDEX IF EXISTS idx_documents_content_trgm;
+"""
+
+# Touches the rows without a search_tsv so the trigger fills it in. Each batch
+# commits on its own, so only a few thousand rows are locked at a time; until
+# it finishes, the rows not yet reached are missing from keyword search.
+SEARCH_TSV_BACKFILL_SQL = """
+DO $$
+DECLARE
+    last_id TEXT := '';
+    batch_end TEXT;
+BEGIN
+    LOOP
+        SELECT max(id) INTO batch_end FROM (
+            SELECT id FROM documents WHERE id > last_id ORDER BY id LIMIT 5000
+        ) batch;
+        EXIT WHEN batch_end IS NULL;
+        UPDATE documents SET content_preview = content_preview
+        WHERE id > last_id AND id <= batch_end AND search_tsv IS NULL;
+        last_id := batch_end;
+        COMMIT;
+    END LOOP;
+END
+$$
+"""
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline", (BASELINE_SQL,)),
+    Migration(
+        2,
+        "search_indexes",
+        (
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_google_id ON users(google_id)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documents_efta_id ON documents(efta_id)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documents_doc_type ON documents(doc_type)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documents_search_tsv"
+            " ON documents USING gin(search_tsv)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documents_names_trgm"
+            " ON documents USING gin(tags_to_text(people || locations) gin_trgm_ops)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_search_history_user"
+            " ON search_history(user_id, created_at DESC)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_query_cache_hash ON query_cache(query_hash)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_query_cache_expires"
+            " ON query_cache(expires_at)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_answer_cache_expires"
+            " ON answer_cache(expires_at)",
+        ),
+        transactional=False,
+    ),
+    # outside a transaction, so the DO block can commit between batches
+    Migration(3, "search_tsv_backfill", (SEARCH_TSV_BACKFILL_SQL,), transactional=False),
+    # page size an entry was computed for, which the cache key leaves out
+    Migration(
+        4,
+        "query_cache_result_limit",
+        ("ALTER TABLE query_cache ADD COLUMN IF NOT EXISTS result_limit INTEGER",),
+    ),
+    # The 3072-dim embeddings exceed the 2000-dim limit of pgvector's hnsw
+    # and ivfflat indexes, so vector search stays a sequential scan. A vector
+    # index belongs here as a non-transactional CONCURRENTLY migration.
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+class SchemaVersionError(RuntimeError):
+    def __init__(self, current: int, required: int) -> None:
+        super().__init__(
+            f"Database schema is at version {current}, this build needs {required}. "
+            "Run `python -m app.scripts.migrate` first."
+        )
+        self.current = current
+        self.required = required
+
+
+async def _driver_connection(conn: Any) -> Any:
+    # asyncpg runs multi-statement scripts only through its own execute()
+    raw = await conn.get_raw_connection()
+    return raw.driver_connection
+
+
+async def current_version(engine: AsyncEngine) -> int:
+    """Highest applied migration, 0 for a database never migrated."""
+    async with engine.connect() as conn:
+        raw = await _driver_connection(conn)
+        if await raw.fetchval("SELECT to_regclass('schema_migrations')") is None:
+            return 0
+        return await raw.fetchval("SELECT coalesce(max(version), 0) FROM schema_migrations")
+
+
+async def check_schema(engine: AsyncEngine) -> int:
+    """Raise unless every migration this build knows about has been applied.
+
+    A newer schema is accepted, so old workers keep serving while a rolling
+    deploy is under way.
+    """
+    version = await current_version(engine)
+    if version < LATEST_VERSION:
+        raise SchemaVersionError(version, LATEST_VERSION)
+    return version
+
+
+async def migrate(engine: AsyncEngine) -> List[int]:
+    """Apply pending migrations in order; returns the versions applied."""
+    applied: List[int] = []
+    async with engine.connect() as conn:
+        raw = await _driver_connection(conn)
+        await raw.execute(f"SELECT pg_advisory_lock({MIGRATION_LOCK_ID})")
+        try:
+            await raw.execute(SCHEMA_TABLE_SQL)
+            done = {r["version"] for r in await raw.fetch("SELECT version FROM schema_migrations")}
+            for migration in MIGRATIONS:
+                if migration.version in done:
+                    continue
+                logger.info("migration_start", version=migration.version, name=migration.name)
+                await _apply(raw, migration)
+                applied.append(migration.version)
+                logger.info("migration_applied", version=migration.version, name=migration.name)
+        finally:
+            await raw.execute(f"SELECT pg_advisory_unlock({MIGRATION_LOCK_ID})")
+    return applied
+
+
+async def _apply(raw: Any, migration: Migration) -> None:
+    record = "INSERT INTO schema_migrations (version, name) VALUES ($1, $2)"
+    if migration.transactional:
+        async with raw.transaction():
+            for statement in migration.statements:
+                await raw.execute(statement)
+            await raw.execute(record, migration.version, migration.name)
+        return
+    for statement in migration.statements:
+        match = _CONCURRENT_INDEX_RE.match(statement.strip())
+        if match:
+            await _drop_invalid_index(raw, match.group(1))
+        await raw.execute(statement)
+    await raw.execute(record, migration.version, migration.name)
+
+
+async def _drop_invalid_index(raw: Any, name: str) -> None:
+    """An interrupted concurrent build leaves an invalid index IF NOT EXISTS would skip."""
+    invalid = await raw.fetchval(
+        """
+        SELECT NOT i.indisvalid FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = $1
+        """,
+        name,
+    )
+    if invalid:
+        logger.warning("migration_drop_invalid_index", index=name)
+        await raw.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
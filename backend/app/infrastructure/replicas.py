@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Session.info keys
+REPLICAS = "replicas"
+# Send every statement of the session to the primary
+READ_YOUR_WRITES = "read_your_writes"
+
+CHECK_TIMEOUT_SECONDS = 2.0
+
+# Seconds the replica is behind; 0 when it has replayed everything it received
+LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+_replica_read: ContextVar[bool] = ContextVar("replica_read", default=False)
+
+
+def replica_read(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """Mark a repository method whose statements a replica may serve."""
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        token = _replica_read.set(True)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            _replica_read.reset(token)
+
+    return wrapper
+
+
+class Replica:
+    def __init__(self, name: str, engine: AsyncEngine) -> None:
+        self.name = name
+        self.engine = engine
+        self.healthy = False
+        self.lag: Optional[float] = None
+
+
+class ReplicaSet:
+    """Read replicas handed out round-robin, skipping unhealthy ones.
+
+    A replica is healthy once :meth:`check` has reached it and found it at
+    most ``max_lag`` seconds behind the primary; until then, and whenever
+    none is healthy, reads stay on the primary.
+    """
+
+    def __init__(self, engines: List[AsyncEngine], max_lag: float) -> None:
+        self.replicas = [Replica(f"replica{i}", e) for i, e in enumerate(engines)]
+        self.max_lag = max_lag
+        self._next = 0
+
+    def choose(self) -> Optional[Engine]:
+        healthy = [r for r in self.replicas if r.healthy]
+        if not healthy:
+            return None
+        replica = healthy[self._next % len(healthy)]
+        self._next += 1
+        return replica.engine.sync_engine
+
+    async def check(self) -> None:
+        await asyncio.gather(*(self._check(r) for r in self.replicas))
+
+    async def _check(self, replica: Replica) -> None:
+        was_healthy = replica.healthy
+        try:
+            lag = await asyncio.wait_for(self._lag(replica.engine), CHECK_TIMEOUT_SECONDS)
+        except Exception as exc:
+            replica.healthy = False
+            replica.lag = None
+            if was_healthy:
+                logger.warning("replica_down", replica=replica.name, error=str(exc) or type(exc).__name__)
+            return
+        replica.lag = lag
+        replica.healthy = lag <= self.max_lag
+        if replica.healthy != was_healthy:
+            logger.info("replica_health", replica=replica.name, healthy=replica.healthy, lag_s=lag)
+
+    @staticmethod
+    async def _lag(engine: AsyncEngine) -> float:
+        async with engine.connect() as conn:
+            return float((await conn.execute(LAG_SQL)).scalar() or 0)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [{"name": r.name, "healthy": r.healthy, "lag_s": r.lag} for r in self.replicas]
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+class RoutingSession(Session):
+    """Sends :func:`replica_read` statements to a replica, the rest to the primary.
+
+    A session keeps the replica it was given until it is closed. Once it
+    has committed, or if ``info[READ_YOUR_WRITES]`` is set, every read goes
+    to the primary so the caller sees its own writes.
+    """
+
+    _replica: Optional[Engine] = None
+
+    def get_bind(self, mapper: Any = None, **kw: Any) -> Any:
+        replicas: Optional[ReplicaSet] = self.info.get(REPLICAS)
+        if replicas is not None and _replica_read.get() and not self.info.get(READ_YOUR_WRITES):
+            if self._replica is None:
+                self._replica = replicas.choose()
+            if self._replica is not None:
+                return self._replica
+        return super().get_bind(mapper, **kw)
+
+    def commit(self) -> None:
+        super().commit()
+        self.info[READ_YOUR_WRITES] = True
+
+    def close(self) -> None:
+        super().close()
+        self._replica = None
@@ -2,13 +2,23 @@ from __future__ import annotations
 
 import hashlib
 import json
+import re
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+import orjson
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
+from app.utils.compression import deflate_prefix, gzip_with_suffix, inflate_prefix
+from app.utils.metrics import timed
+
+# Per-hit fields; they close every serialized response and are never stored.
+RESPONSE_TAIL_FIELDS = ("search_time_ms", "cached", "stale")
+# Expiry of the placeholder row a refresh claim creates for a query with no
+# entry yet; far enough in the past that no read ever serves it.
+PLACEHOLDER_EXPIRES = datetime(1970, 1, 1)
 
 
 class CacheRepository:
@@ -22,59 +32,366 @@ class CacheRepository:
             raw += json.dumps(filters, sort_keys=True)
         return hashlib.sha256(raw.encode()).hexdigest()
 
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+
+    @classmethod
+    def _hash_answer(cls, query: str, document_ids: List[str], model: str) -> str:
+        """Key an answer by what produced it: question, ordered evidence and model."""
+        raw = json.dumps([cls._normalize_query(query), document_ids, model])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @staticmethod
+    def _dumps(value: Any) -> bytes:
+        # Same output as the app's ORJSONResponse
+        return orjson.dumps(value)
+
+    @classmethod
+    def _encode_response(cls, response: Dict[str, Any]) -> bytes:
+        """Serialize everything but the tail fields and store it as a deflate prefix."""
+        head = {k: v for k, v in response.items() if k not in RESPONSE_TAIL_FIELDS}
+        return deflate_prefix(cls._dumps(head)[:-1])
+
+    @staticmethod
+    def _decode_response(blob: bytes) -> Dict[str, Any]:
+        return orjson.loads(inflate_prefix(blob) + b"}")
+
+    @classmethod
+    def _tail(cls, **tail: Any) -> bytes:
+        fields = b"".join(
+            b"," + cls._dumps(name) + b":" + cls._dumps(tail.get(name))
+            for name in RESPONSE_TAIL_FIELDS
+        )
+        return fields + b"}"
+
+    @classmethod
+    def json_body(cls, blob: bytes, **tail: Any) -> bytes:
+        """Build a complete JSON response body from a stored blob."""
+        return inflate_prefix(blob) + cls._tail(**tail)
+
+    @classmethod
+    def gzip_body(cls, blob: bytes, **tail: Any) -> bytes:
+        """Build a complete gzip-encoded response body from a stored blob."""
+        return gzip_with_suffix(bytes(blob), cls._tail(**tail))
+
+    async def _bump_hit_count(self, qhash: str) -> None:
+        await self.session.execute(
+            text("UPDATE query_cache SET hit_count = hit_count + 1 WHERE query_hash = :qh"),
+            {"qh": qhash},
+        )
+        await self.session.commit()
+
+    @staticmethod
+    def _freshness_params(qhash: str) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        return {
+            "qh": qhash,
+            "now": now,
+            "servable_after": now - timedelta(seconds=settings.QUERY_CACHE_STALE_GRACE_SECONDS),
+        }
+
+    @timed("query_cache.get")
     async def get(
         self, query: str, filters: Optional[Dict[str, Any]] = None
     ) -> Optional[Dict[str, Any]]:
+        """Return the cached response, with ``stale`` set if it is past expiry.
+
+        Entries are served until ``QUERY_CACHE_STALE_GRACE_SECONDS`` after
+        they expire.
+        """
         qhash = self._hash_query(query, filters)
         result = await self.session.execute(
             text("""
-                SELECT response FROM query_cache
-                WHERE query_hash = :qh AND expires_at > :now
+                SELECT response, response_blob, expires_at <= :now AS stale
+                FROM query_cache
+                WHERE query_hash = :qh AND expires_at > :servable_after
             """),
-            {"qh": qhash, "now": datetime.utcnow()},
+            self._freshness_params(qhash),
         )
         row = result.fetchone()
         if not row:
             return None
-        # Bump hit count
-        await self.session.execute(
-            text("UPDATE query_cache SET hit_count = hit_count + 1 WHERE query_hash = :qh"),
-            {"qh": qhash},
+        await self._bump_hit_count(qhash)
+        if row[1] is not None:
+            response = self._decode_response(row[1])
+        else:
+            response = row[0] if isinstance(row[0], dict) else json.loads(row[0])
+        response["stale"] = bool(row[2])
+        return response
+
+    @timed("query_cache.get")
+    async def get_compressed(
+        self, query: str, filters: Optional[Dict[str, Any]] = None
+    ) -> Optional[Tuple[bytes, int, bool]]:
+        """Return the stored compact blob, result count and staleness, if any."""
+        qhash = self._hash_query(query, filters)
+        result = await self.session.execute(
+            text("""
+                SELECT response_blob, result_count, expires_at <= :now AS stale
+                FROM query_cache
+                WHERE query_hash = :qh AND expires_at > :servable_after
+                  AND response_blob IS NOT NULL
+            """),
+            self._freshness_params(qhash),
         )
+        row = result.fetchone()
+        if not row:
+            return None
+        await self._bump_hit_count(qhash)
+        return bytes(row[0]), row[1] or 0, bool(row[2])
+
+    async def claim_refresh(self, query: str, filters: Optional[Dict[str, Any]] = None) -> bool:
+        """Atomically claim the right to recompute an entry.
+
+        Only one caller across all workers wins until the lease of
+        ``QUERY_CACHE_REFRESH_LEASE_SECONDS`` runs out, so a crashed refresh
+        is retried later instead of blocking the entry forever. A query with
+        no entry yet (a seed, or one swept away) is claimed through an
+        expired placeholder row, which :meth:`set` later fills in.
+        """
+        now = datetime.utcnow()
+        result = await self.session.execute(
+            text("""
+                INSERT INTO query_cache (query_hash, query_text, filters, hit_count,
+                    expires_at, refresh_claimed_until)
+                VALUES (:qh, :qt, :f, 0, :placeholder_expires, :lease)
+                ON CONFLICT (query_hash) DO UPDATE SET
+                    refresh_claimed_until = EXCLUDED.refresh_claimed_until
+                WHERE query_cache.refresh_claimed_until IS NULL
+                   OR query_cache.refresh_claimed_until < :now
+                RETURNING 1
+            """),
+            {
+                "qh": self._hash_query(query, filters),
+                "qt": query,
+                "f": json.dumps(filters) if filters else None,
+                "placeholder_expires": PLACEHOLDER_EXPIRES,
+                "now": now,
+                "lease": now + timedelta(seconds=settings.QUERY_CACHE_REFRESH_LEASE_SECONDS),
+            },
+        )
+        claimed = result.fetchone() is not None
         await self.session.commit()
-        return row[0] if isinstance(row[0], dict) else json.loads(row[0])
+        return claimed
 
+    @timed("query_cache.set")
     async def set(
         self,
         query: str,
         filters: Optional[Dict[str, Any]],
         response: Dict[str, Any],
+        limit: Optional[int] = None,
     ) -> None:
+        """Store ``response``; ``limit`` is the page size it was computed for.
+
+        The key leaves the limit out, so a refresh reads it back from the row
+        to recompute the same page.
+        """
         qhash = self._hash_query(query, filters)
         expires = datetime.utcnow() + timedelta(seconds=settings.QUERY_CACHE_TTL_SECONDS)
+        if settings.QUERY_CACHE_COMPACT:
+            resp, blob = None, self._encode_response(response)
+        else:
+            resp, blob = json.dumps(response), None
         await self.session.execute(
             text("""
-                INSERT INTO query_cache (query_hash, query_text, filters, response, expires_at)
-                VALUES (:qh, :qt, :f, :resp, :exp)
+                INSERT INTO query_cache (query_hash, query_text, filters, response,
+                    response_blob, result_count, result_limit, expires_at)
+                VALUES (:qh, :qt, :f, :resp, :blob, :rc, :lim, :exp)
                 ON CONFLICT (query_hash) DO UPDATE SET
                     response = EXCLUDED.response,
+                    response_blob = EXCLUDED.response_blob,
+                    result_count = EXCLUDED.result_count,
+                    result_limit = EXCLUDED.result_limit,
                     expires_at = EXCLUDED.expires_at,
+                    refresh_claimed_until = NULL,
                     hit_count = query_cache.hit_count + 1
             """),
             {
                 "qh": qhash,
                 "qt": query,
                 "f": json.dumps(filters) if filters else None,
-                "resp": json.dumps(response),
+                "resp": resp,
+                "blob": blob,
+                "rc": response.get("total_results", 0),
+                "lim": limit,
                 "exp": expires,
             },
         )
         await self.session.commit()
 
-    async def cleanup_expired(self) -> int:
+    async def has_fresh(self, query: str, filters: Optional[Dict[str, Any]] = None) -> bool:
         result = await self.session.execute(
-            text("DELETE FROM query_cache WHERE expires_at < :now"),
+            text("SELECT 1 FROM query_cache WHERE query_hash = :qh AND expires_at > :now"),
+            {"qh": self._hash_query(query, filters), "now": datetime.utcnow()},
+        )
+        return result.fetchone() is not None
+
+    async def find_refresh_candidates(
+        self,
+        expiring_within: int,
+        limit: int,
+        min_hits: int = 1,
+        history_window_hours: int = 24,
+    ) -> List[Tuple[str, Optional[Dict[str, Any]], Optional[int]]]:
+        """Popular entries about to expire, most valuable first.
+
+        Each comes as its query text, filters and the limit it was cached for.
+
+        Popularity is the entry's ``hit_count`` plus how often the same query
+        text appears in ``search_history`` within the last
+        ``history_window_hours``.
+        """
+        now = datetime.utcnow()
+        result = await self.session.execute(
+            text("""
+                SELECT q.query_text, q.filters, q.result_limit
+                FROM query_cache q
+                LEFT JOIN (
+                    SELECT lower(query) AS query, count(*) AS recent
+                    FROM search_history
+                    WHERE created_at > :since
+                    GROUP BY lower(query)
+                ) h ON h.query = lower(q.query_text)
+                WHERE q.expires_at > :now AND q.expires_at <= :soon
+                  AND q.hit_count >= :min_hits
+                ORDER BY q.hit_count + COALESCE(h.recent, 0) DESC
+                LIMIT :n
+            """),
+            {
+                "since": now - timedelta(hours=history_window_hours),
+                "now": now,
+                "soon": now + timedelta(seconds=expiring_within),
+                "min_hits": min_hits,
+                "n": limit,
+            },
+        )
+        return [
+            (r[0], r[1] if isinstance(r[1], dict) or r[1] is None else json.loads(r[1]), r[2])
+            for r in result.fetchall()
+        ]
+
+    @timed("answer_cache.get")
+    async def get_answer(self, query: str, document_ids: List[str]) -> Optional[str]:
+        ahash = self._hash_answer(query, document_ids, settings.GEMINI_LLM_MODEL)
+        result = await self.session.execute(
+            text("""
+                UPDATE answer_cache SET hit_count = hit_count + 1
+                WHERE answer_hash = :ah AND expires_at > :now
+                RETURNING answer
+            """),
+            {"ah": ahash, "now": datetime.utcnow()},
+        )
+        row = result.fetchone()
+        await self.session.commit()
+        return row[0] if row else None
+
+    @timed("answer_cache.set")
+    async def set_answer(self, query: str, document_ids: List[str], answer: str) -> None:
+        ahash = self._hash_answer(query, document_ids, settings.GEMINI_LLM_MODEL)
+        expires = datetime.utcnow() + timedelta(seconds=settings.ANSWER_CACHE_TTL_SECONDS)
+        await self.session.execute(
+            text("""
+                INSERT INTO answer_cache (answer_hash, model, document_ids, answer, expires_at)
+                VALUES (:ah, :model, :ids, :answer, :exp)
+                ON CONFLICT (answer_hash) DO UPDATE SET
+                    answer = EXCLUDED.answer,
+                    expires_at = EXCLUDED.expires_at
+            """),
+            {
+                "ah": ahash,
+                "model": settings.GEMINI_LLM_MODEL,
+                "ids": document_ids,
+                "answer": answer,
+                "exp": expires,
+            },
+        )
+        await self.session.commit()
+
+    async def cleanup_expired_answers(self) -> int:
+        result = await self.session.execute(
+            text("DELETE FROM answer_cache WHERE expires_at < :now"),
             {"now": datetime.utcnow()},
         )
         await self.session.commit()
         return result.rowcount
+
+    async def cleanup_expired(self, batch_size: Optional[int] = None) -> int:
+        """Delete expired entries in batches of ``batch_size`` rows.
+
+        Each batch is its own short transaction so a large backlog of
+        expired rows never holds locks on the table for long.
+        """
+        batch_size = batch_size or settings.QUERY_CACHE_SWEEP_BATCH_SIZE
+        total = 0
+        while True:
+            deleted = await self.delete_expired_batch(batch_size)
+            total += deleted
+            if deleted < batch_size:
+                return total
+
+    async def delete_expired_batch(self, batch_size: int) -> int:
+        now = datetime.utcnow()
+        result = await self.session.execute(
+            text("""
+                DELETE FROM query_cache WHERE id IN (
+                    SELECT id FROM query_cache
+                    WHERE expires_at < :cutoff
+                      -- a claimed row may be a placeholder whose refresh is running
+                      AND (refresh_claimed_until IS NULL OR refresh_claimed_until < :now)
+                    LIMIT :n
+                    FOR UPDATE SKIP LOCKED
+                )
+            """),
+            {
+                # keep entries that are still servable as stale
+                "cutoff": now - timedelta(seconds=settings.QUERY_CACHE_STALE_GRACE_SECONDS),
+                "now": now,
+                "n": batch_size,
+            },
+        )
+        await self.session.commit()
+        return result.rowcount
+
+    async def evict_to_size(self, max_rows: int, batch_size: Optional[int] = None) -> int:
+        """Evict the least valuable entries until at most ``max_rows`` remain.
+
+        Value is ``hit_count`` divided by the entry's age in hours, so an old
+        entry needs proportionally more hits to survive than a fresh one.
+        Entries under a live refresh claim are kept, like in
+        :meth:`delete_expired_batch`, so the claim is not lost mid-refresh.
+        """
+        batch_size = batch_size or settings.QUERY_CACHE_SWEEP_BATCH_SIZE
+        excess = await self.count() - max_rows
+        total = 0
+        while excess > 0:
+            result = await self.session.execute(
+                text("""
+                    DELETE FROM query_cache WHERE id IN (
+                        SELECT id FROM query_cache
+                        WHERE refresh_claimed_until IS NULL OR refresh_claimed_until < :now
+                        ORDER BY hit_count / (1.0 + EXTRACT(EPOCH FROM (NOW() - created_at)) / 3600.0) ASC
+                        LIMIT :n
+                        FOR UPDATE SKIP LOCKED
+                    )
+                """),
+                {"n": min(batch_size, excess), "now": datetime.utcnow()},
+            )
+            await self.session.commit()
+            if result.rowcount == 0:
+                break
+            total += result.rowcount
+            excess -= result.rowcount
+        return total
+
+    async def count(self) -> int:
+        result = await self.session.execute(text("SELECT count(*) FROM query_cache"))
+        return result.scalar() or 0
+
+    async def table_size(self) -> int:
+        """Total on-disk size of ``query_cache`` including indexes and TOAST."""
+        result = await self.session.execute(
+            text("SELECT pg_total_relation_size('query_cache')")
+        )
+        return result.scalar() or 0
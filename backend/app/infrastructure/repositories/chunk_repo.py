@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.entities import Passage, SearchFilters
+from app.infrastructure.replicas import replica_read
+from app.infrastructure.repositories.document_repo import filter_clause
+from app.utils.metrics import timed
+
+
+class ChunkRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    @timed("document_chunks.replace")
+    async def replace_for_document(
+        self,
+        document_id: str,
+        passages: List[Passage],
+        embeddings: List[List[float]],
+    ) -> None:
+        await self.session.execute(
+            text("DELETE FROM document_chunks WHERE document_id = :id"),
+            {"id": document_id},
+        )
+        if passages:
+            await self.session.execute(
+                text("""
+                    INSERT INTO document_chunks (document_id, chunk_index, start_char,
+                        content, embedding)
+                    VALUES (:document_id, :chunk_index, :start_char, :content, :embedding)
+                """),
+                [
+                    {
+                        "document_id": document_id,
+                        "chunk_index": p.chunk_index,
+                        "start_char": p.start_char,
+                        "content": p.content,
+                        "embedding": emb,
+                    }
+                    for p, emb in zip(passages, embeddings)
+                ],
+            )
+        await self.session.commit()
+
+    @timed("document_chunks.vector_search")
+    @replica_read
+    async def vector_search(
+        self,
+        embedding: List[float],
+        limit: int = 80,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[Passage]:
+        """Nearest passages, from documents matching ``filters`` only.
+
+        The filters are applied before the ``LIMIT``; otherwise passages of
+        non-matching documents could take up every slot.
+        """
+        where, params = filter_clause(filters)
+        join = " JOIN documents ON documents.id = c.document_id" if where else ""
+        result = await self.session.execute(
+            text(f"""
+                SELECT c.document_id, c.chunk_index, c.start_char, c.content,
+                    c.embedding <=> :emb AS distance
+                FROM document_chunks c{join}
+                WHERE c.embedding IS NOT NULL{where}
+                ORDER BY distance
+                LIMIT :limit
+            """),
+            {"emb": embedding, "limit": limit, **params},
+        )
+        return [
+            Passage(
+                document_id=r["document_id"],
+                chunk_index=r["chunk_index"],
+                start_char=r["start_char"],
+                content=r["content"],
+                relevance_score=1 - float(r["distance"]),
+            )
+            for r in result.mappings().fetchall()
+        ]
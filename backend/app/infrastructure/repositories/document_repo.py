@@ -1,67 +1,158 @@
 from __future__ import annotations
 
-import json
-from typing import Any, Dict, List, Optional
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import TextClause, text
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
 
-from app.domain.entities import Document, FilterMetadata
+from app.config import settings
+from app.domain.entities import Document, ExportFilters, FilterMetadata, SearchFilters
+from app.infrastructure.replicas import replica_read
 from app.utils.logger import get_logger
+from app.utils.metrics import timed
 
 logger = get_logger(__name__)
 
+# Column projections. Nothing reads the embedding back, and listings only
+# need a preview, so full ``content`` is reserved for the detail view.
+LIST_COLUMNS = """
+    id, efta_id, COALESCE(content_preview, left(content, 300)) AS content_preview,
+    doc_type, people, locations, aircraft, evidence_types, pages, source,
+    dataset, file_path
+"""
+DETAIL_COLUMNS = """
+    id, efta_id, content, content_preview, doc_type, people, locations,
+    aircraft, evidence_types, pages, source, dataset, file_path
+"""
+# Columns an export may project; ``id`` is also the resume key
+EXPORT_FIELDS = (
+    "id", "efta_id", "content", "content_preview", "doc_type", "people", "locations",
+    "aircraft", "evidence_types", "pages", "source", "dataset", "file_path",
+)
+# Tag arrays searched by ``metadata_search``
+TAGS = "(people || locations || aircraft || evidence_types)"
+# Must match the idx_documents_names_trgm index expression
+NAMES = "tags_to_text(people || locations)"
+
+_PHRASE_RE = re.compile(r'"([^"]*)"')
+# Letters in any script, as to_tsvector splits them; "_" is a separator there
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+_TOKEN_RE = re.compile(r"[^\W_]+\*?", re.UNICODE)
+
+
+def build_tsquery(query: str, operator: str = "&") -> str:
+    """Translate search-box input into ``to_tsquery`` syntax.
+
+    Quoted text becomes a phrase (``<->``) and a trailing ``*`` a prefix
+    match (``:*``); other words are joined with ``operator``. Anything that
+    is not a word character is dropped, so input cannot inject operators.
+    """
+    units: List[str] = []
+    for phrase in _PHRASE_RE.findall(query):
+        words = [w.lower() for w in _WORD_RE.findall(phrase)]
+        if len(words) > 1:
+            units.append("(" + " <-> ".join(words) + ")")
+        elif words:
+            units.append(words[0])
+    for token in _TOKEN_RE.findall(_PHRASE_RE.sub(" ", query)):
+        word = token.rstrip("*").lower()
+        units.append(f"{word}:*" if token.endswith("*") else word)
+    return f" {operator} ".join(units)
+
+
+def filter_clause(filters: Optional[SearchFilters]) -> Tuple[str, Dict[str, Any]]:
+    """SQL ``AND`` conditions and binds applying ``filters`` locally.
+
+    Same semantics as ``DugganClient.build_filter``: values of one field
+    are OR-ed, fields are AND-ed.
+    """
+    if not filters:
+        return "", {}
+    clauses: List[str] = []
+    params: Dict[str, Any] = {}
+    if filters.doc_types:
+        clauses.append("doc_type = ANY(:f_doc_types)")
+        params["f_doc_types"] = filters.doc_types
+    for field in ("people", "locations", "evidence_types"):
+        values = getattr(filters, field)
+        if values:
+            clauses.append(f"{field} && CAST(:f_{field} AS text[])")
+            params[f"f_{field}"] = values
+    return "".join(f" AND {c}" for c in clauses), params
+
 
 class DocumentRepository:
+    UPSERT_SQL = text("""
+        INSERT INTO documents (id, efta_id, content, content_preview, doc_type,
+            people, locations, aircraft, evidence_types, pages, source,
+            dataset, file_path, embedding)
+        VALUES (:id, :efta_id, :content, :preview, :doc_type,
+            :people, :locations, :aircraft, :evidence_types, :pages,
+            :source, :dataset, :file_path, :embedding)
+        ON CONFLICT (id) DO UPDATE SET
+            content = EXCLUDED.content,
+            content_preview = EXCLUDED.content_preview,
+            embedding = COALESCE(EXCLUDED.embedding, documents.embedding)
+    """)
+
     def __init__(self, session: AsyncSession) -> None:
         self.session = session
 
+    @staticmethod
+    def _upsert_params(doc: Document, embedding: Optional[List[float]]) -> Dict[str, Any]:
+        return {
+            "id": doc.id,
+            "efta_id": doc.efta_id,
+            "content": doc.content,
+            "preview": doc.content_preview,
+            "doc_type": doc.doc_type,
+            "people": doc.people,
+            "locations": doc.locations,
+            "aircraft": doc.aircraft,
+            "evidence_types": doc.evidence_types,
+            "pages": doc.pages,
+            "source": doc.source,
+            "dataset": doc.dataset,
+            "file_path": doc.file_path,
+            "embedding": embedding or None,
+        }
+
+    @timed("documents.upsert")
     async def upsert(self, doc: Document, embedding: Optional[List[float]] = None) -> None:
-        emb_param = json.dumps(embedding) if embedding else None
-        await self.session.execute(
-            text("""
-                INSERT INTO documents (id, efta_id, content, content_preview, doc_type,
-                    people, locations, aircraft, evidence_types, pages, source,
-                    dataset, file_path, embedding)
-                VALUES (:id, :efta_id, :content, :preview, :doc_type,
-                    :people, :locations, :aircraft, :evidence_types, :pages,
-                    :source, :dataset, :file_path, CAST(:embedding AS vector))
-                ON CONFLICT (id) DO UPDATE SET
-                    content = EXCLUDED.content,
-                    content_preview = EXCLUDED.content_preview,
-                    embedding = EXCLUDED.embedding
-            """),
-            {
-                "id": doc.id,
-                "efta_id": doc.efta_id,
-                "content": doc.content,
-                "preview": doc.content_preview,
-                "doc_type": doc.doc_type,
-                "people": doc.people,
-                "locations": doc.locations,
-                "aircraft": doc.aircraft,
-                "evidence_types": doc.evidence_types,
-                "pages": doc.pages,
-                "source": doc.source,
-                "dataset": doc.dataset,
-                "file_path": doc.file_path,
-                "embedding": emb_param,
-            },
-        )
+        await self.session.execute(self.UPSERT_SQL, self._upsert_params(doc, embedding))
         await self.session.commit()
 
+    @timed("documents.upsert_many")
+    async def upsert_many(self, docs: List[Document]) -> None:
+        """Store documents without embeddings in one round trip and transaction."""
+        if not docs:
+            return
+        try:
+            await self.session.execute(
+                self.UPSERT_SQL, [self._upsert_params(d, None) for d in docs]
+            )
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+
+    @timed("documents.get")
+    @replica_read
     async def get_by_id(self, doc_id: str) -> Optional[Document]:
         result = await self.session.execute(
-            text("SELECT * FROM documents WHERE id = :id"), {"id": doc_id}
+            text(f"SELECT {DETAIL_COLUMNS} FROM documents WHERE id = :id"), {"id": doc_id}
         )
         row = result.mappings().fetchone()
         if not row:
             return None
         return self._row_to_document(row)
 
+    @timed("documents.get")
+    @replica_read
     async def get_by_efta_id(self, efta_id: str) -> Optional[Document]:
         result = await self.session.execute(
-            text("SELECT * FROM documents WHERE efta_id = :efta_id LIMIT 1"),
+            text(f"SELECT {DETAIL_COLUMNS} FROM documents WHERE efta_id = :efta_id LIMIT 1"),
             {"efta_id": efta_id},
         )
         row = result.mappings().fetchone()
@@ -69,41 +160,85 @@ class DocumentRepository:
             return None
         return self._row_to_document(row)
 
+    @timed("documents.get_many")
+    @replica_read
+    async def get_many(
+        self, doc_ids: List[str], filters: Optional[SearchFilters] = None
+    ) -> List[Document]:
+        """List-view documents for ``doc_ids``, in the order given."""
+        if not doc_ids:
+            return []
+        where, params = filter_clause(filters)
+        result = await self.session.execute(
+            text(f"SELECT {LIST_COLUMNS} FROM documents WHERE id = ANY(:ids){where}"),
+            {"ids": doc_ids, **params},
+        )
+        by_id = {r["id"]: self._row_to_document(r) for r in result.mappings().fetchall()}
+        return [by_id[i] for i in doc_ids if i in by_id]
+
+    @timed("documents.vector_search")
+    @replica_read
     async def vector_search(
-        self, embedding: List[float], limit: int = 20
+        self,
+        embedding: List[float],
+        limit: int = 20,
+        filters: Optional[SearchFilters] = None,
     ) -> List[Document]:
-        emb_str = json.dumps(embedding)
+        where, params = filter_clause(filters)
         result = await self.session.execute(
-            text("""
-                SELECT *, 1 - (embedding <=> CAST(:emb AS vector)) AS score
+            text(f"""
+                SELECT {LIST_COLUMNS}, embedding <=> :emb AS distance
                 FROM documents
-                WHERE embedding IS NOT NULL
-                ORDER BY embedding <=> CAST(:emb AS vector)
+                WHERE embedding IS NOT NULL{where}
+                ORDER BY distance
                 LIMIT :limit
             """),
-            {"emb": emb_str, "limit": limit},
+            {"emb": embedding, "limit": limit, **params},
         )
         rows = result.mappings().fetchall()
         docs = []
         for r in rows:
             doc = self._row_to_document(r)
-            doc.relevance_score = float(r.get("score", 0))
+            doc.relevance_score = 1 - float(r["distance"])
             doc.match_type = "semantic"
             docs.append(doc)
         return docs
 
-    async def keyword_search(self, query: str, limit: int = 20) -> List[Document]:
+    @timed("documents.keyword_search")
+    @replica_read
+    async def keyword_search(
+        self, query: str, limit: int = 20, filters: Optional[SearchFilters] = None
+    ) -> List[Document]:
+        """Ranked full-text search, falling back to fuzzy name matching.
+
+        Documents matching any term are returned; ``ts_rank_cd`` over both
+        the any-term and all-terms queries puts documents containing every
+        term (close together) first. When nothing matches, e.g. for a
+        misspelled name, people and locations are matched by trigrams.
+        """
+        any_terms = build_tsquery(query, "|")
+        if not any_terms:
+            return []
+        where, params = filter_clause(filters)
         result = await self.session.execute(
-            text("""
-                SELECT *, similarity(content, :query) AS score
-                FROM documents
-                WHERE content % :query
+            text(f"""
+                WITH q AS (
+                    SELECT to_tsquery('english', :any_q) AS any_q,
+                           to_tsquery('english', :all_q) AS all_q
+                )
+                SELECT {LIST_COLUMNS},
+                    ts_rank_cd(search_tsv, q.any_q, 1) + ts_rank_cd(search_tsv, q.all_q, 1)
+                        AS score
+                FROM documents, q
+                WHERE search_tsv @@ q.any_q{where}
                 ORDER BY score DESC
                 LIMIT :limit
             """),
-            {"query": query, "limit": limit},
+            {"any_q": any_terms, "all_q": build_tsquery(query), "limit": limit, **params},
         )
         rows = result.mappings().fetchall()
+        if not rows:
+            return await self.fuzzy_name_search(query, limit, filters)
         docs = []
         for r in rows:
             doc = self._row_to_document(r)
@@ -112,38 +247,145 @@ class DocumentRepository:
             docs.append(doc)
         return docs
 
-    async def find_related(self, doc_id: str, limit: int = 5) -> List[Document]:
-        """Find documents similar to the given document via vector similarity."""
+    @timed("documents.fuzzy_name_search")
+    @replica_read
+    async def fuzzy_name_search(
+        self, query: str, limit: int = 20, filters: Optional[SearchFilters] = None
+    ) -> List[Document]:
+        """Documents whose people or locations resemble ``query`` (trigrams)."""
+        where, params = filter_clause(filters)
         result = await self.session.execute(
-            text("SELECT embedding FROM documents WHERE id = :id"),
-            {"id": doc_id},
+            text(f"""
+                SELECT {LIST_COLUMNS}, word_similarity(:query, {NAMES}) AS score
+                FROM documents
+                WHERE {NAMES} %> :query{where}
+                ORDER BY score DESC
+                LIMIT :limit
+            """),
+            {"query": query, "limit": limit, **params},
         )
-        row = result.fetchone()
-        if not row or row[0] is None:
+        rows = result.mappings().fetchall()
+        docs = []
+        for r in rows:
+            doc = self._row_to_document(r)
+            doc.relevance_score = float(r.get("score", 0))
+            doc.match_type = "fuzzy_name"
+            docs.append(doc)
+        return docs
+
+    @timed("documents.metadata_search")
+    @replica_read
+    async def metadata_search(
+        self, terms: List[str], limit: int = 20, filters: Optional[SearchFilters] = None
+    ) -> List[Document]:
+        """Documents tagged with (or EFTA-numbered as) any of ``terms``.
+
+        Ranked by how many of the terms each document is tagged with.
+        """
+        if not terms:
             return []
-        emb_str = row[0] if isinstance(row[0], str) else json.dumps(row[0])
+        where, params = filter_clause(filters)
         result = await self.session.execute(
-            text("""
-                SELECT *, 1 - (embedding <=> CAST(:emb AS vector)) AS score
+            text(f"""
+                SELECT {LIST_COLUMNS},
+                    (SELECT count(*) FROM unnest({TAGS}) t
+                     WHERE t = ANY(CAST(:terms AS text[]))) AS score
                 FROM documents
-                WHERE embedding IS NOT NULL AND id != :id
-                ORDER BY embedding <=> CAST(:emb AS vector)
+                WHERE ({TAGS} && CAST(:terms AS text[])
+                       OR lower(efta_id) = ANY(CAST(:terms AS text[]))){where}
+                ORDER BY score DESC, efta_id
                 LIMIT :limit
             """),
-            {"emb": emb_str, "id": doc_id, "limit": limit},
+            {"terms": terms, "limit": limit, **params},
         )
         rows = result.mappings().fetchall()
         docs = []
         for r in rows:
             doc = self._row_to_document(r)
             doc.relevance_score = float(r.get("score", 0))
+            doc.match_type = "metadata"
             docs.append(doc)
         return docs
 
+    @timed("documents.find_related")
+    @replica_read
+    async def find_related(self, doc_id: str, limit: int = 5) -> List[Document]:
+        """Find documents similar to the given document via vector similarity."""
+        # The source embedding stays server-side instead of round-tripping
+        # 3072 floats through the client.
+        result = await self.session.execute(
+            text(f"""
+                WITH src AS (SELECT embedding FROM documents WHERE id = :id)
+                SELECT {LIST_COLUMNS}, 1 - (documents.embedding <=> src.embedding) AS score
+                FROM documents, src
+                WHERE src.embedding IS NOT NULL AND documents.embedding IS NOT NULL
+                  AND documents.id != :id
+                ORDER BY documents.embedding <=> src.embedding
+                LIMIT :limit
+            """),
+            {"id": doc_id, "limit": limit},
+        )
+        rows = result.mappings().fetchall()
+        docs = []
+        for r in rows:
+            doc = self._row_to_document(r)
+            doc.relevance_score = float(r.get("score", 0))
+            docs.append(doc)
+        return docs
+
+    async def export(
+        self,
+        filters: Optional[ExportFilters] = None,
+        fields: Sequence[str] = EXPORT_FIELDS,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream matching documents in ``id`` order through a server-side cursor.
+
+        Rows are fetched ``EXPORT_FETCH_SIZE`` at a time, so memory stays
+        flat however many match. Pass the last ``id`` received as ``after``
+        to resume an interrupted export.
+        """
+        unknown = set(fields) - set(EXPORT_FIELDS)
+        if unknown:
+            raise ValueError(f"not exportable: {sorted(unknown)}")
+        where, params = filter_clause(filters)
+        if filters and filters.aircraft:
+            where += " AND aircraft && CAST(:f_aircraft AS text[])"
+            params["f_aircraft"] = filters.aircraft
+        if filters and filters.datasets:
+            where += " AND dataset = ANY(:f_datasets)"
+            params["f_datasets"] = filters.datasets
+        if after is not None:
+            where += " AND id > :after"
+            params["after"] = after
+        sql = f"SELECT {', '.join(fields)} FROM documents WHERE TRUE{where} ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT :limit"
+            params["limit"] = limit
+        result = await self._open_cursor(text(sql), params)
+        try:
+            async for row in result.mappings():
+                yield dict(row)
+        finally:
+            await result.close()
+
+    @timed("documents.export")
+    @replica_read
+    async def _open_cursor(self, statement: TextClause, params: Dict[str, Any]) -> AsyncResult:
+        # the replica is picked as the cursor opens and serves the whole export
+        return await self.session.stream(
+            statement, params, execution_options={"yield_per": settings.EXPORT_FETCH_SIZE}
+        )
+
+    @timed("documents.count")
+    @replica_read
     async def count(self) -> int:
         result = await self.session.execute(text("SELECT count(*) FROM documents"))
         return result.scalar() or 0
 
+    @timed("documents.filter_metadata")
+    @replica_read
     async def get_filter_metadata(self) -> FilterMetadata:
         doc_types: List[Dict[str, Any]] = []
         result = await self.session.execute(
@@ -201,7 +443,7 @@ class DocumentRepository:
         return Document(
             id=row["id"],
             efta_id=row["efta_id"],
-            content=row["content"],
+            content=row.get("content") or "",
             content_preview=row.get("content_preview"),
             doc_type=row.get("doc_type"),
             people=row.get("people") or [],
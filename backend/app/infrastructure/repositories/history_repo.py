@@ -8,12 +8,15 @@ from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.domain.entities import SearchHistoryEntry
+from app.infrastructure.replicas import replica_read
+from app.utils.metrics import timed
 
 
 class HistoryRepository:
     def __init__(self, session: AsyncSession) -> None:
         self.session = session
 
+    @timed("search_history.create")
     async def create(
         self,
         user_id: UUID,
@@ -40,6 +43,8 @@ class HistoryRepository:
         row = result.mappings().fetchone()
         return SearchHistoryEntry(**row)
 
+    @timed("search_history.list")
+    @replica_read
     async def list_by_user(
         self, user_id: UUID, limit: int = 50, offset: int = 0
     ) -> List[SearchHistoryEntry]:
@@ -54,6 +59,8 @@ class HistoryRepository:
         )
         return [SearchHistoryEntry(**r) for r in result.mappings().fetchall()]
 
+    @timed("search_history.count")
+    @replica_read
     async def count_by_user(self, user_id: UUID) -> int:
         result = await self.session.execute(
             text("SELECT count(*) FROM search_history WHERE user_id = :uid"),
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+import time
+from functools import lru_cache
+from typing import Any, Dict, Set, Tuple
+
+from prometheus_client import Histogram
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.utils.logger import get_logger
+from app.utils.metrics import LATENCY_BUCKETS
+
+logger = get_logger(__name__)
+
+SQL_SECONDS = Histogram(
+    "epsteinrag_sql_seconds",
+    "SQL statement latency by statement fingerprint",
+    ["fingerprint", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_PARAM_RE = re.compile(r"\$\d+|%\(\w+\)s|\?")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+# Only reads are re-run under EXPLAIN ANALYZE, which executes the statement
+_EXPLAINABLE = ("SELECT", "WITH")
+MAX_LOGGED_CHARS = 500
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> Tuple[str, str, str]:
+    """Return ``(id, operation, normalized)`` for a SQL statement.
+
+    Literals and bind placeholders become ``?``, lists of them ``(?+)`` and
+    whitespace is collapsed, so every execution of one repository query
+    shares a fingerprint whatever its arguments.
+    """
+    sql = _COMMENT_RE.sub(" ", statement)
+    sql = _STRING_RE.sub("?", sql)
+    sql = _PARAM_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _LIST_RE.sub("(?+)", sql)
+    normalized = _SPACE_RE.sub(" ", sql).strip()
+    operation = normalized.split(" ", 1)[0].upper() if normalized else ""
+    digest = hashlib.sha1(normalized.encode()).hexdigest()[:12]
+    return digest, operation, normalized
+
+
+def _describe(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}({len(value)})"
+    return type(value).__name__
+
+
+def bind_shape(parameters: Any, executemany: bool = False) -> Any:
+    """Types and sizes of bound values, never the values themselves."""
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = parameters[0] if parameters else None
+        return {"rows": len(parameters), "row": bind_shape(first)}
+    if isinstance(parameters, dict):
+        return {name: _describe(value) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_describe(value) for value in parameters]
+    return _describe(parameters)
+
+
+class SlowQueryMonitor:
+    """Engine hook timing every statement by fingerprint.
+
+    Statements slower than ``threshold_ms`` are logged as ``slow_query``
+    with their normalized text and bind shape. With ``explain`` on, a slow
+    read is re-run under ``EXPLAIN (ANALYZE, BUFFERS)`` on another pooled
+    connection, at most once per fingerprint every ``explain_interval``
+    seconds, and the plan is logged as ``slow_query_plan``.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        threshold_ms: float,
+        explain: bool = False,
+        explain_interval: float = 600.0,
+    ) -> None:
+        self.engine = engine
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self._explained_at: Dict[str, float] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def install(self) -> None:
+        event.listen(self.engine.sync_engine, "before_cursor_execute", self._before)
+        event.listen(self.engine.sync_engine, "after_cursor_execute", self._after)
+        event.listen(self.engine.sync_engine, "handle_error", self._failed)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def _failed(self, exception_context) -> None:
+        # a failed statement never reaches _after; drop its start time so the
+        # pooled connection's stack stays paired with the statements on it
+        conn = exception_context.connection
+        started = conn.info.get("query_started") if conn is not None else None
+        if started:
+            started.pop()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        if statement.lstrip().upper().startswith("EXPLAIN"):
+            return
+        fp, operation, normalized = fingerprint(statement)
+        SQL_SECONDS.labels(fingerprint=fp, operation=operation).observe(elapsed)
+
+        duration_ms = elapsed * 1000
+        if duration_ms < self.threshold_ms:
+            return
+        logger.warning(
+            "slow_query",
+            fingerprint=fp,
+            duration_ms=round(duration_ms, 1),
+            statement=normalized[:MAX_LOGGED_CHARS],
+            binds=bind_shape(parameters, executemany),
+        )
+        if self.explain and not executemany and self._explain_due(fp, operation):
+            self._schedule_explain(fp, statement, parameters)
+
+    def _explain_due(self, fp: str, operation: str) -> bool:
+        if operation not in _EXPLAINABLE:
+            return False
+        now = time.monotonic()
+        last = self._explained_at.get(fp)
+        if last is not None and now - last < self.explain_interval:
+            return False
+        self._explained_at[fp] = now
+        return True
+
+    def _schedule_explain(self, fp: str, statement: str, parameters: Any) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self._explain(fp, statement, parameters))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, fp: str, statement: str, parameters: Any) -> None:
+        try:
+            # the connection is never committed, so the statement is rolled back
+            async with self.engine.connect() as conn:
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters
+                )
+                plan = "\n".join(row[0] for row in result)
+        except Exception:
+            logger.warning("slow_query_explain_failed", fingerprint=fp, exc_info=True)
+            return
+        logger.warning("slow_query_plan", fingerprint=fp, plan=plan)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.infrastructure.database import async_session
+from app.infrastructure.replicas import READ_YOUR_WRITES
+from app.infrastructure.repositories.cache_repo import CacheRepository
+from app.infrastructure.repositories.chunk_repo import ChunkRepository
+from app.infrastructure.repositories.document_repo import DocumentRepository
+from app.infrastructure.repositories.history_repo import HistoryRepository
+from app.infrastructure.repositories.user_repo import UserRepository
+
+
+class UnitOfWork:
+    """Repositories over one lazily opened session.
+
+    Nothing is opened until a repository first runs a statement, so a
+    request that never touches the database never takes a pool slot.
+    Repositories commit their own writes; :meth:`release` hands the
+    connection back between steps, e.g. before waiting on an external
+    service, and the next statement checks out a fresh one. With
+    ``read_your_writes`` no read is sent to a replica.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = async_session,
+        read_your_writes: bool = False,
+    ) -> None:
+        self.session_factory = session_factory
+        self.read_your_writes = read_your_writes
+        self._session: Optional[AsyncSession] = None
+        self._documents: Optional[DocumentRepository] = None
+        self._cache: Optional[CacheRepository] = None
+        self._chunks: Optional[ChunkRepository] = None
+        self._history: Optional[HistoryRepository] = None
+        self._users: Optional[UserRepository] = None
+
+    @property
+    def session(self) -> AsyncSession:
+        # an AsyncSession only checks out a connection on its first statement
+        if self._session is None:
+            self._session = self.session_factory()
+            if self.read_your_writes:
+                self._session.info[READ_YOUR_WRITES] = True
+        return self._session
+
+    @property
+    def documents(self) -> DocumentRepository:
+        if self._documents is None:
+            self._documents = DocumentRepository(self.session)
+        return self._documents
+
+    @property
+    def cache(self) -> CacheRepository:
+        if self._cache is None:
+            self._cache = CacheRepository(self.session)
+        return self._cache
+
+    @property
+    def chunks(self) -> ChunkRepository:
+        if self._chunks is None:
+            self._chunks = ChunkRepository(self.session)
+        return self._chunks
+
+    @property
+    def history(self) -> HistoryRepository:
+        if self._history is None:
+            self._history = HistoryRepository(self.session)
+        return self._history
+
+    @property
+    def users(self) -> UserRepository:
+        if self._users is None:
+            self._users = UserRepository(self.session)
+        return self._users
+
+    async def release(self) -> None:
+        """Return the connection to the pool, rolling back anything uncommitted.
+
+        The session stays usable; it reconnects on its next statement.
+        """
+        if self._session is not None:
+            await self._session.close()
+
+    async def close(self) -> None:
+        await self.release()
+
+    async def __aenter__(self) -> UnitOfWork:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
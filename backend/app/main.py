@@ -3,11 +3,17 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.config import settings
 from app.api.middleware.error_handler import setup_exception_handlers
-from app.api.routes import auth, documents, health, history, search
-from app.infrastructure.database import close_db, init_db
+from app.api.middleware.server_timing import ServerTimingMiddleware
+from app.api.routes import auth, documents, health, history, metrics, search
+from app.core.cache_maintenance import CacheMaintenance
+from app.core.cache_warmer import CacheWarmer
+from app.core.replica_monitor import ReplicaMonitor
+from app.core.search_service import SearchService
+from app.infrastructure.database import async_session, close_db, init_db, replicas
 from app.utils.logger import setup_logging
 
 
@@ -15,7 +21,23 @@ from app.utils.logger import setup_logging
 async def lifespan(app: FastAPI):
     setup_logging(settings.DEBUG)
     await init_db()
+    # long-lived: one Duggan HTTP pool and refresher for all requests
+    app.state.search_service = SearchService()
+    app.state.cache_maintenance = CacheMaintenance(async_session)
+    app.state.cache_warmer = CacheWarmer(async_session, app.state.search_service)
+    if settings.QUERY_CACHE_SWEEP_INTERVAL_SECONDS > 0:
+        app.state.cache_maintenance.start()
+    if settings.CACHE_WARM_INTERVAL_SECONDS > 0:
+        app.state.cache_warmer.start()
+    app.state.replica_monitor = ReplicaMonitor(replicas) if replicas else None
+    if app.state.replica_monitor:
+        app.state.replica_monitor.start()
     yield
+    if app.state.replica_monitor:
+        await app.state.replica_monitor.stop()
+    await app.state.cache_warmer.stop()
+    await app.state.search_service.close()
+    await app.state.cache_maintenance.stop()
     await close_db()
 
 
@@ -25,6 +47,7 @@ app = FastAPI(
     docs_url="/api/docs",
     redoc_url="/api/redoc",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -35,10 +58,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.add_middleware(GZipMiddleware, minimum_size=1000)
+# outermost, so the total includes compression
+app.add_middleware(ServerTimingMiddleware)
 
 setup_exception_handlers(app)
 
 app.include_router(health.router, prefix="/api")
+app.include_router(metrics.router, prefix="/api")
 app.include_router(auth.router, prefix="/api/auth")
 app.include_router(search.router, prefix="/api")
 app.include_router(documents.router, prefix="/api/documents")
@@ -0,0 +1,69 @@
+"""
+Export local documents as NDJSON or CSV, streamed through a server-side cursor.
+
+Usage:
+    python -m app.scripts.export_documents --doc-type flight_log --aircraft N908JE > flights.ndjson
+    python -m app.scripts.export_documents --format csv --fields efta_id,people -o people.csv
+    python -m app.scripts.export_documents --after dataset9-EFTA00015176 >> flights.ndjson   # resume
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from typing import BinaryIO, Optional
+
+from app.core.export import Encoder, export_documents, resolve_fields
+from app.domain.entities import ExportFilters
+from app.infrastructure.database import engine
+from app.utils.logger import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+
+async def export(args: argparse.Namespace, out: BinaryIO) -> None:
+    filters = ExportFilters(
+        doc_types=args.doc_type,
+        people=args.person,
+        locations=args.location,
+        aircraft=args.aircraft,
+        datasets=args.dataset,
+    )
+    encoder = Encoder(args.format, resolve_fields(args.fields), header=args.after is None)
+    written: Optional[str] = args.after
+    try:
+        async for chunk in export_documents(filters, encoder, after=args.after, limit=args.limit):
+            out.write(chunk)
+            out.flush()
+            written = encoder.last_id
+    except BaseException:
+        # everything up to ``written`` is on disk; --after picks up from there
+        logger.error("export_interrupted", resume_after=written)
+        raise
+    finally:
+        await engine.dispose()
+    logger.info("export_complete", last_id=written)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    parser.add_argument("--doc-type", action="append", help="repeat to match any of several")
+    parser.add_argument("--person", action="append")
+    parser.add_argument("--location", action="append")
+    parser.add_argument("--aircraft", action="append")
+    parser.add_argument("--dataset", action="append")
+    parser.add_argument("--fields", help="comma-separated columns; id is always included")
+    parser.add_argument("--after", help="resume after this document id")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("-o", "--output", help="file to write; stdout by default")
+    args = parser.parse_args()
+
+    # the export may be going to stdout
+    setup_logging(stream=sys.stderr)
+    if args.output:
+        # a resumed export appends to what is already there
+        with open(args.output, "ab" if args.after else "wb") as out:
+            asyncio.run(export(args, out))
+    else:
+        asyncio.run(export(args, sys.stdout.buffer))
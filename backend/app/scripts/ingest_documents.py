@@ -11,14 +11,33 @@ import sys
 from typing import List
 
 from app.config import settings
+from app.core.chunking import split_passages
+from app.domain.entities import Document
 from app.infrastructure.database import async_session, init_db
 from app.infrastructure.external.duggan_client import DugganClient
 from app.infrastructure.external import gemini_client
+from app.infrastructure.repositories.chunk_repo import ChunkRepository
 from app.infrastructure.repositories.document_repo import DocumentRepository
 from app.utils.logger import get_logger, setup_logging
 
 logger = get_logger(__name__)
 
+EMBED_BATCH_SIZE = 100
+
+
+async def ingest_chunks(docs: List[Document], chunk_repo: ChunkRepository) -> int:
+    """Split each document into passages and store them with their embeddings."""
+    stored = 0
+    for doc in docs:
+        passages = split_passages(doc.id, doc.content)
+        embeddings: List[List[float]] = []
+        for i in range(0, len(passages), EMBED_BATCH_SIZE):
+            batch = passages[i : i + EMBED_BATCH_SIZE]
+            embeddings.extend(await gemini_client.embed_batch([p.content for p in batch]))
+        await chunk_repo.replace_for_document(doc.id, passages, embeddings)
+        stored += len(passages)
+    return stored
+
 
 async def ingest(queries: List[str], limit_per_query: int = 100) -> None:
     setup_logging(debug=True)
@@ -29,6 +48,7 @@ async def ingest(queries: List[str], limit_per_query: int = 100) -> None:
 
     async with async_session() as session:
         doc_repo = DocumentRepository(session)
+        chunk_repo = ChunkRepository(session)
 
         for q in queries:
             logger.info("fetching", query=q, limit=limit_per_query)
@@ -45,7 +65,8 @@ async def ingest(queries: List[str], limit_per_query: int = 100) -> None:
                 await doc_repo.upsert(doc, embedding=emb)
                 total_stored += 1
 
-            logger.info("stored", query=q, count=len(docs))
+            chunks = await ingest_chunks(docs, chunk_repo)
+            logger.info("stored", query=q, count=len(docs), chunks=chunks)
             await asyncio.sleep(1)  # respect rate limits
 
     logger.info("ingestion_complete", total=total_stored)
@@ -0,0 +1,43 @@
+"""
+Apply pending schema migrations. Run once per deploy, before starting workers.
+
+Usage:
+    python -m app.scripts.migrate            # apply pending migrations
+    python -m app.scripts.migrate --status   # show applied and pending versions
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from app.infrastructure.database import engine
+from app.infrastructure.migrations import MIGRATIONS, current_version, migrate
+from app.utils.logger import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+
+async def status() -> None:
+    version = await current_version(engine)
+    for m in MIGRATIONS:
+        state = "applied" if m.version <= version else "pending"
+        print(f"{m.version:>4}  {state:<8} {m.name}")
+
+
+async def main(show_status: bool) -> None:
+    setup_logging(debug=True)
+    try:
+        if show_status:
+            await status()
+        else:
+            applied = await migrate(engine)
+            logger.info("migrations_complete", applied=applied)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--status", action="store_true", help="list migrations and exit")
+    args = parser.parse_args()
+    asyncio.run(main(args.status))
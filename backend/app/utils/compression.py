@@ -0,0 +1,39 @@
+"""Gzip helpers for bodies that are compressed once and completed per request.
+
+A *deflate prefix* is a raw deflate stream that has been sync-flushed but
+not finished, followed by the CRC32 and length of the uncompressed data.
+Because the stream ends on a byte boundary, a second, independently
+compressed tail can be appended later to produce a complete gzip body
+without recompressing the stored part.
+"""
+from __future__ import annotations
+
+import struct
+import zlib
+
+# ID1 ID2 CM FLG MTIME(4) XFL OS — no optional fields, OS "unknown"
+GZIP_HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+_TRAILER = struct.Struct("<II")
+
+
+def _raw_deflater(level: int):
+    return zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+
+def deflate_prefix(data: bytes, level: int = 6) -> bytes:
+    comp = _raw_deflater(level)
+    stream = comp.compress(data) + comp.flush(zlib.Z_SYNC_FLUSH)
+    return stream + _TRAILER.pack(zlib.crc32(data), len(data) & 0xFFFFFFFF)
+
+
+def inflate_prefix(blob: bytes) -> bytes:
+    return zlib.decompressobj(-zlib.MAX_WBITS).decompress(blob[: -_TRAILER.size])
+
+
+def gzip_with_suffix(blob: bytes, suffix: bytes, level: int = 6) -> bytes:
+    """Finish a stored deflate prefix with ``suffix`` as a complete gzip body."""
+    crc, size = _TRAILER.unpack(blob[-_TRAILER.size :])
+    comp = _raw_deflater(level)
+    tail = comp.compress(suffix) + comp.flush()
+    trailer = _TRAILER.pack(zlib.crc32(suffix, crc), (size + len(suffix)) & 0xFFFFFFFF)
+    return GZIP_HEADER + blob[: -_TRAILER.size] + tail + trailer
@@ -23,3 +23,17 @@ class NotFoundError(EpsteinRAGException):
 class ExternalServiceError(EpsteinRAGException):
     def __init__(self, service: str, message: str):
         super().__init__(f"{service}: {message}", status_code=503)
+
+
+class CircuitOpenError(ExternalServiceError):
+    def __init__(self, service: str):
+        super().__init__(service, "circuit open, failing fast")
+
+
+class OverloadedError(EpsteinRAGException):
+    """Shed by admission control; ``reason`` says which limit was hit."""
+
+    def __init__(self, resource: str, reason: str):
+        super().__init__(f"{resource} overloaded ({reason})", status_code=503)
+        self.resource = resource
+        self.reason = reason
@@ -1,9 +1,11 @@
 import sys
 import structlog
 import logging
+from typing import Optional, TextIO
 
 
-def setup_logging(debug: bool = False) -> None:
+def setup_logging(debug: bool = False, stream: Optional[TextIO] = None) -> None:
+    """Configure structlog; events go to ``stream``, stdout by default."""
     # Fix Windows cp1252 encoding issues with Unicode document content
     if sys.platform == "win32":
         sys.stdout.reconfigure(encoding="utf-8", errors="replace")
@@ -18,7 +20,7 @@ def setup_logging(debug: bool = False) -> None:
             structlog.processors.TimeStamper(fmt="iso"),
             structlog.dev.ConsoleRenderer() if debug else structlog.processors.JSONRenderer(),
         ],
-        logger_factory=structlog.PrintLoggerFactory(),
+        logger_factory=structlog.PrintLoggerFactory(file=stream),
     )
 
 
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple, TypeVar
+
+from prometheus_client import Counter, Histogram
+
+T = TypeVar("T")
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+STAGE_SECONDS = Histogram(
+    "epsteinrag_stage_seconds",
+    "Time spent in one stage of request handling",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_SECONDS = Histogram(
+    "epsteinrag_request_seconds",
+    "Time until the response is complete",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+SHED_TOTAL = Counter(
+    "epsteinrag_shed_total",
+    "Calls turned away by admission control",
+    ["gate", "reason"],
+)
+
+
+class StageTimings:
+    """Per-request stage durations in seconds, summed over repeated stages."""
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def as_ms(self) -> Dict[str, float]:
+        return {name: round(seconds * 1000, 1) for name, seconds in self.stages.items()}
+
+    def server_timing(self, total: Optional[float] = None) -> str:
+        """Render as a ``Server-Timing`` header value."""
+        parts = [f"{name};dur={ms}" for name, ms in self.as_ms().items()]
+        if total is not None:
+            parts.append(f"total;dur={round(total * 1000, 1)}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[StageTimings]] = ContextVar("stage_timings", default=None)
+
+
+def start_request() -> Tuple[Token, StageTimings]:
+    """Begin collecting stages for the current request."""
+    timings = StageTimings()
+    return _current.set(timings), timings
+
+
+def end_request(token: Token) -> None:
+    _current.reset(token)
+
+
+def current_timings() -> Optional[StageTimings]:
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block into the stage histogram and the request's timings."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.labels(stage=name).observe(elapsed)
+        timings = _current.get()
+        if timings is not None:
+            timings.add(name, elapsed)
+
+
+def timed(name: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Decorator form of :func:`stage` for coroutine functions."""
+
+    def decorator(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            with stage(name):
+                return await fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
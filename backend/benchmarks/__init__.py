@@ -0,0 +1,6 @@
+"""End-to-end latency benchmarks against local stand-ins for DugganUSA and Gemini.
+
+Run from ``backend/`` with the docker-compose database up::
+
+    python -m benchmarks.run --concurrency 1,8,32 --requests 200
+"""
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+import orjson
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
+
+DOC_TYPES = ["email", "flight_record", "court_filing", "deposition", "photo"]
+PEOPLE = ["jeffrey_epstein", "ghislaine_maxwell", "jean_luc_brunel", "sarah_kellen"]
+LOCATIONS = ["new_york", "palm_beach", "little_st_james", "paris", "new_mexico"]
+WORDS = (
+    "flight log passenger aircraft island deposition testimony schedule payment "
+    "contact address visit meeting message statement record account"
+).split()
+
+
+@dataclass
+class FakeConfig:
+    """Latency (milliseconds) and payload sizes for the stand-in services."""
+
+    duggan_latency_ms: float = 150.0
+    duggan_jitter_ms: float = 50.0
+    duggan_hits: int = 60
+    corpus_size: int = 500
+    content_chars: int = 4000
+    embed_latency_ms: float = 80.0
+    embed_dims: int = 3072
+    answer_latency_ms: float = 1500.0
+    ttft_ms: float = 400.0
+    answer_chars: int = 1200
+    stream_chunks: int = 20
+
+
+async def _sleep_ms(ms: float, jitter_ms: float = 0.0) -> None:
+    await asyncio.sleep(max(ms + random.uniform(-jitter_ms, jitter_ms), 0.0) / 1000)
+
+
+def _text(seed: int, chars: int) -> str:
+    rng = random.Random(seed)
+    words: List[str] = []
+    size = 0
+    while size < chars:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:chars]
+
+
+def make_hit(n: int, content_chars: int) -> Dict[str, Any]:
+    content = _text(n, content_chars)
+    return {
+        "id": f"bench-EFTA{n:08d}",
+        "efta_id": f"EFTA{n:08d}",
+        "content": content,
+        "content_preview": content[:300],
+        "doc_type": DOC_TYPES[n % len(DOC_TYPES)],
+        "people": [PEOPLE[n % len(PEOPLE)]],
+        "locations": [LOCATIONS[n % len(LOCATIONS)]],
+        "aircraft": [],
+        "evidence_types": ["correspondence"],
+        "pages": 1 + n % 12,
+        "source": "benchmark",
+        "dataset": "bench",
+        "file_path": f"/bench/EFTA{n:08d}.pdf",
+    }
+
+
+def create_duggan_app(config: FakeConfig) -> FastAPI:
+    """DugganUSA ``/search`` stand-in returning deterministic hits per query."""
+    app = FastAPI()
+
+    @app.get("/search")
+    async def search(q: str, limit: int = 100) -> Response:
+        await _sleep_ms(config.duggan_latency_ms, config.duggan_jitter_ms)
+        seed = int(hashlib.md5(q.encode()).hexdigest()[:8], 16)
+        count = min(limit, config.duggan_hits)
+        hits = [
+            make_hit((seed + i * 7) % config.corpus_size, config.content_chars)
+            for i in range(count)
+        ]
+        body = {"success": True, "data": {"hits": hits}}
+        return Response(orjson.dumps(body), media_type="application/json")
+
+    return app
+
+
+def create_gemini_app(config: FakeConfig) -> FastAPI:
+    """Gemini REST stand-in for the calls google-genai makes.
+
+    Serves ``:batchEmbedContents``, ``:generateContent`` and
+    ``:streamGenerateContent?alt=sse`` under ``/v1beta/models/``.
+    """
+    app = FastAPI()
+    vector = [round(1 / config.embed_dims**0.5, 6)] * config.embed_dims
+    answer = ("Per the flight logs [1], the passengers listed [2] travelled together. " * 50)[
+        : config.answer_chars
+    ]
+    usage = {"promptTokenCount": 800, "candidatesTokenCount": 300, "totalTokenCount": 1100}
+
+    def _candidate(text: str) -> Dict[str, Any]:
+        return {"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}
+
+    @app.post("/v1beta/models/{model_action}")
+    async def models(model_action: str, request: Request) -> Response:
+        _, _, action = model_action.partition(":")
+        body = await request.json()
+
+        if action == "batchEmbedContents":
+            await _sleep_ms(config.embed_latency_ms)
+            data = {"embeddings": [{"values": vector} for _ in body.get("requests", [])]}
+            return Response(orjson.dumps(data), media_type="application/json")
+
+        if action == "generateContent":
+            await _sleep_ms(config.answer_latency_ms)
+            data = {"candidates": [_candidate(answer)], "usageMetadata": usage}
+            return Response(orjson.dumps(data), media_type="application/json")
+
+        if action == "streamGenerateContent":
+            return StreamingResponse(_stream(), media_type="text/event-stream")
+
+        return Response(status_code=404)
+
+    async def _stream():
+        await _sleep_ms(config.ttft_ms)
+        size = max(len(answer) // max(config.stream_chunks, 1), 1)
+        pieces = [answer[i : i + size] for i in range(0, len(answer), size)]
+        gap = max(config.answer_latency_ms - config.ttft_ms, 0) / max(len(pieces), 1)
+        for i, piece in enumerate(pieces):
+            if i:
+                await _sleep_ms(gap)
+            chunk: Dict[str, Any] = {"candidates": [_candidate(piece)]}
+            if i == len(pieces) - 1:
+                chunk["usageMetadata"] = usage
+            yield b"data: " + orjson.dumps(chunk) + b"\r\n\r\n"
+
+    return app
@@ -0,0 +1,377 @@
+"""Boot the app against the docker-compose database and measure it under load.
+
+DugganUSA and Gemini are replaced by local stand-ins (see ``fakes.py``)
+with configurable latency and payload sizes. Each scenario runs at every
+requested concurrency level; results are printed, written to
+``benchmarks/results/<timestamp>.json`` and optionally compared with an
+earlier run::
+
+    python -m benchmarks.run --scenarios search,stream --concurrency 1,16
+    python -m benchmarks.run --baseline benchmarks/results/baseline.json --max-regression 15
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import orjson
+import uvicorn
+
+from benchmarks.fakes import FakeConfig, create_duggan_app, create_gemini_app
+from benchmarks.stats import ScenarioRun, compare, format_table
+
+RESULTS_DIR = Path(__file__).parent / "results"
+SCENARIOS = ("search", "search_hot", "stream", "document", "history")
+HOT_QUERIES = [
+    "flight logs little st james",
+    "ghislaine maxwell deposition",
+    "palm beach police report",
+    "passenger manifest 2002",
+    "payments to recruiters",
+]
+REPORT_COLUMNS = [
+    "scenario", "concurrency", "requests", "errors", "p50_ms", "p95_ms", "p99_ms",
+    "throughput_rps", "ttfb_p50_ms", "ttfb_p95_ms", "db_queries_per_request",
+]
+REPORT = sys.__stdout__
+
+RequestFn = Callable[[httpx.AsyncClient, int], Awaitable[Optional[float]]]
+
+
+class BenchError(Exception):
+    pass
+
+
+class QueryCounter:
+    """SQLAlchemy ``before_cursor_execute`` listener counting statements."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, *args: Any) -> None:
+        with self._lock:
+            self.count += 1
+
+
+class ServerThread:
+    """Run an ASGI app with uvicorn on its own thread and event loop."""
+
+    def __init__(self, app: Any, port: int) -> None:
+        config = uvicorn.Config(
+            app, host="127.0.0.1", port=port, log_level="warning", access_log=False
+        )
+        self.url = f"http://127.0.0.1:{port}"
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def start(self, timeout: float = 60.0) -> None:
+        self.thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if not self.thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError(f"server at {self.url} failed to start")
+            time.sleep(0.05)
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _configure_environment(args: argparse.Namespace, duggan_url: str, gemini_url: str) -> None:
+    """Point the app at the stand-ins; must run before ``app`` is imported."""
+    os.environ.update(
+        {
+            "DUGGAN_API_BASE_URL": duggan_url,
+            "GEMINI_API_BASE_URL": gemini_url,
+            "GEMINI_API_KEY": os.environ.get("GEMINI_API_KEY") or "benchmark",
+            # background jobs would add queries that no request made
+            "CACHE_WARM_INTERVAL_SECONDS": "0",
+            "QUERY_CACHE_SWEEP_INTERVAL_SECONDS": "0",
+            # a fresh benchmark database gets its schema on first boot
+            "DB_MIGRATE_ON_STARTUP": "true",
+            "DEBUG": "false",
+        }
+    )
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+
+
+# ── setup ────────────────────────────────────────────────────────────────
+
+
+async def _prepare_database(clear_cache: bool) -> Dict[str, Any]:
+    """Create the benchmark user and optionally clear both caches."""
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    from app.config import settings
+    from app.core.auth_service import AuthService
+    from app.infrastructure.repositories.user_repo import UserRepository
+
+    # The app's engine pool belongs to the server thread's event loop
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    try:
+        async with AsyncSession(engine) as session:
+            users = UserRepository(session)
+            user = await users.find_by_google_id("benchmark")
+            if user is None:
+                user = await users.create("benchmark", "benchmark@example.invalid", "Benchmark", None)
+            if clear_cache:
+                await session.execute(text("DELETE FROM query_cache"))
+                await session.execute(text("DELETE FROM answer_cache"))
+                await session.commit()
+            result = await session.execute(
+                text("SELECT id FROM documents WHERE id LIKE 'bench-%' ORDER BY id LIMIT 500")
+            )
+            doc_ids = [r[0] for r in result.fetchall()]
+    finally:
+        await engine.dispose()
+    return {"token": AuthService._create_token(user), "doc_ids": doc_ids}
+
+
+# ── request drivers ──────────────────────────────────────────────────────
+
+
+def _check(resp: httpx.Response) -> None:
+    if resp.status_code >= 400:
+        raise BenchError(f"{resp.request.url.path}: HTTP {resp.status_code}")
+
+
+def _drivers(run_id: str, state: Dict[str, Any]) -> Dict[str, RequestFn]:
+    async def search(client: httpx.AsyncClient, i: int) -> Optional[float]:
+        resp = await client.post(
+            "/api/search", json={"query": f"flight log {run_id} {i}", "limit": 20}
+        )
+        _check(resp)
+        return None
+
+    async def search_hot(client: httpx.AsyncClient, i: int) -> Optional[float]:
+        resp = await client.post(
+            "/api/search", json={"query": HOT_QUERIES[i % len(HOT_QUERIES)], "limit": 20}
+        )
+        _check(resp)
+        return None
+
+    async def stream(client: httpx.AsyncClient, i: int) -> Optional[float]:
+        first: Optional[float] = None
+        body = b""
+        params = {"q": f"passenger manifest {run_id} {i}", "limit": 20}
+        async with client.stream("GET", "/api/search/stream", params=params) as resp:
+            _check(resp)
+            async for chunk in resp.aiter_bytes():
+                if first is None:
+                    first = time.perf_counter()
+                body += chunk
+        if b'"type":"error"' in body:
+            raise BenchError("stream reported an error event")
+        return first
+
+    async def document(client: httpx.AsyncClient, i: int) -> Optional[float]:
+        doc_ids = state["doc_ids"]
+        if not doc_ids:
+            raise BenchError("no benchmark documents stored")
+        resp = await client.get(f"/api/documents/{doc_ids[i % len(doc_ids)]}")
+        _check(resp)
+        return None
+
+    async def history(client: httpx.AsyncClient, i: int) -> Optional[float]:
+        resp = await client.get("/api/history/", params={"limit": 50})
+        _check(resp)
+        return None
+
+    return {
+        "search": search,
+        "search_hot": search_hot,
+        "stream": stream,
+        "document": document,
+        "history": history,
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    name: str,
+    request: RequestFn,
+    concurrency: int,
+    total: int,
+    counter: QueryCounter,
+) -> ScenarioRun:
+    run = ScenarioRun(scenario=name, concurrency=concurrency)
+    indexes = iter(range(total))
+
+    async def worker() -> None:
+        for i in indexes:
+            started = time.perf_counter()
+            try:
+                first_byte = await request(client, i)
+            except (httpx.HTTPError, BenchError) as exc:
+                run.errors += 1
+                if run.errors == 1:
+                    print(f"  {name}: {exc}", file=REPORT)
+                continue
+            run.latencies.append(time.perf_counter() - started)
+            if first_byte is not None:
+                run.ttfb.append(first_byte - started)
+
+    queries_before = counter.count
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    run.wall_seconds = time.perf_counter() - started
+    run.db_queries = counter.count - queries_before
+    return run
+
+
+async def benchmark(args: argparse.Namespace, app_url: str, counter: QueryCounter) -> List[Dict[str, Any]]:
+    run_id = uuid.uuid4().hex[:8]
+    state = await _prepare_database(clear_cache=not args.keep_cache)
+    headers = {"Authorization": f"Bearer {state['token']}"}
+    limits = httpx.Limits(max_connections=max(args.concurrency) * 2)
+    async with httpx.AsyncClient(
+        base_url=app_url, headers=headers, timeout=args.timeout, limits=limits
+    ) as client:
+        drivers = _drivers(run_id, state)
+        if not state["doc_ids"] and "document" in args.scenarios:
+            # searches store the stand-in's hits, which the document scenario reads
+            for i in range(5):
+                await drivers["search"](client, -1 - i)
+            state.update(await _prepare_database(clear_cache=not args.keep_cache))
+        if "search_hot" in args.scenarios:
+            for i in range(len(HOT_QUERIES)):
+                await drivers["search_hot"](client, i)
+
+        results = []
+        for name in args.scenarios:
+            for concurrency in args.concurrency:
+                if args.warmup:
+                    await run_scenario(client, name, drivers[name], concurrency, args.warmup, counter)
+                run = await run_scenario(
+                    client, name, drivers[name], concurrency, args.requests, counter
+                )
+                summary = run.summary()
+                results.append(summary)
+                print(
+                    f"  {name:<10} c={concurrency:<3} p95={summary['p95_ms']}ms "
+                    f"rps={summary['throughput_rps']}",
+                    file=REPORT,
+                )
+    return results
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=200, help="per scenario and level")
+    parser.add_argument("--warmup", type=int, default=10, help="untimed requests per level")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--database-url", default=None, help="defaults to DATABASE_URL")
+    parser.add_argument("--keep-cache", action="store_true", help="do not clear caches first")
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--baseline", type=Path, default=None)
+    parser.add_argument(
+        "--max-regression", type=float, default=None,
+        help="exit 1 if any p95 grows by more than this percent over --baseline",
+    )
+    parser.add_argument("--app-log", type=Path, default=RESULTS_DIR / "app.log")
+    defaults = FakeConfig()
+    for name, value in vars(defaults).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args(argv)
+    args.scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    fake_config = FakeConfig(**{k: getattr(args, k) for k in vars(FakeConfig())})
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+
+    duggan = ServerThread(create_duggan_app(fake_config), _free_port())
+    gemini = ServerThread(create_gemini_app(fake_config), _free_port())
+    _configure_environment(args, duggan.url, gemini.url)
+
+    from sqlalchemy import event
+
+    from app.infrastructure.database import engine
+    from app.main import app
+
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+
+    # keep the app's per-request logs out of the report
+    args.app_log.parent.mkdir(parents=True, exist_ok=True)
+    sys.stdout = open(args.app_log, "w")
+    api = ServerThread(app, _free_port())
+    servers = [duggan, gemini, api]
+    try:
+        for server in servers:
+            server.start()
+        print(f"benchmarking {api.url} (app log: {args.app_log})", file=REPORT)
+        results = asyncio.run(benchmark(args, api.url, counter))
+    finally:
+        for server in reversed(servers):
+            server.stop()
+        sys.stdout.close()
+        sys.stdout = REPORT
+
+    record = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "settings": {k: v for k, v in vars(args).items() if k not in {"output", "baseline", "app_log"}},
+        "results": results,
+    }
+    output = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.write_bytes(orjson.dumps(record, option=orjson.OPT_INDENT_2, default=str))
+
+    print("\n" + format_table(results, REPORT_COLUMNS), file=REPORT)
+    print(f"\nresults written to {output}", file=REPORT)
+
+    if args.baseline:
+        baseline = orjson.loads(args.baseline.read_bytes())["results"]
+        changes = compare(baseline, results)
+        print("\n" + format_table(
+            changes, ["scenario", "concurrency", "p95_change_pct", "throughput_change_pct"]
+        ), file=REPORT)
+        if args.max_regression is not None and any(
+            (c["p95_change_pct"] or 0) > args.max_regression for c in changes
+        ):
+            print(f"\np95 regressed by more than {args.max_regression}%", file=REPORT)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (``q`` in 0..1) of ``samples``."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+@dataclass
+class ScenarioRun:
+    """Raw measurements for one scenario at one concurrency level."""
+
+    scenario: str
+    concurrency: int
+    latencies: List[float] = field(default_factory=list)
+    ttfb: List[float] = field(default_factory=list)
+    errors: int = 0
+    wall_seconds: float = 0.0
+    db_queries: int = 0
+
+    def summary(self) -> Dict[str, Any]:
+        completed = len(self.latencies)
+        requests = completed + self.errors
+        return {
+            "scenario": self.scenario,
+            "concurrency": self.concurrency,
+            "requests": requests,
+            "errors": self.errors,
+            "p50_ms": _ms(percentile(self.latencies, 0.50)),
+            "p95_ms": _ms(percentile(self.latencies, 0.95)),
+            "p99_ms": _ms(percentile(self.latencies, 0.99)),
+            "mean_ms": _ms(sum(self.latencies) / completed) if completed else None,
+            "throughput_rps": round(completed / self.wall_seconds, 2) if self.wall_seconds else 0.0,
+            "ttfb_p50_ms": _ms(percentile(self.ttfb, 0.50)),
+            "ttfb_p95_ms": _ms(percentile(self.ttfb, 0.95)),
+            "db_queries_per_request": round(self.db_queries / requests, 2) if requests else 0.0,
+        }
+
+
+def compare(
+    baseline: List[Dict[str, Any]], current: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Percent change of p95 latency and throughput per (scenario, concurrency).
+
+    Positive ``p95_change_pct`` and negative ``throughput_change_pct`` are
+    regressions.
+    """
+    previous: Dict[Tuple[str, int], Dict[str, Any]] = {
+        (r["scenario"], r["concurrency"]): r for r in baseline
+    }
+    rows = []
+    for r in current:
+        before = previous.get((r["scenario"], r["concurrency"]))
+        if not before:
+            continue
+        rows.append(
+            {
+                "scenario": r["scenario"],
+                "concurrency": r["concurrency"],
+                "p95_change_pct": _change(before["p95_ms"], r["p95_ms"]),
+                "throughput_change_pct": _change(before["throughput_rps"], r["throughput_rps"]),
+            }
+        )
+    return rows
+
+
+def _change(before: Optional[float], after: Optional[float]) -> Optional[float]:
+    if not before or after is None:
+        return None
+    return round((after - before) * 100 / before, 1)
+
+
+def format_table(rows: List[Dict[str, Any]], columns: List[str]) -> str:
+    cells = [[str(r.get(c, "")) if r.get(c) is not None else "-" for c in columns] for r in rows]
+    widths = [max([len(c)] + [len(row[i]) for row in cells]) for i, c in enumerate(columns)]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(columns, widths))]
+    lines += ["  ".join(v.ljust(w) for v, w in zip(row, widths)) for row in cells]
+    return "\n".join(lines)
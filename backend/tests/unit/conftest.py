@@ -0,0 +1,24 @@
+"""Fakes shared by the unit tests."""
+
+
+class FakeUnitOfWork:
+    """Stand-in for ``UnitOfWork`` holding whichever fake repositories a test needs.
+
+    Used as its own context manager, so one instance can be handed out by a
+    ``lambda: uow`` factory and inspected afterwards.
+    """
+
+    def __init__(self, documents=None, cache=None, chunks=None):
+        self.documents = documents
+        self.cache = cache
+        self.chunks = chunks
+        self.releases = 0
+
+    async def release(self):
+        self.releases += 1
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
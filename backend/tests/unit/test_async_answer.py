@@ -0,0 +1,156 @@
+"""Unit tests for deferred answer generation and the answer store."""
+import asyncio
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.config import settings
+from app.core.answer_store import AnswerStore
+from app.core.search_service import SearchService
+from app.domain.entities import AnswerResult, Document, SearchQuery
+from app.infrastructure.external import gemini_client
+from app.utils.exceptions import ExternalServiceError
+from tests.unit.conftest import FakeUnitOfWork
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class LocalRepo:
+    async def count(self):
+        return 0
+
+    async def keyword_search(self, query, limit=20, filters=None):
+        return [Document(id="d1", efta_id="EFTA1", content="Flight log.")]
+
+    async def metadata_search(self, terms, limit=20, filters=None):
+        return []
+
+
+class SlowCache:
+    """Answer lookups block until released, standing in for slow generation."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.stored = None
+
+    async def get(self, query, filters=None):
+        return None
+
+    async def get_answer(self, query, document_ids):
+        await self.release.wait()
+        return "Answer."
+
+    async def set(self, query, filters, response, limit=None):
+        self.stored = response
+
+
+class UncachedAnswers(SlowCache):
+    async def get_answer(self, query, document_ids):
+        return None
+
+    async def set_answer(self, query, document_ids, answer):
+        pass
+
+
+class SlowModels:
+    """Gemini models whose generation takes until ``release`` is set.
+
+    The synchronous variant blocks the thread, as the real SDK does.
+    """
+
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    def generate_content(self, model, contents, config):
+        time.sleep(1)
+        return SimpleNamespace(text="Blocking.", usage_metadata=None)
+
+    async def agenerate_content(self, model, contents, config):
+        await self.release.wait()
+        return SimpleNamespace(text="Generated.", usage_metadata=None)
+
+
+async def _no_embedding(text):
+    raise ExternalServiceError("Gemini Embedding", "unavailable")
+
+
+def test_store_evicts_oldest_and_expires():
+    clock = FakeClock()
+    store = AnswerStore(max_entries=2, ttl=10, clock=clock)
+    a, b, c = uuid4(), uuid4(), uuid4()
+    for query_id in (a, b, c):
+        store.create(query_id)
+
+    assert store.get(a) is None
+    assert store.get(b).status == "pending"
+    clock.now = 10
+    assert store.get(c) is None
+    assert len(store) == 1  # b expired too, but is dropped lazily
+
+
+async def test_wait_returns_once_finished_or_pending_after_timeout():
+    store = AnswerStore(max_entries=10, ttl=60)
+    query_id = uuid4()
+    store.create(query_id)
+
+    assert (await store.wait(query_id, 0.01)).status == "pending"
+    waiter = asyncio.create_task(store.wait(query_id, 5))
+    await asyncio.sleep(0)
+    store.finish(AnswerResult(query_id=query_id, status="complete"))
+    assert (await waiter).status == "complete"
+
+    store.fail(query_id)  # a finished answer stays finished
+    assert store.get(query_id).status == "complete"
+    assert await store.wait(uuid4(), 1) is None
+
+
+async def test_deferred_search_returns_documents_then_publishes_answer(monkeypatch):
+    monkeypatch.setattr(gemini_client, "embed_text", _no_embedding)
+    monkeypatch.setattr(settings, "SEARCH_MODE", "local")
+    cache = SlowCache()
+    service = SearchService(lambda: FakeUnitOfWork(LocalRepo(), cache))
+
+    result = await service.search(SearchQuery(text="flight logs"), defer_answer=True)
+
+    assert [d.id for d in result.documents] == ["d1"]
+    assert result.answer_pending and result.ai_answer.text == ""
+    assert service.answers.get(result.query_id).status == "pending"
+    assert cache.stored is None
+
+    cache.release.set()
+    answer = await service.answers.wait(result.query_id, 1)
+    assert answer.status == "complete"
+    assert answer.ai_answer.text == "Answer."
+    await asyncio.gather(*service._answer_tasks)
+    # the completed result is what gets cached
+    assert cache.stored["ai_answer"]["text"] == "Answer."
+    assert cache.stored["answer_pending"] is False
+    await service.close()
+
+
+async def test_slow_generation_does_not_delay_other_requests(monkeypatch):
+    monkeypatch.setattr(gemini_client, "embed_text", _no_embedding)
+    monkeypatch.setattr(settings, "SEARCH_MODE", "local")
+    models = SlowModels()
+    aio_models = SimpleNamespace(generate_content=models.agenerate_content)
+    client = SimpleNamespace(models=models, aio=SimpleNamespace(models=aio_models))
+    monkeypatch.setattr(gemini_client, "_get_client", lambda: client)
+    service = SearchService(lambda: FakeUnitOfWork(LocalRepo(), UncachedAnswers()))
+
+    result = await service.search(SearchQuery(text="flight logs"), defer_answer=True)
+    started = time.monotonic()
+    other = await asyncio.wait_for(service.search(SearchQuery(text="boat logs"), defer_answer=True), 0.5)
+    assert (await service.answers.wait(result.query_id, 0.01)).status == "pending"
+    assert time.monotonic() - started < 0.5
+    assert other.answer_pending
+
+    models.release.set()
+    answer = await service.answers.wait(result.query_id, 1)
+    assert answer.status == "complete" and answer.ai_answer.text == "Generated."
+    await service.close()
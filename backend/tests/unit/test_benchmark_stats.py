@@ -0,0 +1,33 @@
+"""Unit tests for benchmark summaries and regression comparison."""
+from benchmarks.stats import ScenarioRun, compare, percentile
+
+
+def test_percentile_nearest_rank():
+    samples = [i / 100 for i in range(1, 101)]
+    assert percentile(samples, 0.5) == 0.5
+    assert percentile(samples, 0.99) == 0.99
+    assert percentile([], 0.5) is None
+
+
+def test_summary_reports_rates_and_queries():
+    run = ScenarioRun(
+        scenario="search", concurrency=4, latencies=[0.1, 0.2, 0.3],
+        ttfb=[0.05], errors=1, wall_seconds=1.5, db_queries=12,
+    )
+    summary = run.summary()
+    assert summary["requests"] == 4
+    assert summary["p50_ms"] == 200.0
+    assert summary["throughput_rps"] == 2.0
+    assert summary["ttfb_p50_ms"] == 50.0
+    assert summary["db_queries_per_request"] == 3.0
+
+
+def test_compare_matches_scenario_and_concurrency():
+    baseline = [{"scenario": "search", "concurrency": 8, "p95_ms": 100.0, "throughput_rps": 50.0}]
+    current = [
+        {"scenario": "search", "concurrency": 8, "p95_ms": 120.0, "throughput_rps": 40.0},
+        {"scenario": "stream", "concurrency": 8, "p95_ms": 90.0, "throughput_rps": 10.0},
+    ]
+    assert compare(baseline, current) == [
+        {"scenario": "search", "concurrency": 8, "p95_change_pct": 20.0, "throughput_change_pct": -20.0}
+    ]
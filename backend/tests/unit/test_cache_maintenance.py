@@ -0,0 +1,53 @@
+"""Unit tests for the query cache maintenance sweep."""
+from contextlib import asynccontextmanager
+
+from app.core.cache_maintenance import CacheMaintenance
+from app.infrastructure.repositories.cache_repo import CacheRepository
+
+
+@asynccontextmanager
+async def _fake_session():
+    yield None
+
+
+def _patch_repo(monkeypatch, expired=3, evicted=7, rows=100, size=8192):
+    async def cleanup_expired(self, batch_size=None):
+        return expired
+
+    async def cleanup_expired_answers(self):
+        return 0
+
+    async def evict_to_size(self, max_rows, batch_size=None):
+        return evicted
+
+    async def count(self):
+        return rows
+
+    async def table_size(self):
+        return size
+
+    monkeypatch.setattr(CacheRepository, "cleanup_expired", cleanup_expired)
+    monkeypatch.setattr(CacheRepository, "cleanup_expired_answers", cleanup_expired_answers)
+    monkeypatch.setattr(CacheRepository, "evict_to_size", evict_to_size)
+    monkeypatch.setattr(CacheRepository, "count", count)
+    monkeypatch.setattr(CacheRepository, "table_size", table_size)
+
+
+async def test_sweep_reports_stats(monkeypatch):
+    _patch_repo(monkeypatch)
+    maintenance = CacheMaintenance(_fake_session, interval=60, batch_size=10, max_rows=50)
+    stats = await maintenance.sweep()
+    assert stats.expired_deleted == 3
+    assert stats.evicted == 7
+    assert stats.row_count == 100
+    assert stats.table_bytes == 8192
+    # first sweep measures the rate over one interval
+    assert stats.evictions_per_minute == 7.0
+    assert maintenance.last_stats is stats
+
+
+async def test_sweep_without_evictions(monkeypatch):
+    _patch_repo(monkeypatch, evicted=0)
+    maintenance = CacheMaintenance(_fake_session, interval=60)
+    stats = await maintenance.sweep()
+    assert stats.evictions_per_minute == 0.0
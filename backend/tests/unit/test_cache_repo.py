@@ -1,5 +1,5 @@
-"""Unit tests for cache repository hash function."""
-from app.infrastructure.repositories.cache_repo import CacheRepository
+"""Unit tests for cache repository hashing, encoding and refresh claims."""
+from app.infrastructure.repositories.cache_repo import PLACEHOLDER_EXPIRES, CacheRepository
 
 
 def test_hash_deterministic():
@@ -26,3 +26,136 @@ def test_hash_with_filters():
     h3 = CacheRepository._hash_query("test")
     assert h1 == h2
     assert h1 != h3
+
+
+def test_answer_hash_normalizes_query():
+    ids = ["d1", "d2"]
+    h1 = CacheRepository._hash_answer("Who flew to the island?", ids, "m")
+    h2 = CacheRepository._hash_answer("  who flew to the  ISLAND ", ids, "m")
+    assert h1 == h2
+
+
+def test_answer_hash_depends_on_evidence_and_model():
+    h = CacheRepository._hash_answer("q", ["d1", "d2"], "m")
+    assert h != CacheRepository._hash_answer("q", ["d2", "d1"], "m")
+    assert h != CacheRepository._hash_answer("q", ["d1", "d2"], "m2")
+
+
+def _sample_response():
+    from app.domain.entities import AIAnswer, Document, SearchResult
+
+    result = SearchResult(
+        query="flight log",
+        ai_answer=AIAnswer(text="Answer [1] — café"),
+        documents=[Document(id="d1", efta_id="EFTA1", content="full text", people=["maxwell"])],
+        total_results=1,
+        search_time_ms=812,
+    )
+    return result.model_dump(mode="json", exclude={"documents": {"__all__": {"content"}}})
+
+
+def test_compact_roundtrip():
+    response = _sample_response()
+    decoded = CacheRepository._decode_response(CacheRepository._encode_response(response))
+    assert decoded["query"] == "flight log"
+    assert decoded["documents"][0]["people"] == ["maxwell"]
+    assert "search_time_ms" not in decoded
+    assert "cached" not in decoded
+    assert "stale" not in decoded
+
+
+def _expected_body(response, **tail):
+    from fastapi.responses import ORJSONResponse
+
+    from app.api.schemas.search_schemas import SearchResponse
+
+    expected = SearchResponse(**{**response, **tail})
+    return ORJSONResponse(expected.model_dump(mode="json")).body
+
+
+def test_json_body_matches_response():
+    response = _sample_response()
+    blob = CacheRepository._encode_response(response)
+    body = CacheRepository.json_body(blob, search_time_ms=3, cached=True, stale=False)
+    assert body == _expected_body(response, search_time_ms=3, cached=True)
+
+
+def test_gzip_body_matches_response():
+    import gzip
+
+    response = _sample_response()
+    blob = CacheRepository._encode_response(response)
+    body = gzip.decompress(
+        CacheRepository.gzip_body(blob, search_time_ms=3, cached=True, stale=True)
+    )
+    assert body == _expected_body(response, search_time_ms=3, cached=True, stale=True)
+
+
+class ClaimSession:
+    def __init__(self, claimed):
+        self.claimed = claimed
+        self.calls = []
+
+    async def execute(self, statement, params=None):
+        self.calls.append((str(statement), params))
+        claimed = self.claimed
+
+        class Result:
+            def fetchone(self):
+                return (1,) if claimed else None
+
+        return Result()
+
+    async def commit(self):
+        pass
+
+
+async def test_claim_refresh_creates_a_placeholder_for_missing_entries():
+    session = ClaimSession(claimed=True)
+    assert await CacheRepository(session).claim_refresh("flight log", {"doc_types": ["email"]})
+    sql, params = session.calls[0]
+    # an upsert, so a query that was never cached can still be claimed
+    assert "INSERT INTO query_cache" in sql and "ON CONFLICT (query_hash) DO UPDATE" in sql
+    assert params["placeholder_expires"] == PLACEHOLDER_EXPIRES
+    assert params["qt"] == "flight log"
+    assert not await CacheRepository(ClaimSession(claimed=False)).claim_refresh("flight log")
+
+
+async def test_set_records_the_limit_the_entry_was_computed_for():
+    session = ClaimSession(claimed=True)
+    await CacheRepository(session).set("flight log", None, {"total_results": 3}, limit=50)
+    sql, params = session.calls[0]
+    assert "result_limit = EXCLUDED.result_limit" in sql
+    assert params["lim"] == 50
+
+
+class EvictSession:
+    """Counts ``rows`` entries; each delete removes as many as it asks for."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    async def execute(self, statement, params=None):
+        self.calls.append((str(statement), params))
+        session = self
+
+        class Result:
+            rowcount = params["n"] if params else 0
+
+            def scalar(self):
+                return session.rows
+
+        return Result()
+
+    async def commit(self):
+        pass
+
+
+async def test_eviction_spares_entries_under_a_refresh_claim():
+    session = EvictSession(rows=12)
+    assert await CacheRepository(session).evict_to_size(10, batch_size=5) == 2
+    sql, params = session.calls[1]
+    # a claimed placeholder holds the lease of a refresh that is still running
+    assert "refresh_claimed_until IS NULL OR refresh_claimed_until < :now" in sql
+    assert params["n"] == 2 and "now" in params
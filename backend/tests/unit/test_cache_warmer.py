@@ -0,0 +1,123 @@
+"""Unit tests for the refresh-ahead cache warmer."""
+import asyncio
+from contextlib import asynccontextmanager
+
+from app.config import settings
+from app.core.cache_warmer import CacheWarmer
+from app.core.search_service import SearchService
+from app.infrastructure.external.resilience import Priority
+from tests.unit.conftest import FakeUnitOfWork
+
+
+class EmptyResult:
+    def fetchone(self):
+        return None
+
+
+class EmptySession:
+    """A query_cache with no rows at all."""
+
+    async def execute(self, statement, params=None):
+        return EmptyResult()
+
+
+@asynccontextmanager
+async def _fake_session():
+    yield EmptySession()
+
+
+class LeaseCache:
+    """Claims like ``claim_refresh``: refused only while another lease is live.
+
+    A query with no entry is claimable, as the real claim inserts a placeholder.
+    """
+
+    def __init__(self, held=()):
+        self.leases = set(held)
+
+    async def claim_refresh(self, query, filters=None):
+        if query in self.leases:
+            return False
+        self.leases.add(query)
+        return True
+
+
+def _warmer(cache=None, **kwargs):
+    uow = FakeUnitOfWork(cache=cache or LeaseCache())
+    return CacheWarmer(_fake_session, SearchService(lambda: uow), **kwargs)
+
+
+def _patch_search(monkeypatch, calls, delay=0.0):
+    state = {"active": 0, "peak": 0}
+
+    async def search(self, query, check_cache=True, priority=Priority.ANONYMOUS):
+        assert check_cache is False
+        assert priority == Priority.BACKGROUND
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(delay)
+        calls.append(query)
+        state["active"] -= 1
+
+    monkeypatch.setattr(SearchService, "search", search)
+    return state
+
+
+async def test_refresh_respects_llm_budget(monkeypatch):
+    calls = []
+    _patch_search(monkeypatch, calls)
+    warmer = _warmer(max_llm_calls_per_hour=2, seed_queries=[])
+    done = await warmer._refresh_all([("a", None, None), ("b", None, None), ("c", None, None)])
+    assert done == 2
+    assert len(calls) == 2
+
+
+async def test_refresh_concurrency_cap(monkeypatch):
+    calls = []
+    state = _patch_search(monkeypatch, calls, delay=0.01)
+    warmer = _warmer(concurrency=2, max_llm_calls_per_hour=50, seed_queries=[])
+    await warmer._refresh_all([(f"q{i}", None, None) for i in range(6)])
+    assert len(calls) == 6
+    assert state["peak"] == 2
+
+
+async def test_refresh_passes_filters(monkeypatch):
+    calls = []
+    _patch_search(monkeypatch, calls)
+    warmer = _warmer(seed_queries=[])
+    assert await warmer.refresh("flight log", {"doc_types": ["flight_record"]})
+    assert calls[0].filters.doc_types == ["flight_record"]
+
+
+async def test_refresh_recomputes_the_cached_limit(monkeypatch):
+    calls = []
+    _patch_search(monkeypatch, calls)
+    warmer = _warmer(seed_queries=[])
+    assert await warmer._refresh_all([("flight log", None, 50), ("palm beach", None, None)]) == 2
+    limits = {q.text: q.limit for q in calls}
+    assert limits == {"flight log": 50, "palm beach": settings.DEFAULT_SEARCH_LIMIT}
+
+
+async def test_seeds_without_a_cache_row_are_warmed(monkeypatch):
+    calls = []
+    _patch_search(monkeypatch, calls)
+    warmer = _warmer(seed_queries=["flight log", "palm beach"])
+    assert await warmer.warm_seeds() == 2
+    assert sorted(q.text for q in calls) == ["flight log", "palm beach"]
+
+
+async def test_refresh_skips_entries_claimed_elsewhere(monkeypatch):
+    calls = []
+    _patch_search(monkeypatch, calls)
+    warmer = _warmer(cache=LeaseCache(held={"flight log"}), seed_queries=[])
+    assert not await warmer.refresh("flight log")
+    assert calls == []
+
+
+async def test_lost_claims_do_not_spend_the_llm_budget(monkeypatch):
+    calls = []
+    _patch_search(monkeypatch, calls)
+    warmer = _warmer(cache=LeaseCache(held={"a", "b"}), max_llm_calls_per_hour=1, seed_queries=[])
+    assert await warmer._refresh_all([("a", None, None), ("b", None, None)]) == 0
+    assert await warmer.refresh("c")
+    assert [q.text for q in calls] == ["c"]
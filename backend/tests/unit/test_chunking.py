@@ -0,0 +1,37 @@
+"""Unit tests for passage splitting and grouping."""
+from app.core.chunking import split_passages
+from app.core.search_service import SearchService
+from app.domain.entities import Passage
+
+
+def test_short_text_single_passage():
+    passages = split_passages("d1", "Flight log entry.", size=100, overlap=20)
+    assert len(passages) == 1
+    assert passages[0].content == "Flight log entry."
+    assert passages[0].chunk_index == 0
+
+
+def test_empty_text_no_passages():
+    assert split_passages("d1", "   \n ", size=100, overlap=20) == []
+
+
+def test_passages_overlap_on_word_boundaries():
+    text = " ".join(f"word{i}" for i in range(200))
+    passages = split_passages("d1", text, size=120, overlap=30)
+    assert len(passages) > 1
+    for prev, cur in zip(passages, passages[1:]):
+        assert cur.start_char < prev.start_char + len(prev.content)
+        assert cur.content.split()[0] in prev.content
+    words = {w for p in passages for w in p.content.split()}
+    assert words == set(text.split())
+
+
+def test_group_passages_orders_by_best_hit():
+    hits = [
+        Passage(document_id="a", chunk_index=0, content="a0", relevance_score=0.5),
+        Passage(document_id="b", chunk_index=3, content="b3", relevance_score=0.9),
+        Passage(document_id="a", chunk_index=2, content="a2", relevance_score=0.7),
+    ]
+    grouped = SearchService._group_passages(hits)
+    assert list(grouped) == ["b", "a"]
+    assert [p.chunk_index for p in grouped["a"]] == [2, 0]
@@ -0,0 +1,42 @@
+"""Unit tests for the token-budgeted context builder."""
+from app.core.context_builder import build_context, estimate_tokens
+from app.domain.entities import Document
+
+
+def _doc(doc_id, content, **kw):
+    return Document(id=doc_id, efta_id=f"EFTA-{doc_id}", content=content, **kw)
+
+
+def test_prefers_query_relevant_sentences():
+    doc = _doc(
+        "d1",
+        "The weather was mild. The aircraft departed Palm Beach for Teterboro. "
+        "Lunch was served at noon.",
+    )
+    ctx = build_context("palm beach aircraft", [doc], token_budget=25)
+    assert "Palm Beach" in ctx.text
+    assert "Lunch" not in ctx.text
+    assert ctx.text.startswith("[1] EFTA: EFTA-d1")
+
+
+def test_respects_token_budget():
+    content = " ".join(f"Sentence number {i} about flights." for i in range(500))
+    docs = [_doc(f"d{i}", content) for i in range(5)]
+    ctx = build_context("flights", docs, token_budget=600)
+    assert ctx.token_estimate <= 600 + 5 * 10
+    assert estimate_tokens(ctx.text) == ctx.token_estimate
+
+
+def test_drops_near_duplicates_across_documents():
+    text = "Maxwell arranged travel to the island for several guests in March."
+    ctx = build_context("maxwell island", [_doc("d1", text), _doc("d2", text)])
+    assert ctx.dropped_duplicates == 1
+    assert ctx.text.count("Maxwell arranged") == 1
+    assert "[2] EFTA: EFTA-d2" in ctx.text
+
+
+def test_uses_passages_when_given():
+    doc = _doc("d1", "unrelated full text", content_preview="preview")
+    ctx = build_context("ledger", [doc], passages={"d1": ["The ledger lists payments."]})
+    assert "ledger lists payments" in ctx.text
+    assert "unrelated" not in ctx.text
@@ -0,0 +1,101 @@
+"""Unit tests for document repository row mapping and query building."""
+from app.domain.entities import SearchFilters
+from app.infrastructure.repositories.chunk_repo import ChunkRepository
+from app.infrastructure.repositories.document_repo import (
+    DETAIL_COLUMNS,
+    LIST_COLUMNS,
+    DocumentRepository,
+    build_tsquery,
+    filter_clause,
+)
+
+
+def test_list_projection_excludes_heavy_columns():
+    assert "embedding" not in LIST_COLUMNS
+    assert " content," not in LIST_COLUMNS
+    assert "embedding" not in DETAIL_COLUMNS
+
+
+def test_row_to_document_list_view():
+    row = {
+        "id": "dataset8-EFTA00037442",
+        "efta_id": "EFTA00037442",
+        "content_preview": "Preview text",
+        "people": None,
+    }
+    doc = DocumentRepository._row_to_document(row)
+    assert doc.content == ""
+    assert doc.content_preview == "Preview text"
+    assert doc.people == []
+
+
+def test_filter_clause_none():
+    assert filter_clause(None) == ("", {})
+    assert filter_clause(SearchFilters()) == ("", {})
+
+
+def test_filter_clause_combines_fields():
+    sql, params = filter_clause(SearchFilters(doc_types=["email"], people=["maxwell"]))
+    assert sql == " AND doc_type = ANY(:f_doc_types) AND people && CAST(:f_people AS text[])"
+    assert params == {"f_doc_types": ["email"], "f_people": ["maxwell"]}
+
+
+def test_build_tsquery_terms_phrases_and_prefixes():
+    assert build_tsquery("flight logs") == "flight & logs"
+    assert build_tsquery('"Ghislaine Maxwell" island', "|") == "(ghislaine <-> maxwell) | island"
+    assert build_tsquery("mass* EFTA00037442") == "mass:* & efta00037442"
+
+
+def test_build_tsquery_keeps_non_ascii_letters():
+    assert build_tsquery('"Jean-Luc Brunel" Müller') == "(jean <-> luc <-> brunel) & müller"
+    assert build_tsquery("São_Paulo Zoë*") == "são & paulo & zoë:*"
+
+
+def test_build_tsquery_drops_operators():
+    assert build_tsquery("a & !b | (c:*") == "a & b & c"
+    assert build_tsquery("?!") == ""
+
+
+class RecordingSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    async def execute(self, statement, params=None):
+        self.calls.append((str(statement), params))
+        rows = self.rows
+
+        class Result:
+            def mappings(self):
+                return self
+
+            def fetchall(self):
+                return rows
+
+        return Result()
+
+
+async def test_vector_search_binds_embedding_once_as_floats():
+    row = {"id": "d1", "efta_id": "EFTA1", "content_preview": "p", "distance": 0.25}
+    session = RecordingSession([row])
+    docs = await DocumentRepository(session).vector_search([0.5, 0.25], limit=5)
+
+    sql, params = session.calls[0]
+    # the binary codec encodes the list; no JSON text or server-side cast
+    assert params["emb"] == [0.5, 0.25]
+    assert sql.count(":emb") == 1 and "CAST" not in sql
+    assert docs[0].relevance_score == 0.75
+
+
+async def test_chunk_search_joins_documents_only_when_filtered():
+    session = RecordingSession([])
+    repo = ChunkRepository(session)
+    await repo.vector_search([0.5], limit=8)
+    await repo.vector_search([0.5], limit=8, filters=SearchFilters(doc_types=["email"]))
+
+    (plain, _), (filtered, params) = session.calls
+    assert "JOIN documents" not in plain
+    assert "JOIN documents ON documents.id = c.document_id" in filtered
+    # the filter narrows the candidates before LIMIT, not after
+    assert filtered.index("doc_type = ANY(:f_doc_types)") < filtered.index("LIMIT :limit")
+    assert params["f_doc_types"] == ["email"] and params["limit"] == 8
@@ -0,0 +1,106 @@
+"""Unit tests for document export: the cursor query, field projection and encoding."""
+import csv
+import io
+
+import orjson
+import pytest
+
+from app.core import export
+from app.core.export import Encoder, export_documents, resolve_fields
+from app.domain.entities import ExportFilters
+from app.infrastructure.repositories.document_repo import DocumentRepository
+from app.utils.exceptions import ValidationError
+from tests.unit.conftest import FakeUnitOfWork
+
+ROWS = [
+    {"id": "d1", "efta_id": "EFTA1", "people": ["maxwell", "epstein"], "pages": 2},
+    {"id": "d2", "efta_id": "EFTA2", "people": [], "pages": None},
+]
+
+
+class StreamResult:
+    def __init__(self, rows):
+        self.rows = rows
+        self.closed = False
+
+    def mappings(self):
+        return self
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for row in self.rows:
+            yield row
+
+    async def close(self):
+        self.closed = True
+
+
+class StreamingSession:
+    def __init__(self, rows):
+        self.result = StreamResult(rows)
+        self.calls = []
+
+    async def stream(self, statement, params=None, execution_options=None):
+        self.calls.append((str(statement), params, execution_options))
+        return self.result
+
+
+def _uow(rows):
+    return FakeUnitOfWork(documents=DocumentRepository(StreamingSession(rows)))
+
+
+async def _rows(rows):
+    for row in rows:
+        yield row
+
+
+def test_resolve_fields_puts_id_first_and_rejects_unknown():
+    assert resolve_fields(None)[0] == "id"
+    assert resolve_fields("people, efta_id,id,people") == ["id", "people", "efta_id"]
+    with pytest.raises(ValidationError):
+        resolve_fields("id,embedding")
+
+
+async def test_export_query_filters_resumes_and_streams():
+    session = StreamingSession(ROWS)
+    repo = DocumentRepository(session)
+    filters = ExportFilters(doc_types=["flight_log"], aircraft=["N908JE"], datasets=["dataset9"])
+
+    rows = [r async for r in repo.export(filters, ["id", "people"], after="d0", limit=10)]
+
+    sql, params, options = session.calls[0]
+    assert sql.startswith("SELECT id, people FROM documents WHERE TRUE AND doc_type = ANY")
+    assert "aircraft && CAST(:f_aircraft AS text[]) AND dataset = ANY(:f_datasets)" in sql
+    assert sql.endswith("AND id > :after ORDER BY id LIMIT :limit")
+    assert params["after"] == "d0" and params["limit"] == 10
+    assert "yield_per" in options
+    assert rows == ROWS and session.result.closed
+
+
+async def test_export_refuses_unlisted_columns():
+    repo = DocumentRepository(StreamingSession([]))
+    with pytest.raises(ValueError):
+        [r async for r in repo.export(fields=["embedding"])]
+
+
+async def test_ndjson_export_chunks_and_tracks_last_id(monkeypatch):
+    monkeypatch.setattr(export, "CHUNK_BYTES", 1)
+    encoder = Encoder("ndjson", ["id", "efta_id", "people", "pages"])
+    seen = []
+    async for chunk in export_documents(ExportFilters(), encoder, uow_factory=lambda: _uow(ROWS)):
+        seen.append((orjson.loads(chunk), encoder.last_id))
+    assert seen == [(ROWS[0], "d1"), (ROWS[1], "d2")]
+
+
+async def test_csv_export_joins_lists_and_skips_header_on_resume():
+    fields = ["id", "people", "pages"]
+    full = b"".join([c async for c in Encoder("csv", fields).encode(_rows(ROWS))])
+    assert list(csv.reader(io.StringIO(full.decode()))) == [
+        fields,
+        ["d1", "maxwell|epstein", "2"],
+        ["d2", "", ""],
+    ]
+    resumed = b"".join([c async for c in Encoder("csv", fields, header=False).encode(_rows(ROWS[1:]))])
+    assert resumed.decode().splitlines() == ["d2,,"]
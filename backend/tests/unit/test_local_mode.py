@@ -0,0 +1,147 @@
+"""Unit tests for local-only search mode."""
+from app.config import settings
+from app.core.search_service import SearchService
+from app.domain.entities import Document, Passage, SearchFilters, SearchQuery
+from app.infrastructure.external import gemini_client
+from tests.unit.conftest import FakeUnitOfWork
+
+
+def _doc(i, **kw):
+    return Document(id=f"d{i}", efta_id=f"EFTA{i}", content=f"Flight log {i}.", **kw)
+
+
+class LocalRepo:
+    def __init__(self):
+        self.filters = []
+
+    async def count(self):
+        return 0
+
+    async def get_many(self, ids, filters=None):
+        self.filters.append(filters)
+        return [_doc(i[1:]) for i in ids]
+
+    async def vector_search(self, embedding, limit=20, filters=None):
+        return []
+
+    async def keyword_search(self, query, limit=20, filters=None):
+        self.filters.append(filters)
+        return [_doc(2), _doc(3)]
+
+    async def metadata_search(self, terms, limit=20, filters=None):
+        self.filters.append(filters)
+        return [_doc(3)]
+
+
+class ChunkRepo:
+    async def vector_search(self, embedding, limit=80, filters=None):
+        return [
+            Passage(document_id="d1", chunk_index=0, content="Flight log 1.", relevance_score=0.9),
+            Passage(document_id="d3", chunk_index=0, content="Flight log 3.", relevance_score=0.8),
+        ]
+
+
+class Cache:
+    def __init__(self):
+        self.reads = 0
+        self.stored = None
+
+    async def get(self, query, filters=None):
+        self.reads += 1
+        return None
+
+    async def get_answer(self, query, document_ids):
+        return "Answer."
+
+    async def set(self, query, filters, response, limit=None):
+        self.stored = response
+
+
+class NoDuggan:
+    async def search(self, *args, **kwargs):
+        raise AssertionError("local mode must not call DugganUSA")
+
+
+async def _embed(text):
+    return [0.1, 0.2]
+
+
+def _uow(cache):
+    return FakeUnitOfWork(LocalRepo(), cache, ChunkRepo())
+
+
+class FilteringChunkRepo:
+    """Passages of eight emails rank above the one flight log."""
+
+    def __init__(self):
+        self.passages = [
+            Passage(document_id=f"d{i}", chunk_index=0, content=f"Email {i}.", relevance_score=0.9)
+            for i in range(1, 9)
+        ] + [Passage(document_id="d9", chunk_index=0, content="Flight log 9.", relevance_score=0.5)]
+
+    async def vector_search(self, embedding, limit=80, filters=None):
+        hits = self.passages
+        if filters and filters.doc_types == ["flight_log"]:
+            hits = [p for p in hits if p.document_id == "d9"]
+        return hits[:limit]
+
+
+def _service(uow):
+    return SearchService(lambda: uow, duggan=NoDuggan())
+
+
+async def test_local_mode_fuses_local_rankings(monkeypatch):
+    monkeypatch.setattr(gemini_client, "embed_text", _embed)
+    monkeypatch.setattr(settings, "SEARCH_MODE", "local")
+    cache = Cache()
+    filters = SearchFilters(doc_types=["email"])
+    uow = _uow(cache)
+    service = _service(uow)
+
+    result = await service.search(SearchQuery(text="flight logs", filters=filters))
+
+    # d3 appears in all three rankings, so it leads
+    assert [d.id for d in result.documents] == ["d3", "d1", "d2"]
+    assert result.source == "local"
+    assert all(f == filters for f in uow.documents.filters)
+    assert cache.stored["source"] == "local"
+
+
+async def test_per_request_mode_bypasses_query_cache(monkeypatch):
+    monkeypatch.setattr(gemini_client, "embed_text", _embed)
+    cache = Cache()
+
+    result = await _service(_uow(cache)).search(SearchQuery(text="flight logs", mode="local"))
+
+    assert result.source == "local"
+    assert cache.reads == 0
+    assert cache.stored is None
+
+
+async def test_local_mode_stream_reports_source(monkeypatch):
+    monkeypatch.setattr(gemini_client, "embed_text", _embed)
+    cache = Cache()
+
+    events = [e async for e in _service(_uow(cache)).search_stream(SearchQuery(text="flights", mode="local"))]
+
+    assert events[0]["type"] == "documents"
+    assert events[0]["source"] == "local"
+
+
+async def test_passage_search_filters_before_truncating(monkeypatch):
+    monkeypatch.setattr(settings, "CHUNK_SEARCH_FANOUT", 2)
+    uow = FakeUnitOfWork(LocalRepo(), Cache(), FilteringChunkRepo())
+    filters = SearchFilters(doc_types=["flight_log"])
+
+    documents, passages = await _service(uow)._passage_search(uow, [0.1], 3, filters)
+
+    assert [d.id for d in documents] == ["d9"]
+    assert passages == {"d9": ["Flight log 9."]}
+
+
+def test_metadata_terms_include_tag_forms():
+    terms = SearchService._metadata_terms("Ghislaine Maxwell on")
+    assert "maxwell" in terms
+    assert "ghislaine_maxwell" in terms
+    assert "ghislaine maxwell" in terms
+    assert "on" not in terms
@@ -0,0 +1,57 @@
+"""Unit tests for stage timings, the Server-Timing header and /api/metrics."""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.api.middleware.server_timing import ServerTimingMiddleware
+from app.api.routes import metrics
+from app.utils.metrics import StageTimings, end_request, stage, start_request, timed
+
+
+def test_stage_accumulates_into_request_timings():
+    token, timings = start_request()
+    try:
+        with stage("unit.a"):
+            pass
+        with stage("unit.a"):
+            pass
+    finally:
+        end_request(token)
+    assert list(timings.stages) == ["unit.a"]
+    assert REGISTRY.get_sample_value("epsteinrag_stage_seconds_count", {"stage": "unit.a"}) >= 2
+
+
+def test_server_timing_format():
+    timings = StageTimings()
+    timings.add("query_cache.get", 0.0012)
+    timings.add("gemini.generate", 0.5)
+    assert timings.server_timing(0.6) == (
+        "query_cache.get;dur=1.2, gemini.generate;dur=500.0, total;dur=600.0"
+    )
+
+
+def _app():
+    app = FastAPI()
+
+    @timed("unit.lookup")
+    async def lookup():
+        return {"ok": True}
+
+    @app.get("/thing")
+    async def thing():
+        return await lookup()
+
+    app.include_router(metrics.router, prefix="/api")
+    app.add_middleware(ServerTimingMiddleware)
+    return app
+
+
+def test_middleware_sets_header_and_exports_histograms():
+    client = TestClient(_app())
+    resp = client.get("/thing")
+    assert resp.headers["server-timing"].startswith("unit.lookup;dur=")
+    assert "total;dur=" in resp.headers["server-timing"]
+
+    body = client.get("/api/metrics").text
+    assert 'epsteinrag_stage_seconds_bucket{le="0.001",stage="unit.lookup"}' in body
+    assert 'epsteinrag_request_seconds_count{method="GET",route="/thing",status="200"}' in body
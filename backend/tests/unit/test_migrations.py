@@ -0,0 +1,114 @@
+"""Unit tests for versioned schema migrations and the startup version check."""
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from app.infrastructure import migrations
+from app.infrastructure.migrations import (
+    BASELINE_SQL,
+    LATEST_VERSION,
+    MIGRATIONS,
+    Migration,
+    SchemaVersionError,
+    check_schema,
+    migrate,
+)
+
+
+class FakeDriver:
+    """Records statements and whether each ran inside a transaction."""
+
+    def __init__(self, applied=(), invalid=()):
+        self.applied = list(applied)
+        self.invalid = set(invalid)
+        self.executed = []
+        self.in_transaction = False
+
+    async def execute(self, statement, *args):
+        self.executed.append((statement.strip(), self.in_transaction))
+        if statement.startswith("INSERT INTO schema_migrations"):
+            self.applied.append(args[0])
+
+    async def fetch(self, statement):
+        return [{"version": v} for v in self.applied]
+
+    async def fetchval(self, statement, *args):
+        if "to_regclass" in statement:
+            return "schema_migrations" if self.applied else None
+        if "indisvalid" in statement:
+            return args[0] in self.invalid
+        return max(self.applied, default=0)
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.in_transaction = True
+        try:
+            yield
+        finally:
+            self.in_transaction = False
+
+
+def _engine(driver):
+    class Conn:
+        async def get_raw_connection(self):
+            return SimpleNamespace(driver_connection=driver)
+
+    @asynccontextmanager
+    async def connect():
+        yield Conn()
+
+    return SimpleNamespace(connect=connect)
+
+
+def test_versions_increase():
+    versions = [m.version for m in MIGRATIONS]
+    assert versions == sorted(set(versions))
+    assert LATEST_VERSION == versions[-1]
+
+
+def test_search_tsv_is_added_without_a_table_rewrite():
+    assert "GENERATED ALWAYS" not in BASELINE_SQL
+    backfill = next(m for m in MIGRATIONS if m.name == "search_tsv_backfill")
+    # committing between batches is only allowed outside a transaction
+    assert not backfill.transactional
+    assert "COMMIT" in backfill.statements[0]
+
+
+async def test_migrate_applies_only_pending_steps(monkeypatch):
+    monkeypatch.setattr(
+        migrations,
+        "MIGRATIONS",
+        [
+            Migration(1, "tables", ("CREATE TABLE a (id int)",)),
+            Migration(
+                2,
+                "indexes",
+                ("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_a ON a(id)",),
+                transactional=False,
+            ),
+        ],
+    )
+    driver = FakeDriver(applied=[1], invalid={"idx_a"})
+    assert await migrate(_engine(driver)) == [2]
+
+    statements = dict(driver.executed)
+    assert "CREATE TABLE a (id int)" not in statements
+    # the leftover of an interrupted build is dropped before rebuilding
+    assert 'DROP INDEX CONCURRENTLY IF EXISTS "idx_a"' in statements
+    assert statements["CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_a ON a(id)"] is False
+    assert driver.executed[-1][0].startswith("SELECT pg_advisory_unlock")
+
+
+async def test_transactional_steps_run_in_a_transaction(monkeypatch):
+    monkeypatch.setattr(migrations, "MIGRATIONS", [Migration(1, "tables", ("CREATE TABLE a (id int)",))])
+    driver = FakeDriver()
+    await migrate(_engine(driver))
+    assert dict(driver.executed)["CREATE TABLE a (id int)"] is True
+    assert driver.applied == [1]
+
+
+async def test_check_schema_rejects_old_and_accepts_newer():
+    with pytest.raises(SchemaVersionError):
+        await check_schema(_engine(FakeDriver()))
+    assert await check_schema(_engine(FakeDriver(applied=[LATEST_VERSION + 1]))) == LATEST_VERSION + 1
@@ -0,0 +1,71 @@
+"""Unit tests for read-replica selection and session routing."""
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine
+
+from app.infrastructure.replicas import (
+    READ_YOUR_WRITES,
+    REPLICAS,
+    ReplicaSet,
+    RoutingSession,
+    replica_read,
+)
+
+primary = create_engine("sqlite://")
+
+
+def _replica_set(*names, max_lag=5.0):
+    engines = [SimpleNamespace(sync_engine=create_engine("sqlite://"), name=n) for n in names]
+    return ReplicaSet(engines, max_lag=max_lag)
+
+
+def test_choose_round_robins_healthy_replicas():
+    replicas = _replica_set("a", "b", "c")
+    assert replicas.choose() is None  # unchecked replicas get no reads
+    for r in replicas.replicas:
+        r.healthy = True
+    replicas.replicas[1].healthy = False
+    a, c = replicas.replicas[0].engine.sync_engine, replicas.replicas[2].engine.sync_engine
+    assert [replicas.choose() for _ in range(4)] == [a, c, a, c]
+
+
+async def test_check_marks_lagging_and_unreachable_replicas(monkeypatch):
+    replicas = _replica_set("ok", "behind", "down", max_lag=5.0)
+    lags = {"ok": 0.2, "behind": 30.0}
+
+    async def lag(engine):
+        if engine.name not in lags:
+            raise OSError("connection refused")
+        return lags[engine.name]
+
+    monkeypatch.setattr(ReplicaSet, "_lag", staticmethod(lag))
+    await replicas.check()
+    assert [r.healthy for r in replicas.replicas] == [True, False, False]
+    assert replicas.snapshot()[1]["lag_s"] == 30.0
+
+
+async def test_routing_sends_marked_reads_to_one_replica():
+    replicas = _replica_set("a", "b")
+    for r in replicas.replicas:
+        r.healthy = True
+    session = RoutingSession(bind=primary, info={REPLICAS: replicas})
+
+    @replica_read
+    async def read():
+        return session.get_bind(), session.get_bind()
+
+    first, second = await read()
+    assert first is second and first is not primary
+    assert session.get_bind() is primary  # unmarked statements stay on the primary
+
+
+async def test_read_your_writes_pins_the_primary():
+    replicas = _replica_set("a")
+    replicas.replicas[0].healthy = True
+    session = RoutingSession(bind=primary, info={REPLICAS: replicas, READ_YOUR_WRITES: True})
+
+    @replica_read
+    async def read():
+        return session.get_bind()
+
+    assert await read() is primary
@@ -0,0 +1,349 @@
+"""Unit tests for the circuit breaker, latency tracker, admission control and Duggan failover."""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.core.search_service import SearchService
+from app.domain.entities import Document, SearchQuery
+from app.infrastructure.external import duggan_client, gemini_client
+from app.infrastructure.external.duggan_client import DugganClient
+from app.infrastructure.external.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    AdmissionController,
+    CircuitBreaker,
+    LatencyTracker,
+    Priority,
+)
+from app.utils.exceptions import CircuitOpenError, ExternalServiceError, OverloadedError
+from tests.unit.conftest import FakeUnitOfWork
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_after_threshold_and_probes_once():
+    clock = FakeClock()
+    breaker = CircuitBreaker("t", failure_threshold=2, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    clock.now = 10
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe in flight
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["rejected_calls"] == 2
+
+
+def test_latency_percentile():
+    tracker = LatencyTracker(size=100)
+    assert tracker.percentile(0.95) is None
+    for i in range(1, 101):
+        tracker.record(i / 100)
+    assert tracker.percentile(0.95) == 0.95
+    assert tracker.percentile(0.5) == 0.5
+
+
+async def test_client_fails_fast_when_open():
+    client = DugganClient()
+    client.breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=60)
+    client.breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        await client.search("flight logs")
+
+
+def _half_open_client(clock):
+    client = DugganClient()
+    client.breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=10, clock=clock)
+    client.breaker.record_failure()
+    clock.now = 10
+    assert client.breaker.state == HALF_OPEN
+    return client
+
+
+async def test_cancelled_probe_frees_the_half_open_slot(monkeypatch):
+    clock = FakeClock()
+    client = _half_open_client(clock)
+
+    async def hang(http, params, timeout):
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(client, "_hedged_get", hang)
+    probe = asyncio.create_task(client.search("flight logs"))
+    await asyncio.sleep(0)
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    assert client.breaker.state == HALF_OPEN
+    assert client.breaker.allow()
+
+
+async def test_invalid_json_probe_reopens_the_circuit(monkeypatch):
+    clock = FakeClock()
+    client = _half_open_client(clock)
+
+    class NotJson:
+        def json(self):
+            raise ValueError("Expecting value")
+
+    async def get(http, params, timeout):
+        return NotJson()
+
+    monkeypatch.setattr(client, "_hedged_get", get)
+    with pytest.raises(ExternalServiceError):
+        await client.search("flight logs", deadline=time.monotonic() + 0.01)
+
+    assert client.breaker.state == OPEN
+    clock.now = 20
+    assert client.breaker.allow()
+
+
+def _status_error(status):
+    request = httpx.Request("GET", "https://duggan.test/search")
+    response = httpx.Response(status, request=request)
+    return httpx.HTTPStatusError(f"HTTP {status}", request=request, response=response)
+
+
+async def test_rejected_request_is_not_retried_or_counted(monkeypatch):
+    client = DugganClient()
+    client.breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=60)
+    calls = []
+
+    async def get(http, params, timeout):
+        calls.append(params)
+        raise _status_error(400)
+
+    monkeypatch.setattr(client, "_hedged_get", get)
+    with pytest.raises(ExternalServiceError, match="HTTP 400"):
+        await client.search("flight logs", filter_expr="doc_type = ")
+
+    assert len(calls) == 1
+    assert client.breaker.state == CLOSED
+
+
+async def test_last_failed_attempt_does_not_back_off(monkeypatch):
+    monkeypatch.setattr(settings, "DUGGAN_MAX_ATTEMPTS", 2)
+    client = DugganClient()
+    client.breaker = CircuitBreaker("t", failure_threshold=5, reset_timeout=60)
+    sleeps = []
+
+    async def get(http, params, timeout):
+        raise _status_error(503)
+
+    async def sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(client, "_hedged_get", get)
+    monkeypatch.setattr(duggan_client.asyncio, "sleep", sleep)
+    with pytest.raises(ExternalServiceError):
+        await client.search("flight logs")
+
+    assert sleeps == [0.5]
+    assert client.breaker.snapshot()["consecutive_failures"] == 2
+
+
+async def test_hedged_get_returns_first_success(monkeypatch):
+    client = DugganClient()
+    client.latency = LatencyTracker()
+    calls = []
+
+    async def fake_get(http, params, timeout):
+        calls.append(timeout)
+        if len(calls) == 1:
+            await asyncio.sleep(1)
+            return "slow"
+        return "fast"
+
+    monkeypatch.setattr(client, "_get", fake_get)
+    monkeypatch.setattr(client, "_hedge_delay", lambda: 0.01)
+    assert await client._hedged_get(None, {}, 5.0) == "fast"
+    assert len(calls) == 2
+
+
+async def test_admission_hands_slots_to_higher_priority_first():
+    gate = AdmissionController("t", limit=1, max_queue=4, queue_timeout=1)
+    order = []
+
+    async def run(name, priority):
+        async with gate.admit(priority):
+            order.append(name)
+
+    async with gate.admit():
+        waiters = [
+            asyncio.create_task(run("anon", Priority.ANONYMOUS)),
+            asyncio.create_task(run("user", Priority.USER)),
+        ]
+        await asyncio.sleep(0)
+        assert gate.snapshot()["queued"] == 2
+    await asyncio.gather(*waiters)
+
+    assert order == ["user", "anon"]
+    assert gate.active == 0
+
+
+async def test_admission_sheds_when_queue_is_full_or_slow():
+    gate = AdmissionController("t", limit=1, max_queue=1, queue_timeout=0.01)
+    async with gate.admit():
+        background = asyncio.create_task(gate._acquire(Priority.BACKGROUND))
+        await asyncio.sleep(0)
+
+        # an equal-priority caller is turned away; a higher one takes the place
+        with pytest.raises(OverloadedError) as full:
+            await gate._acquire(Priority.BACKGROUND)
+        assert full.value.reason == "queue_full"
+        user = asyncio.create_task(gate._acquire(Priority.USER))
+        with pytest.raises(OverloadedError) as displaced:
+            await background
+        assert displaced.value.reason == "displaced"
+
+        with pytest.raises(OverloadedError) as timeout:
+            await user
+        assert timeout.value.reason == "queue_timeout"
+
+    assert gate.snapshot()["rejected"] == {"queue_full": 1, "displaced": 1, "queue_timeout": 1}
+    assert gate.active == 0
+
+
+class UnavailableDuggan:
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=60)
+
+    async def search(self, query, limit, filter_expr=None, deadline=None):
+        raise CircuitOpenError("DugganUSA API")
+
+
+class LocalRepo:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def count(self):
+        return 0
+
+    async def keyword_search(self, query, limit=20, filters=None):
+        return self.docs
+
+    async def metadata_search(self, terms, limit=20, filters=None):
+        return []
+
+
+class NoCache:
+    stored = None
+
+    async def get(self, query, filters=None):
+        return None
+
+    async def get_answer(self, query, document_ids):
+        return "Local answer."
+
+    async def set(self, query, filters, response, limit=None):
+        self.stored = response
+
+
+def _service(documents, cache, chunks=None, duggan=None):
+    uow = FakeUnitOfWork(documents, cache, chunks)
+    return SearchService(lambda: uow, duggan=duggan)
+
+
+async def _no_answer(query, document_ids):
+    return None
+
+
+async def _no_embedding(text):
+    raise ExternalServiceError("Gemini Embedding", "unavailable")
+
+
+async def test_search_falls_back_to_local_documents(monkeypatch):
+    monkeypatch.setattr(gemini_client, "embed_text", _no_embedding)
+    docs = [Document(id="d1", efta_id="EFTA1", content="Flight log.")]
+    cache = NoCache()
+    service = _service(LocalRepo(docs), cache, duggan=UnavailableDuggan())
+
+    result = await service.search(SearchQuery(text="flight logs"))
+
+    assert [d.id for d in result.documents] == ["d1"]
+    assert result.source == "local"
+    assert result.ai_answer.text == "Local answer."
+    assert cache.stored is None  # degraded results are not cached
+
+
+async def test_search_raises_when_nothing_local(monkeypatch):
+    monkeypatch.setattr(gemini_client, "embed_text", _no_embedding)
+    service = _service(LocalRepo([]), NoCache(), duggan=UnavailableDuggan())
+    with pytest.raises(ExternalServiceError):
+        await service.search(SearchQuery(text="flight logs"))
+
+
+async def test_search_returns_documents_only_when_answer_is_shed(monkeypatch):
+    monkeypatch.setattr(gemini_client, "embed_text", _no_embedding)
+    docs = [Document(id="d1", efta_id="EFTA1", content="Flight log.")]
+    cache = NoCache()
+    cache.get_answer = _no_answer
+    service = _service(LocalRepo(docs), cache, duggan=UnavailableDuggan())
+    service.llm_gate = AdmissionController("t", limit=0, max_queue=0, queue_timeout=1)
+
+    result = await service.search(SearchQuery(text="flight logs", mode="local"))
+
+    assert [d.id for d in result.documents] == ["d1"]
+    assert result.ai_answer.text == ""
+    assert result.degraded == "llm_queue_full"
+    assert cache.stored is None
+
+
+class AnswerlessCache(NoCache):
+    async def get_answer(self, query, document_ids):
+        return None
+
+    async def set_answer(self, query, document_ids, answer):
+        pass
+
+
+class SlowModels:
+    """Async Gemini models that take a while and record their concurrency."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def generate_content(self, model, contents, config):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.05)
+        self.active -= 1
+        return SimpleNamespace(text="Generated.", usage_metadata=None)
+
+
+async def test_llm_gate_bounds_concurrent_generations(monkeypatch):
+    monkeypatch.setattr(gemini_client, "embed_text", _no_embedding)
+    models = SlowModels()
+    monkeypatch.setattr(gemini_client, "_get_client", lambda: SimpleNamespace(aio=SimpleNamespace(models=models)))
+    docs = [Document(id="d1", efta_id="EFTA1", content="Flight log.")]
+    service = _service(LocalRepo(docs), AnswerlessCache(), duggan=UnavailableDuggan())
+    service.llm_gate = AdmissionController("t", limit=2, max_queue=1, queue_timeout=1)
+
+    results = await asyncio.gather(
+        *(service.search(SearchQuery(text=f"flight logs {i}", mode="local")) for i in range(4))
+    )
+
+    assert models.peak == 2
+    assert sorted(r.degraded or "" for r in results) == ["", "", "", "llm_queue_full"]
+    assert sum(r.ai_answer.text == "Generated." for r in results) == 3
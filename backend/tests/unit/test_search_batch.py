@@ -0,0 +1,86 @@
+"""Unit tests for batch search."""
+from app.config import settings
+from app.core.search_service import SearchService
+from app.domain.entities import AIAnswer, Document, SearchQuery, SearchResult
+from app.infrastructure.external import gemini_client
+from app.utils.exceptions import ValidationError
+from tests.unit.conftest import FakeUnitOfWork
+
+
+class LocalRepo:
+    def __init__(self):
+        self.searches = []
+
+    async def count(self):
+        return 0
+
+    async def get_many(self, ids, filters=None):
+        return []
+
+    async def vector_search(self, embedding, limit=20, filters=None):
+        return []
+
+    async def keyword_search(self, query, limit=20, filters=None):
+        if query == "bad":
+            raise ValidationError("unsearchable")
+        self.searches.append(query)
+        return [Document(id=f"d-{query}", efta_id="EFTA1", content="Flight log.")]
+
+    async def metadata_search(self, terms, limit=20, filters=None):
+        return []
+
+
+class ChunkRepo:
+    def __init__(self):
+        self.embeddings = []
+
+    async def vector_search(self, embedding, limit=80, filters=None):
+        self.embeddings.append(embedding)
+        return []
+
+
+class Cache:
+    def __init__(self, hits):
+        self.hits = hits
+        self.stored = []
+
+    async def get(self, query, filters=None):
+        hit = self.hits.get(query)
+        return hit.model_dump(mode="json") if hit else None
+
+    async def get_answer(self, query, document_ids):
+        return "Answer."
+
+    async def set(self, query, filters, response, limit=None):
+        self.stored.append(query)
+
+
+async def test_batch_dedupes_serves_hits_and_embeds_once(monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_MODE", "local")
+    batches = []
+
+    async def embed_batch(texts):
+        batches.append(texts)
+        return [[float(i)] for i, _ in enumerate(texts)]
+
+    async def embed_text(text):
+        raise AssertionError("batch queries are embedded together")
+
+    monkeypatch.setattr(gemini_client, "embed_batch", embed_batch)
+    monkeypatch.setattr(gemini_client, "embed_text", embed_text)
+    cache = Cache({"cached": SearchResult(query="cached", ai_answer=AIAnswer(text="Old."))})
+    uow = FakeUnitOfWork(LocalRepo(), cache, ChunkRepo())
+    service = SearchService(lambda: uow)
+    queries = [SearchQuery(text=t) for t in ("flights", "cached", "flights", "bad", "boats")]
+
+    outcomes = {tuple(i): o async for i, o in service.search_batch(queries)}
+
+    assert outcomes[(1,)].cached and outcomes[(1,)].ai_answer.text == "Old."
+    assert outcomes[(0, 2)].documents[0].id == "d-flights"
+    assert outcomes[(4,)].ai_answer.text == "Answer."
+    assert isinstance(outcomes[(3,)], ValidationError)
+    # one search per distinct query, one embedding call for all misses
+    assert sorted(uow.documents.searches) == ["boats", "flights"]
+    assert batches == [["flights", "bad", "boats"]]
+    assert sorted(uow.chunks.embeddings) == [[0.0], [1.0], [2.0]]
+    assert sorted(cache.stored) == ["boats", "flights"]
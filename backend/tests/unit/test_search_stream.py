@@ -0,0 +1,151 @@
+"""Unit tests for the SSE event sequence of SearchService.search_stream."""
+from app.core.search_service import SearchService
+from app.domain.entities import Document, SearchQuery
+from app.infrastructure.external import gemini_client
+from tests.unit.conftest import FakeUnitOfWork
+
+
+class FakeDocumentRepo:
+    def __init__(self):
+        self.stored = []
+
+    async def upsert_many(self, docs):
+        self.stored.extend(docs)
+
+
+class FakeCacheRepo:
+    def __init__(self, cached=None, answer=None):
+        self.cached = cached
+        self.answer = answer
+        self.stored = None
+        self.stored_answer = None
+
+    async def get(self, query, filters=None):
+        return self.cached
+
+    async def set(self, query, filters, response, limit=None):
+        self.stored = response
+
+    async def get_answer(self, query, document_ids):
+        return self.answer
+
+    async def set_answer(self, query, document_ids, answer):
+        self.stored_answer = (document_ids, answer)
+
+
+class FakeDuggan:
+    async def search(self, query, limit, filter_expr=None, deadline=None):
+        return [
+            Document(id=f"d{i}", efta_id=f"EFTA{i}", content=f"Flight log {i}.")
+            for i in range(3)
+        ]
+
+
+def _service(documents, cache, chunks=None, duggan=None):
+    uow = FakeUnitOfWork(documents, cache, chunks)
+    return SearchService(lambda: uow, duggan=duggan)
+
+
+async def _fake_stream(query, context):
+    for chunk in ("Flights ", "[1]."):
+        yield chunk
+
+
+async def test_stream_emits_documents_first(monkeypatch):
+    monkeypatch.setattr(gemini_client, "generate_answer_stream", _fake_stream)
+    doc_repo = FakeDocumentRepo()
+    cache_repo = FakeCacheRepo()
+    service = _service(doc_repo, cache_repo, duggan=FakeDuggan())
+
+    events = [e async for e in service.search_stream(SearchQuery(text="flight log", limit=2))]
+    types = [e["type"] for e in events]
+
+    assert types[0] == "documents"
+    assert [d["id"] for d in events[0]["documents"]] == ["d0", "d1"]
+    assert "content" not in events[0]["documents"][0]
+    assert types[1:3] == ["answer_chunk", "answer_chunk"]
+    assert types[-2:] == ["complete", "timing"]
+    assert events[-1]["ttft_ms"] >= events[-1]["ttfb_ms"]
+    # every fetched document is stored, not just the returned page
+    assert len(doc_repo.stored) == 3
+    # the completed answer is cached for both endpoints
+    assert cache_repo.stored["ai_answer"]["text"] == "Flights [1]."
+    assert cache_repo.stored_answer == (["d0", "d1"], "Flights [1].")
+    assert "content" not in cache_repo.stored["documents"][0]
+
+
+async def test_stream_replays_cached_answer(monkeypatch):
+    async def fail(*args, **kwargs):
+        raise AssertionError("cache hit must not generate")
+        yield  # pragma: no cover
+
+    monkeypatch.setattr(gemini_client, "generate_answer_stream", fail)
+    cached = {
+        "query": "flight log",
+        "ai_answer": {
+            "text": "word " * 50,
+            "citations": [{"document_id": "d0", "efta_id": "EFTA0", "snippet": "s"}],
+        },
+        "documents": [{"id": "d0", "efta_id": "EFTA0"}],
+        "total_results": 1,
+    }
+    service = _service(FakeDocumentRepo(), FakeCacheRepo(cached))
+
+    events = [e async for e in service.search_stream(SearchQuery(text="flight log"))]
+    types = [e["type"] for e in events]
+
+    assert types[0] == "documents" and events[0]["cached"] is True
+    chunks = [e["content"] for e in events if e["type"] == "answer_chunk"]
+    assert len(chunks) > 1
+    assert "".join(chunks) == cached["ai_answer"]["text"]
+    assert types[-3:] == ["citation", "complete", "timing"]
+
+
+async def test_stream_reuses_answer_for_same_evidence(monkeypatch):
+    async def fail(*args, **kwargs):
+        raise AssertionError("answer cache hit must not generate")
+        yield  # pragma: no cover
+
+    monkeypatch.setattr(gemini_client, "generate_answer_stream", fail)
+    service = _service(FakeDocumentRepo(), FakeCacheRepo(answer="Reused [1]."), duggan=FakeDuggan())
+
+    events = [e async for e in service.search_stream(SearchQuery(text="flights?", limit=2))]
+    answer = "".join(e["content"] for e in events if e["type"] == "answer_chunk")
+    assert answer == "Reused [1]."
+
+
+async def test_empty_answers_are_not_cached(monkeypatch):
+    async def blocked(query, context):
+        return ""
+
+    async def blocked_stream(query, context):
+        for chunk in ():
+            yield chunk
+
+    monkeypatch.setattr(gemini_client, "generate_answer", blocked)
+    monkeypatch.setattr(gemini_client, "generate_answer_stream", blocked_stream)
+    cache_repo = FakeCacheRepo()
+    uow = FakeUnitOfWork(FakeDocumentRepo(), cache_repo)
+    service = SearchService(lambda: uow)
+    docs = [Document(id="d0", efta_id="EFTA0", content="Flight log.")]
+
+    assert await service._generate_answer(uow, "flights", docs) == ""
+    assert [c async for c in service._generate_answer_stream(uow, "flights", docs)] == []
+    assert cache_repo.stored_answer is None
+
+
+async def test_stale_replay_schedules_one_refresh(monkeypatch):
+    scheduled = []
+    cached = {
+        "query": "flight log",
+        "ai_answer": {"text": "Old answer.", "citations": []},
+        "documents": [],
+        "total_results": 0,
+        "stale": True,
+    }
+    service = _service(FakeDocumentRepo(), FakeCacheRepo(cached))
+    monkeypatch.setattr(service.refresher, "schedule", scheduled.append)
+    events = [e async for e in service.search_stream(SearchQuery(text="flight log"))]
+
+    assert events[0]["stale"] is True
+    assert len(scheduled) == 1
@@ -0,0 +1,89 @@
+"""Unit tests for SQL fingerprinting and slow-query capture."""
+from types import SimpleNamespace
+
+from prometheus_client import REGISTRY
+
+from app.infrastructure import sql_monitor
+from app.infrastructure.sql_monitor import SlowQueryMonitor, bind_shape, fingerprint
+
+
+def test_fingerprint_ignores_arguments():
+    a = fingerprint("SELECT id FROM documents\n WHERE id = ANY($1) LIMIT 20")
+    b = fingerprint("SELECT id FROM documents WHERE id = ANY($1)   LIMIT 5")
+    assert a[0] == b[0]
+    assert a[1] == "SELECT"
+    assert a[2] == "SELECT id FROM documents WHERE id = ANY(?) LIMIT ?"
+
+
+def test_fingerprint_collapses_literals_and_lists():
+    _, op, normalized = fingerprint("INSERT INTO t (a, b) VALUES ('x''y', 3), ($1, $2) -- note")
+    assert op == "INSERT"
+    assert normalized == "INSERT INTO t (a, b) VALUES (?+), (?+)"
+
+
+def test_bind_shape_hides_values():
+    assert bind_shape(("secret query", [0.1] * 3, 20, None)) == [
+        "str(12)", "list[3]", "int", "null",
+    ]
+    assert bind_shape([("a",), ("bb",)], executemany=True) == {"rows": 2, "row": ["str(1)"]}
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+
+    def warning(self, event, **kw):
+        self.events.append((event, kw))
+
+
+def _run(monitor, statement, parameters=(), executemany=False):
+    conn = SimpleNamespace(info={})
+    monitor._before(conn, None, statement, parameters, None, executemany)
+    monitor._after(conn, None, statement, parameters, None, executemany)
+
+
+def test_slow_statements_are_logged_and_explained_once(monkeypatch):
+    recorder = Recorder()
+    monkeypatch.setattr(sql_monitor, "logger", recorder)
+    explained = []
+    monitor = SlowQueryMonitor(engine=None, threshold_ms=0, explain=True, explain_interval=60)
+    monkeypatch.setattr(monitor, "_schedule_explain", lambda fp, s, p: explained.append(fp))
+
+    _run(monitor, "SELECT * FROM documents WHERE id = $1", ("d1",))
+    _run(monitor, "SELECT * FROM documents WHERE id = $1", ("d2",))
+    _run(monitor, "DELETE FROM query_cache WHERE id = $1", ("x",))
+
+    assert [e for e, _ in recorder.events] == ["slow_query"] * 3
+    assert recorder.events[0][1]["binds"] == ["str(2)"]
+    assert len(explained) == 1  # reads only, once per interval
+
+    fp = fingerprint("SELECT * FROM documents WHERE id = $1")[0]
+    count = REGISTRY.get_sample_value(
+        "epsteinrag_sql_seconds_count", {"fingerprint": fp, "operation": "SELECT"}
+    )
+    assert count >= 2
+
+
+def test_fast_statements_are_only_measured(monkeypatch):
+    recorder = Recorder()
+    monkeypatch.setattr(sql_monitor, "logger", recorder)
+    monitor = SlowQueryMonitor(engine=None, threshold_ms=10_000)
+    _run(monitor, "SELECT 1")
+    assert recorder.events == []
+
+
+def test_failed_statements_do_not_leave_a_start_time(monkeypatch):
+    recorder = Recorder()
+    monkeypatch.setattr(sql_monitor, "logger", recorder)
+    monitor = SlowQueryMonitor(engine=None, threshold_ms=0)
+    conn = SimpleNamespace(info={})
+
+    monitor._before(conn, None, "SELECT broken", (), None, False)
+    monitor._failed(SimpleNamespace(connection=conn))
+    assert conn.info["query_started"] == []
+
+    # the next statement on the connection times from its own start
+    monitor._before(conn, None, "SELECT 1", (), None, False)
+    monitor._after(conn, None, "SELECT 1", (), None, False)
+    assert conn.info["query_started"] == []
+    monitor._failed(SimpleNamespace(connection=None))  # e.g. a failed connect
@@ -0,0 +1,103 @@
+"""Unit tests for streamed routes going out uncompressed, event by event."""
+import asyncio
+
+import orjson
+
+from app.api.dependencies import get_optional_user
+from app.main import app
+from app.utils.exceptions import ValidationError
+
+
+def _scope(method, path, query=b""):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query,
+        "root_path": "",
+        "headers": [(b"accept-encoding", b"gzip, deflate"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+
+
+async def _first_body(service, scope, body=b""):
+    """Start the request and return the response headers and first body piece.
+
+    The caller's ``release`` lets the rest of the response finish.
+    """
+    app.state.search_service = service
+    app.dependency_overrides[get_optional_user] = lambda: None
+    requested = False
+    started = {}
+    first = asyncio.get_running_loop().create_future()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            started.update((k.decode(), v.decode()) for k, v in message["headers"])
+        elif message.get("body") and not first.done():
+            first.set_result(message["body"])
+
+    task = asyncio.create_task(app(scope, receive, send))
+    try:
+        return started, await asyncio.wait_for(first, 1), task
+    finally:
+        app.dependency_overrides.clear()
+
+
+class HeldStream:
+    """Sends the documents event, then waits for the answer to be released."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def search_stream(self, query, priority):
+        yield {"type": "documents", "documents": [{"id": f"d{i}", "content": "x" * 200} for i in range(10)]}
+        await self.release.wait()
+        yield {"type": "done"}
+
+
+async def test_sse_documents_event_is_sent_before_the_answer():
+    service = HeldStream()
+
+    headers, body, task = await _first_body(service, _scope("GET", "/api/search/stream", b"q=flights"))
+
+    assert headers["content-encoding"] == "identity"
+    assert orjson.loads(body.removeprefix(b"data: "))["type"] == "documents"
+    service.release.set()
+    await asyncio.wait_for(task, 1)
+
+
+class HeldBatch:
+    """Finishes the first query at once and the second only when released."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def search_batch(self, queries, priority):
+        yield [0], ValidationError("x" * 2000)
+        await self.release.wait()
+        yield [1], ValidationError("unsearchable")
+
+
+async def test_batch_lines_are_sent_as_queries_finish():
+    service = HeldBatch()
+    body = orjson.dumps({"queries": [{"query": "flights"}, {"query": "boats"}]})
+
+    headers, line, task = await _first_body(service, _scope("POST", "/api/search/batch"), body)
+
+    assert headers["content-encoding"] == "identity"
+    assert orjson.loads(line) == {"index": 0, "status": 422, "error": "x" * 2000}
+    service.release.set()
+    await asyncio.wait_for(task, 1)
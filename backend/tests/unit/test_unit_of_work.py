@@ -0,0 +1,45 @@
+"""Unit tests for lazy session acquisition in UnitOfWork."""
+from app.infrastructure.unit_of_work import UnitOfWork
+
+
+class FakeSession:
+    def __init__(self):
+        self.closed = 0
+
+    async def close(self):
+        self.closed += 1
+
+
+class Factory:
+    def __init__(self):
+        self.sessions = []
+
+    def __call__(self):
+        session = FakeSession()
+        self.sessions.append(session)
+        return session
+
+
+async def test_no_session_until_a_repository_is_used():
+    factory = Factory()
+    async with UnitOfWork(factory) as uow:
+        await uow.release()
+    assert factory.sessions == []
+
+
+async def test_repositories_share_one_session():
+    factory = Factory()
+    async with UnitOfWork(factory) as uow:
+        assert uow.documents is uow.documents
+        assert uow.cache.session is uow.history.session
+    assert len(factory.sessions) == 1
+    assert factory.sessions[0].closed == 1
+
+
+async def test_release_keeps_the_unit_usable():
+    factory = Factory()
+    uow = UnitOfWork(factory)
+    repo = uow.users
+    await uow.release()
+    assert uow.users is repo
+    assert len(factory.sessions) == 1
@@ -1,6 +1,6 @@
 "use client";
 
-import { Clock, Zap, Database, FileSearch } from "lucide-react";
+import { AlertTriangle, Clock, Zap, Database, FileSearch } from "lucide-react";
 import type { SearchResult } from "@/lib/types";
 import AIAnswer from "./AIAnswer";
 import DocumentCard from "./DocumentCard";
@@ -38,10 +38,22 @@ export default function SearchResults({ results }: SearchResultsProps) {
             </span>
           </div>
         )}
+
+        {results.degraded && (
+          <div
+            className="flex items-center gap-1.5 rounded border border-amber-900/40 bg-amber-950/20 px-2.5 py-1"
+            title={results.degraded}
+          >
+            <AlertTriangle className="size-3 text-amber-500" />
+            <span className="font-mono text-[10px] text-amber-400">
+              {results.degraded.startsWith("llm_") ? "Answer unavailable" : "Partial results"}
+            </span>
+          </div>
+        )}
       </div>
 
       {/* AI Answer */}
-      <AIAnswer answer={results.ai_answer} />
+      <AIAnswer answer={results.ai_answer} isStreaming={results.answer_pending} />
 
       {/* Source Documents heading */}
       <div className="animate-reveal-up delay-2 flex items-center gap-3">
@@ -1,17 +1,33 @@
-import type { Document, FilterMetadata, SearchFilters, SearchResult } from "@/lib/types";
+import type {
+  AnswerResult,
+  Document,
+  FilterMetadata,
+  SearchFilters,
+  SearchResult,
+} from "@/lib/types";
 import { apiFetch } from "./client";
 
 export async function searchDocuments(
   query: string,
   filters?: SearchFilters,
-  limit = 20
+  limit = 20,
+  asyncAnswer = false
 ): Promise<SearchResult> {
   return apiFetch<SearchResult>("/search", {
     method: "POST",
-    body: JSON.stringify({ query, filters, limit }),
+    body: JSON.stringify({ query, filters, limit, async_answer: asyncAnswer }),
   });
 }
 
+export async function getSearchAnswer(
+  queryId: string,
+  wait = 10
+): Promise<AnswerResult> {
+  return apiFetch<AnswerResult>(
+    `/search/${encodeURIComponent(queryId)}/answer?wait=${wait}`
+  );
+}
+
 export async function getDocument(id: string): Promise<Document> {
   return apiFetch<Document>(`/documents/${encodeURIComponent(id)}`);
 }
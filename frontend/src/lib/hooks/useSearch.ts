@@ -1,33 +1,64 @@
 "use client";
 
-import { useState, useCallback } from "react";
+import { useState, useCallback, useRef } from "react";
 import type { SearchFilters, SearchResult } from "@/lib/types";
-import { searchDocuments } from "@/lib/api/search";
+import { getSearchAnswer, searchDocuments } from "@/lib/api/search";
 
 export function useSearch() {
   const [results, setResults] = useState<SearchResult | null>(null);
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  // bumped by every search and clear, so a superseded answer poll stops
+  const generation = useRef(0);
+
+  const awaitAnswer = useCallback(async (queryId: string, current: number) => {
+    let update: Partial<SearchResult> = { degraded: "llm_unavailable" };
+    try {
+      let answer = await getSearchAnswer(queryId);
+      while (answer.status === "pending" && generation.current === current) {
+        answer = await getSearchAnswer(queryId);
+      }
+      if (answer.status === "complete" && answer.ai_answer) {
+        update = { ai_answer: answer.ai_answer, degraded: answer.degraded };
+      } else if (answer.degraded) {
+        update = { degraded: answer.degraded };
+      }
+    } catch {
+      // expired, or held by another worker: keep the documents without it
+    }
+    if (generation.current !== current) return;
+    setResults((prev) =>
+      prev && prev.query_id === queryId
+        ? { ...prev, ...update, answer_pending: false }
+        : prev
+    );
+  }, []);
 
   const search = useCallback(
     async (query: string, filters?: SearchFilters, limit = 20) => {
       if (!query.trim()) return;
+      const current = ++generation.current;
       setIsLoading(true);
       setError(null);
       try {
-        const data = await searchDocuments(query, filters, limit);
+        // documents come back first; the answer is fetched once it is ready
+        const data = await searchDocuments(query, filters, limit, true);
+        if (generation.current !== current) return;
         setResults(data);
+        if (data.answer_pending) void awaitAnswer(data.query_id, current);
       } catch (err) {
+        if (generation.current !== current) return;
         setError(err instanceof Error ? err.message : "Search failed");
         setResults(null);
       } finally {
-        setIsLoading(false);
+        if (generation.current === current) setIsLoading(false);
       }
     },
-    []
+    [awaitAnswer]
   );
 
   const clear = useCallback(() => {
+    generation.current++;
     setResults(null);
     setError(null);
   }, []);
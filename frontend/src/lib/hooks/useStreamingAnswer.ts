@@ -67,6 +67,10 @@ export function useStreamingAnswer() {
           try {
             const event: SSEEvent = JSON.parse(json);
             switch (event.type) {
+              case "documents":
+                setDocuments(event.documents || []);
+                setTotalResults(event.total_results || 0);
+                break;
               case "answer_chunk":
                 setAnswer((prev) => prev + (event.content || ""));
                 break;
@@ -82,11 +86,6 @@ export function useStreamingAnswer() {
                   },
                 ]);
                 break;
-              case "document":
-                if (event.document) {
-                  setDocuments((prev) => [...prev, event.document!]);
-                }
-                break;
               case "complete":
                 setTotalResults(event.total_results || 0);
                 break;
@@ -52,8 +52,19 @@ export interface SearchResult {
   ai_answer: AIAnswer;
   documents: Document[];
   total_results: number;
+  source: "local" | "remote" | "hybrid";
+  degraded?: string | null;
+  answer_pending?: boolean;
   search_time_ms: number | null;
   cached: boolean;
+  stale: boolean;
+}
+
+export interface AnswerResult {
+  query_id: string;
+  status: "pending" | "complete" | "failed";
+  ai_answer: AIAnswer | null;
+  degraded: string | null;
 }
 
 export interface HistoryEntry {
@@ -73,11 +84,19 @@ export interface FilterMetadata {
 }
 
 export interface SSEEvent {
-  type: "answer_chunk" | "citation" | "document" | "complete";
+  type: "documents" | "answer_chunk" | "citation" | "complete" | "timing" | "error";
   content?: string;
   document_id?: string;
   efta_id?: string;
   snippet?: string;
-  document?: Document;
+  documents?: Document[];
+  source?: "local" | "remote" | "hybrid";
+  cached?: boolean;
+  stale?: boolean;
   total_results?: number;
+  degraded?: string | null;
+  ttfb_ms?: number;
+  ttft_ms?: number | null;
+  total_ms?: number;
+  stages?: Record<string, number>;
 }